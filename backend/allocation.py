@@ -0,0 +1,220 @@
+from collections import defaultdict
+from datetime import datetime
+import logging
+from pymongo import UpdateOne
+from database import (
+    users_collection, rooms_collection, hostels_collection, applications_collection,
+    ReservationError, bump_versions, invalidate_hostel_views, rebuild_placements, refresh_vacancies, run_in_transaction
+)
+from cache import cache
+
+logger = logging.getLogger(__name__)
+
+def _load_hostel_state():
+    """Snapshot remaining hostel capacity keyed by hostel name."""
+    hostels = hostels_collection.find({}, {"hostel_name": 1, "capacity": 1, "current_occupancy": 1})
+    return {
+        hostel["hostel_name"]: hostel.get("capacity", 0) - hostel.get("current_occupancy", 0)
+        for hostel in hostels
+    }
+
+def _load_room_state():
+    """Snapshot rooms with free beds, grouped by (hostel_name, room type) in room-number order."""
+    rooms = rooms_collection.find(
+        {"$expr": {"$lt": ["$current_occupancy", "$capacity"]}},
+        {"hostel_name": 1, "room_number": 1, "type": 1, "capacity": 1, "current_occupancy": 1}
+    )
+    room_state = defaultdict(list)
+    for room in rooms:
+        room_state[(room["hostel_name"], room["type"])].append(
+            [room["room_number"], room["capacity"] - room["current_occupancy"]]
+        )
+    for free_rooms in room_state.values():
+        free_rooms.sort(key=lambda entry: entry[0])
+    return room_state
+
+def compute_allocation(applications, hostel_free, room_state, assign_rooms=True, known_bits_ids=None):
+    """Match applications to hostels (and rooms) in memory.
+
+    Applications are served first-come-first-served by `application_date`. Each one
+    gets the first hostel in its `hostel_preference` that still has hostel capacity
+    and a free bed of the preferred room type. `hostel_free` and `room_state` are
+    consumed in place. When `known_bits_ids` is given, applications from any other
+    student are left unassigned as unknown students. Returns a list of per-application
+    outcome dicts.
+    """
+    outcomes = []
+    seen_bits_ids = set()
+
+    for application in sorted(applications, key=lambda app: str(app.get("application_date", ""))):
+        bits_id = application.get("bits_id")
+        room_type = application.get("room_type_preference")
+        outcome = {
+            "application_id": str(application["_id"]),
+            "bits_id": bits_id,
+            "status": "unassigned",
+            "hostel_name": None,
+            "room_number": None,
+            "preference_rank": None,
+            "reason": None
+        }
+        outcomes.append(outcome)
+
+        if known_bits_ids is not None and bits_id not in known_bits_ids:
+            outcome["reason"] = "unknown student"
+            continue
+        if bits_id in seen_bits_ids:
+            outcome["reason"] = "duplicate application"
+            continue
+        seen_bits_ids.add(bits_id)
+
+        for rank, hostel_name in enumerate(application.get("hostel_preference") or []):
+            if hostel_free.get(hostel_name, 0) <= 0:
+                continue
+            free_rooms = room_state.get((hostel_name, room_type))
+            if not free_rooms:
+                continue
+
+            # Fill rooms in order so partially occupied rooms are completed first
+            room = free_rooms[0]
+            room[1] -= 1
+            if room[1] == 0:
+                free_rooms.pop(0)
+            hostel_free[hostel_name] -= 1
+
+            outcome.update({
+                "status": "assigned",
+                "hostel_name": hostel_name,
+                "room_number": room[0] if assign_rooms else None,
+                "preference_rank": rank + 1
+            })
+            break
+        else:
+            outcome["reason"] = "no preferred hostel has a free bed of the requested room type"
+
+    return outcomes
+
+def _take_beds(collection, targets, session):
+    """Add `count` to current_occupancy for each `(query, count)` target that has room, all or nothing.
+
+    Returns False if any target is full. Inside a transaction the caller's abort rolls the other
+    increments back; without one (session None) they are applied one at a time and undone here.
+    """
+    if session is not None:
+        result = collection.bulk_write([
+            UpdateOne({**query, "$expr": {"$lte": [{"$add": ["$current_occupancy", count]}, "$capacity"]}},
+                      {"$inc": {"current_occupancy": count}})
+            for query, count in targets
+        ], ordered=False, session=session)
+        return result.matched_count == len(targets)
+
+    taken = []
+    for query, count in targets:
+        result = collection.update_one(
+            {**query, "$expr": {"$lte": [{"$add": ["$current_occupancy", count]}, "$capacity"]}},
+            {"$inc": {"current_occupancy": count}}
+        )
+        if not result.matched_count:
+            _release_beds(collection, taken)
+            return False
+        taken.append((query, count))
+    return True
+
+def _release_beds(collection, targets):
+    """Undo `_take_beds` for targets whose increments were applied outside a transaction."""
+    if targets:
+        collection.bulk_write([UpdateOne(query, {"$inc": {"current_occupancy": -count}}) for query, count in targets],
+                              ordered=False)
+
+def _commit_allocation(outcomes, application_ids, assign_rooms):
+    """Persist assigned outcomes with one bulk write per collection, inside a single transaction.
+
+    Without transaction support the capacity increments are undone before a ReservationError
+    is raised, so a failed run leaves hostel and room occupancy as it found them.
+
+    `application_ids` maps the stringified application ids in `outcomes` back to the
+    stored `_id` values, which may be strings or ObjectIds.
+    """
+    application_ops = []
+    user_ops = []
+    hostel_increments = defaultdict(int)
+    room_increments = defaultdict(int)
+    now = datetime.utcnow()
+
+    for outcome in outcomes:
+        if outcome["status"] != "assigned":
+            continue
+        application_update = {"hostel_status": "assigned", "alloted_hostel": outcome["hostel_name"], "updated_at": now}
+        user_update = {"hostel_name": outcome["hostel_name"]}
+        if assign_rooms:
+            application_update.update({"room_status": "assigned", "alloted_room": outcome["room_number"]})
+            user_update["room_number"] = outcome["room_number"]
+            room_increments[(outcome["hostel_name"], outcome["room_number"])] += 1
+        hostel_increments[outcome["hostel_name"]] += 1
+
+        application_ops.append(UpdateOne({"_id": application_ids[outcome["application_id"]]}, {"$set": application_update}))
+        user_ops.append(UpdateOne({"bits_id": outcome["bits_id"]}, {"$set": user_update}))
+
+    if not application_ops:
+        return
+
+    hostel_targets = [({"hostel_name": hostel_name}, count) for hostel_name, count in hostel_increments.items()]
+    room_targets = [
+        ({"hostel_name": hostel_name, "room_number": room_number}, count)
+        for (hostel_name, room_number), count in room_increments.items()
+    ]
+
+    def commit(session):
+        # Capacity is re-checked at write time so a concurrent single assignment cannot push a hostel or room over
+        if not _take_beds(hostels_collection, hostel_targets, session):
+            raise ReservationError("Hostel capacity changed while the allocation was being computed.")
+        if room_targets and not _take_beds(rooms_collection, room_targets, session):
+            if session is None:
+                _release_beds(hostels_collection, hostel_targets)
+            raise ReservationError("Room capacity changed while the allocation was being computed.")
+
+        applications_collection.bulk_write(application_ops, ordered=False, session=session)
+        users_collection.bulk_write(user_ops, ordered=False, session=session)
+        rebuild_placements([outcome["bits_id"] for outcome in outcomes if outcome["status"] == "assigned"], session)
+
+    run_in_transaction(commit)
+    refresh_vacancies(hostel_increments.keys())
+    invalidate_hostel_views()
+    cache.invalidate("available_rooms")
+    bump_versions("hostels", "rooms", "applications")
+
+def run_allocation(assign_rooms=True, dry_run=False, progress=None):
+    """Allocate every pending application in one pass and return the per-student outcomes.
+
+    `progress(message)`, when given, is called between computing the allocation and committing
+    it, so a background job can still be cancelled before anything is written.
+    """
+    applications = list(applications_collection.find(
+        {"hostel_status": "pending"},
+        {"bits_id": 1, "hostel_preference": 1, "room_type_preference": 1, "application_date": 1}
+    ))
+    logger.info("Running allocation for %s pending applications.", len(applications))
+
+    # Applications whose student no longer exists must not take a bed, as in reserve_hostel_bed
+    known_bits_ids = set(users_collection.distinct(
+        "bits_id", {"bits_id": {"$in": list({application.get("bits_id") for application in applications})}}
+    ))
+    outcomes = compute_allocation(applications, _load_hostel_state(), _load_room_state(), assign_rooms, known_bits_ids)
+    if progress:
+        progress(f"{sum(1 for outcome in outcomes if outcome['status'] == 'assigned')} applications allocated")
+    if not dry_run:
+        application_ids = {str(application["_id"]): application["_id"] for application in applications}
+        _commit_allocation(outcomes, application_ids, assign_rooms)
+
+    assigned = sum(1 for outcome in outcomes if outcome["status"] == "assigned")
+    first_choice = sum(1 for outcome in outcomes if outcome["preference_rank"] == 1)
+    summary = {
+        "pending": len(applications),
+        "assigned": assigned,
+        "unassigned": len(outcomes) - assigned,
+        "first_preference": first_choice,
+        "unknown_student": sum(1 for outcome in outcomes if outcome["reason"] == "unknown student"),
+        "dry_run": dry_run
+    }
+    logger.info("Allocation finished: %s", summary)
+    return {"summary": summary, "outcomes": outcomes}
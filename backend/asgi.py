@@ -0,0 +1,173 @@
+"""ASGI entry point serving the same API without blocking on Mongo.
+
+The hot read endpoints behind the dashboards are served natively with the Motor-based
+functions in async_database.py; every other route falls through to the Flask app.
+
+    uvicorn asgi:app --workers 4
+"""
+import json
+import logging
+from bson import ObjectId
+from bson.errors import InvalidId
+from starlette.applications import Starlette
+from starlette.middleware.wsgi import WSGIMiddleware
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Mount, Route
+import async_database
+from live_updates import stream_queue_async
+from json_provider import MongoJSONProvider
+from main import MAX_PAGE_SIZE, PRIVATE_REVALIDATE, PUBLIC_REVALIDATE, app as flask_app
+from sessions import AccessDenied, authorize
+from database import version_tag
+
+logger = logging.getLogger(__name__)
+
+class MongoJSONResponse(JSONResponse):
+    """JSON response that encodes ObjectId, datetime and dataclasses like the Flask app does."""
+
+    def __init__(self, content, status_code: int = 200, headers: dict = None):
+        # Matches the Flask-CORS default for the simple GET requests served here
+        headers = {"Access-Control-Allow-Origin": "*", **(headers or {})}
+        super().__init__(content, status_code, headers)
+
+    def render(self, content) -> bytes:
+        return json.dumps(content, default=MongoJSONProvider.default, separators=(",", ":")).encode("utf-8")
+
+def page_args(request, id_type=ObjectId):
+    """Read the `limit`/`after` query parameters used for keyset pagination."""
+    try:
+        limit = max(1, min(int(request.query_params["limit"]), MAX_PAGE_SIZE))
+    except (KeyError, ValueError):
+        # Missing or malformed limits mean "no limit", as with Flask's `request.args.get(type=int)`
+        limit = None
+    after = request.query_params.get("after")
+    if after is not None:
+        after = id_type(after)
+    return limit, after
+
+def wants_ndjson(request) -> bool:
+    return (request.query_params.get("format") == "ndjson"
+            or request.headers.get("accept", "").startswith("application/x-ndjson"))
+
+async def list_response(request, cursor, limit):
+    """Send a list cursor as a JSON array, or stream it as NDJSON when requested (see main.list_response)."""
+    if wants_ndjson(request):
+        async def generate():
+            async for document in cursor:
+                yield json.dumps(document, default=MongoJSONProvider.default) + "\n"
+        return StreamingResponse(generate(), media_type="application/x-ndjson",
+                                 headers={"Access-Control-Allow-Origin": "*"})
+
+    documents = await cursor.to_list(length=None)
+    headers = {}
+    if limit and len(documents) == limit:
+        headers["X-Next-After"] = str(documents[-1]["_id"])
+    return MongoJSONResponse(documents, headers=headers)
+
+def require_role(endpoint, *roles, query_token=False):
+    """Wrap an endpoint with the same session check as main.require_role.
+
+    Tokens are checked in-process; the periodic revocation sync is a single indexed query,
+    so it runs inline rather than on the thread pool.
+    """
+    async def wrapper(request):
+        authorization = request.headers.get("authorization")
+        if authorization is None and query_token and "access_token" in request.query_params:
+            authorization = f"Bearer {request.query_params['access_token']}"
+        request.state.principal = authorize(authorization, roles, request.path_params.get("hostel_name"))
+        return await endpoint(request)
+    return wrapper
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag value, as conditional GETs use."""
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or any((tag[2:] if tag.startswith("W/") else tag) == f'"{etag}"' for tag in tags)
+
+def conditional(endpoint, *collections, cache_control=PUBLIC_REVALIDATE):
+    """Wrap an endpoint with the same ETag handling as main.conditional."""
+    async def wrapper(request):
+        try:
+            versions = await async_database.collection_versions(collections)
+        except Exception as e:
+            logger.error("Could not read collection versions for %s: %s", request.url.path, e)
+            return await endpoint(request)
+        etag = version_tag(versions, f"{request.url.path}?{request.url.query}", wants_ndjson(request))
+        headers = {"ETag": f'"{etag}"', "Cache-Control": cache_control, "Vary": "Accept"}
+        if etag_matches(request.headers.get("if-none-match", ""), etag):
+            return Response(status_code=304, headers={"Access-Control-Allow-Origin": "*", **headers})
+        response = await endpoint(request)
+        if response.status_code == 200:
+            response.headers.update(headers)
+        return response
+    return wrapper
+
+async def get_hostels(request):
+    return MongoJSONResponse(await async_database.list_all_hostels())
+
+async def available_hostels(request):
+    return MongoJSONResponse(await async_database.get_available_hostels())
+
+async def available_rooms(request):
+    return MongoJSONResponse(await async_database.find_available_rooms(request.path_params["hostel_name"]))
+
+async def get_students_in_hostel(request):
+    return MongoJSONResponse(await async_database.get_students_by_hostel(
+        request.path_params["hostel_name"], request.query_params.get("room_number")))
+
+async def get_user(request):
+    # Students and wardens may only read their own record, as in main.get_user
+    principal = request.state.principal
+    if principal.role != "admin" and request.path_params["email"] != principal.email:
+        return MongoJSONResponse({"message": "Not allowed for this user"}, status_code=403)
+    user = await async_database.find_user(request.path_params["email"])
+    if user:
+        return MongoJSONResponse(user)
+    return MongoJSONResponse({"message": "User not found"}, status_code=404)
+
+async def get_rooms(request):
+    limit, after = page_args(request)
+    return await list_response(request, async_database.list_all_rooms(limit, after), limit)
+
+def application_list(list_function):
+    """Build an endpoint serving one of the paginated application lists, answering conditional GETs."""
+    async def endpoint(request):
+        limit, after = page_args(request, str)
+        return await list_response(request, list_function(*request.path_params.values(), limit, after), limit)
+    return conditional(endpoint, "applications", cache_control=PRIVATE_REVALIDATE)
+
+async def pending_stream(request):
+    """Server-Sent Events for the admin queue, or a warden's queue when `hostel_name` is in the path."""
+    return StreamingResponse(stream_queue_async(request.path_params.get("hostel_name")),
+                             media_type="text/event-stream",
+                             headers={"Access-Control-Allow-Origin": "*", "Cache-Control": "no-cache",
+                                      "X-Accel-Buffering": "no"})
+
+async def invalid_id(request, exc):
+    return MongoJSONResponse({"error": "Invalid id"}, status_code=400)
+
+async def access_denied(request, exc):
+    return MongoJSONResponse({"message": str(exc)}, status_code=exc.status)
+
+routes = [
+    Route("/hostels", conditional(get_hostels, "hostels")),
+    Route("/available-hostels", conditional(available_hostels, "hostels")),
+    Route("/hostels/{hostel_name}/available_rooms", conditional(available_rooms, "rooms")),
+    Route("/hostels/{hostel_name}/students", require_role(get_students_in_hostel, "warden", "admin")),
+    Route("/user/{email}", require_role(get_user, "student", "warden", "admin")),
+    Route("/rooms", conditional(get_rooms, "rooms")),
+    Route("/pending-requests-admin/stream", require_role(pending_stream, "admin", query_token=True)),
+    Route("/pending-requests-warden/{hostel_name}/stream",
+          require_role(pending_stream, "warden", "admin", query_token=True)),
+    Route("/pending-requests-admin",
+          require_role(application_list(async_database.get_pending_applications_admin), "admin")),
+    Route("/closed-requests-admin",
+          require_role(application_list(async_database.get_closed_applications_admin), "admin")),
+    Route("/pending-requests-warden/{hostel_name}",
+          require_role(application_list(async_database.get_pending_applications_warden), "warden", "admin")),
+    Route("/closed-requests-warden/{hostel_name}",
+          require_role(application_list(async_database.get_closed_applications_warden), "warden", "admin")),
+    # Everything else, including all writes, is handled by the Flask app
+    Mount("/", WSGIMiddleware(flask_app)),
+]
+
+app = Starlette(routes=routes, exception_handlers={InvalidId: invalid_id, AccessDenied: access_denied})
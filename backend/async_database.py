@@ -0,0 +1,118 @@
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING
+import logging
+from cache import cache
+from collections_format import Room
+from metrics import command_metrics
+from database import (
+    MONGO_DB_NAME, MONGO_URI, ROOM_LIST_FIELDS, APPLICATION_LIST_FIELDS, USER_PRIVATE_FIELDS, ROSTER_ORDER,
+    ROSTER_PROJECTION, note_versions
+)
+
+logger = logging.getLogger(__name__)
+
+# Non-blocking counterpart of the client in database.py; the event loop is bound on first use
+client = AsyncIOMotorClient(MONGO_URI, event_listeners=[command_metrics])
+
+db = client[MONGO_DB_NAME]
+users_collection = db.users
+rooms_collection = db.rooms
+hostels_collection = db.hostels
+applications_collection = db.applications
+vacancies_collection = db.vacancies
+placements_collection = db.placements
+versions_collection = db.versions
+
+# Async mirrors of the read functions in database.py used by the dashboards.
+# They share cache entries with database.py, so the write paths there invalidate both.
+def find_page(collection, query: dict, projection: dict = None, limit: int = None, after=None):
+    """Return a Motor cursor over `query` in `_id` order, starting after the `after` id (keyset pagination)."""
+    if after is not None:
+        query = {"$and": [query, {"_id": {"$gt": after}}]}
+    cursor = collection.find(query, projection).sort("_id", ASCENDING)
+    if limit:
+        cursor = cursor.limit(limit)
+    return cursor
+
+async def collection_versions(names) -> dict:
+    """Current versions of the named collections, as database.collection_versions reads them."""
+    documents = await versions_collection.find({"_id": {"$in": list(names)}}).to_list(length=None)
+    return note_versions(names, documents)
+
+async def find_user(email):
+    return await users_collection.find_one({"email": email}, USER_PRIVATE_FIELDS)
+
+@cache.cached("hostels")
+async def list_all_hostels():
+    """Fetch and return the list of hostels from the database with warden details."""
+    fields = ["hostel_name", "location", "total_rooms", "capacity", "current_occupancy",
+              "warden_name", "warden_contact", "warden_email"]
+    hostel_list = []
+    async for hostel in hostels_collection.find({}):
+        hostel_dict = {"_id": str(hostel["_id"])}
+        hostel_dict.update({field: hostel.get(field) for field in fields})
+        hostel_list.append(hostel_dict)
+    return hostel_list
+
+@cache.cached("available_hostels")
+async def get_available_hostels():
+    """Fetch hostels that still have free beds, using the vacancy index."""
+    hostel_names = [
+        vacancy["hostel_name"]
+        async for vacancy in vacancies_collection.find({"room_type": None, "free_beds": {"$gt": 0}}, {"hostel_name": 1})
+    ]
+    hostel_list = []
+    async for hostel in hostels_collection.find({"hostel_name": {"$in": hostel_names}}):
+        hostel["_id"] = str(hostel["_id"])
+        hostel_list.append(hostel)
+    return hostel_list
+
+@cache.cached("available_rooms")
+async def find_available_rooms(hostel_name: str):
+    """Fetch rooms in a hostel that still have free beds, using the vacancy index.
+
+    Returns Room dataclasses like the sync version, since both share the "available_rooms"
+    cache entries.
+    """
+    room_numbers = [
+        room_number
+        async for vacancy in vacancies_collection.find({"hostel_name": hostel_name, "room_type": {"$ne": None}}, {"rooms": 1})
+        for room_number in vacancy["rooms"]
+    ]
+    cursor = rooms_collection.find(
+        {"hostel_name": hostel_name, "room_number": {"$in": room_numbers}},
+        {"_id": 0, "hostel_name": 1, "room_number": 1, "type": 1, "capacity": 1,
+         "current_occupancy": 1, "occupants": 1, "features": 1}
+    )
+    return [Room.from_doc(room) async for room in cursor]
+
+def list_all_rooms(limit: int = None, after=None):
+    return find_page(rooms_collection, {}, ROOM_LIST_FIELDS, limit, after)
+
+def get_closed_applications_admin(limit: int = None, after=None):
+    return find_page(applications_collection, {"hostel_status": {"$ne": "pending"}}, APPLICATION_LIST_FIELDS, limit, after)
+
+def get_pending_applications_admin(limit: int = None, after=None):
+    return find_page(applications_collection, {"hostel_status": "pending"}, APPLICATION_LIST_FIELDS, limit, after)
+
+def get_closed_applications_warden(hostel_name: str, limit: int = None, after=None):
+    return find_page(
+        applications_collection,
+        {"room_status": {"$ne": "pending"}, "alloted_hostel": hostel_name},
+        APPLICATION_LIST_FIELDS, limit, after
+    )
+
+def get_pending_applications_warden(hostel_name: str, limit: int = None, after=None):
+    return find_page(
+        applications_collection,
+        {"room_status": "pending", "hostel_status": "assigned", "alloted_hostel": hostel_name},
+        APPLICATION_LIST_FIELDS, limit, after
+    )
+
+async def get_students_by_hostel(hostel_name, room_number=None):
+    """Fetch the students placed in a hostel, or one of its rooms, from the placement read model."""
+    query = {"hostel_name": hostel_name}
+    if room_number is not None:
+        query["room_number"] = room_number
+    cursor = placements_collection.find(query, ROSTER_PROJECTION).sort(ROSTER_ORDER)
+    return await cursor.to_list(length=None)
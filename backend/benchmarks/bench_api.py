@@ -0,0 +1,459 @@
+"""Load-test every API route against a seeded synthetic campus and record per-endpoint latency.
+
+Run from the backend directory. By default the Flask app is driven in-process (no network
+hop) against a local mongod, in the scratch database `hostel_bench`:
+
+    python -m benchmarks.bench_api --output results.json
+    python -m benchmarks.bench_api --in-memory            # mongomock stand-in, no mongod needed
+    python -m benchmarks.bench_api --url http://127.0.0.1:5000   # a running server (requires httpx)
+
+A server under test with --url must use the same database (MONGO_DB_NAME=hostel_bench).
+The campus is reseeded before each run, then each phase keeps --concurrency clients busy
+for --duration seconds with its mix of requests:
+
+    login       login bursts
+    dashboard   admin, warden and student dashboard polling, placements, waitlists and exports
+    assignment  hostel and room assignment bursts, next-room assignment with waitlisting, bulk
+                room decisions and move-outs (ends early once no requests are left)
+    mixed       all of the above together, plus registrations, applications, imports and admin jobs
+
+Left out on purpose: the event streams (/pending-requests-*/stream), which hold a connection
+open rather than answer a request; /metrics; and the admin set-up routes that create, edit or
+delete hostels, rooms, wardens, users and allotments, which would reshape the campus mid-run.
+They are listed under "Not exercised" in the summary.
+
+Results (throughput, p50/p95/p99 latency and status counts per endpoint and phase) are
+written as JSON with sorted keys so runs can be diffed between commits; --baseline prints
+the p95 change against an earlier results file. mongomock does not support every
+aggregation stage used by the dashboards, so compare in-memory runs only with each other.
+"""
+from collections import defaultdict
+from dataclasses import asdict
+from datetime import datetime
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+
+PHASES = ["login", "dashboard", "assignment", "mixed"]
+
+def percentile(ordered, fraction):
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)] if ordered else None
+
+class Recorder:
+    """Latencies and status codes per endpoint, shared by the client threads of a phase."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+
+    def add(self, endpoint: str, status: int, latency: float):
+        with self._lock:
+            self.latencies[endpoint].append(latency)
+            self.statuses[endpoint][str(status)] += 1
+
+    def summary(self, elapsed: float) -> dict:
+        endpoints = {}
+        for endpoint, samples in self.latencies.items():
+            ordered = sorted(samples)
+            endpoints[endpoint] = {
+                "count": len(ordered),
+                "rps": round(len(ordered) / elapsed, 2),
+                "p50_ms": round(percentile(ordered, 0.50) * 1000, 3),
+                "p95_ms": round(percentile(ordered, 0.95) * 1000, 3),
+                "p99_ms": round(percentile(ordered, 0.99) * 1000, 3),
+                "max_ms": round(ordered[-1] * 1000, 3),
+                "statuses": dict(self.statuses[endpoint]),
+            }
+        requests = sum(endpoint["count"] for endpoint in endpoints.values())
+        return {"elapsed_s": round(elapsed, 3), "requests": requests,
+                "throughput_rps": round(requests / elapsed, 2), "endpoints": endpoints}
+
+class InProcessClient:
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, json=None, headers=None, data=None):
+        response = self.client.open(path, method=method, json=json, data=data, headers=headers)
+        # Read streamed bodies such as exports in full, as a network client would
+        response.get_data()
+        return response.status_code, response.get_json(silent=True)
+
+class HttpClient:
+    def __init__(self, base_url):
+        import httpx  # Optional dependency, only needed with --url
+        self.client = httpx.Client(base_url=base_url, timeout=30)
+
+    def request(self, method, path, json=None, headers=None, data=None):
+        response = self.client.request(method, path, json=json, content=data, headers=headers)
+        try:
+            body = response.json()
+        except ValueError:
+            body = None
+        return response.status_code, body
+
+class Workload:
+    """The request mix, with the campus state it needs: tokens and work still waiting to be done."""
+
+    def __init__(self, campus: dict, tokens: dict, password: str, recorder: Recorder):
+        self.recorder = recorder
+        self.password = password
+        self.tokens = tokens
+        self.hostels = [hostel["hostel_name"] for hostel in campus["hostels"]]
+        self.students = [user for user in campus["users"] if user["role"] == "student"]
+        # Students logged in before the phase, for the routes that need their session
+        self.signed_in = [user for user in self.students if user["email"] in tokens]
+        self.rooms = campus["rooms"]
+        self.room_ids = [str(room["_id"]) for room in campus["rooms"]]
+        applied = {application["bits_id"] for application in campus["applications"]}
+        self._lock = threading.Lock()
+        self.unapplied = [user["bits_id"] for user in self.students if user["bits_id"] not in applied]
+        self.awaiting_hostel = [application for application in campus["applications"]
+                                if application["hostel_status"] == "pending"]
+        self.awaiting_room = [application for application in campus["applications"]
+                              if application["hostel_status"] == "assigned"]
+        # Students given a room during the run, and those waitlisted for one
+        self.placed = []
+        self.waitlisted = []
+        self.registered = 0
+
+    def _take(self, pool):
+        with self._lock:
+            return pool.pop() if pool else None
+
+    def _put(self, pool, item):
+        with self._lock:
+            pool.append(item)
+
+    def call(self, client, endpoint, path=None, json=None, who=None, token=None, data=None):
+        """Send a request for `endpoint` ("METHOD /rule") to `path` and record its latency.
+
+        `who` names a session in `tokens`; `token` sends that token instead.
+        """
+        method, rule = endpoint.split(" ", 1)
+        token = token or (self.tokens[who] if who else None)
+        headers = {"Authorization": f"Bearer {token}"} if token else None
+        started = time.perf_counter()
+        status, body = client.request(method, path or rule, json=json, headers=headers, data=data)
+        self.recorder.add(endpoint, status, time.perf_counter() - started)
+        return status, body
+
+    # Operations; each returns False once it has nothing left to do (None when there may be more later)
+    def login(self, client, rng):
+        student = rng.choice(self.students)
+        self.call(client, "POST /login", json={"email": student["email"], "password": self.password})
+
+    def session(self, client, rng):
+        student = rng.choice(self.students)
+        status, body = self.call(client, "POST /login", json={"email": student["email"], "password": self.password})
+        if status == 200:
+            # Not kept in `tokens`: logging out revokes it
+            self.call(client, "POST /logout", token=body["token"])
+
+    def register(self, client, rng):
+        with self._lock:
+            self.registered += 1
+            number = self.registered
+        self.call(client, "POST /register", json={
+            "name": f"Registered {number}", "password": self.password, "role": "student",
+            "email": f"registered{number}-{os.getpid()}@bench.local", "contact_number": "7000000000",
+            "bits_id": f"2024R{os.getpid()}{number:05d}",
+        })
+
+    def student_view(self, client, rng):
+        student = rng.choice(self.signed_in)
+        self.call(client, "GET /user/<email>", f"/user/{student['email']}", who=student["email"])
+        self.call(client, "GET /available-hostels")
+        self.call(client, "GET /hostels")
+
+    def placement_view(self, client, rng):
+        student = rng.choice(self.signed_in)
+        self.call(client, "GET /students/<bits_id>/placement", f"/students/{student['bits_id']}/placement",
+                  who=student["email"])
+        self.call(client, "GET /waitlist/positions/<bits_id>", f"/waitlist/positions/{student['bits_id']}",
+                  who=student["email"])
+
+    def room_view(self, client, rng):
+        room_id = rng.choice(self.room_ids)
+        self.call(client, "GET /room/<room_id>", f"/room/{room_id}")
+        self.call(client, "GET /room/<room_id>/availability", f"/room/{room_id}/availability")
+
+    def apply(self, client, rng):
+        bits_id = self._take(self.unapplied)
+        if bits_id is None:
+            return False
+        self.call(client, "POST /applications", json={
+            "user_id": bits_id, "hostel_preference": rng.sample(self.hostels, min(3, len(self.hostels))),
+            "room_type_preference": rng.choice(["single", "double", "triple"]),
+        })
+
+    def admin_poll(self, client, rng):
+        self.call(client, "GET /pending-requests-admin", "/pending-requests-admin?limit=100", who="admin")
+        self.call(client, "GET /closed-requests-admin", "/closed-requests-admin?limit=100", who="admin")
+        self.call(client, "GET /dashboard/admin", who="admin")
+        self.call(client, "GET /rooms", "/rooms?limit=100")
+        self.call(client, "GET /wardens", who="admin")
+        self.call(client, "GET /wardens-for-assign", who="admin")
+
+    def warden_poll(self, client, rng):
+        hostel = rng.choice(self.hostels)
+        for endpoint, path in [
+            ("GET /pending-requests-warden/<hostel_name>", f"/pending-requests-warden/{hostel}?limit=100"),
+            ("GET /closed-requests-warden/<hostel_name>", f"/closed-requests-warden/{hostel}?limit=100"),
+            ("GET /dashboard/warden/<hostel_name>", f"/dashboard/warden/{hostel}"),
+            ("GET /hostels/<hostel_name>/students", f"/hostels/{hostel}/students"),
+            ("GET /hostels/<hostel_name>/available_rooms", f"/hostels/{hostel}/available_rooms"),
+            ("GET /hostels/<hostel_name>/vacancies", f"/hostels/{hostel}/vacancies"),
+        ]:
+            self.call(client, endpoint, path, who=hostel)
+
+    def warden_waitlist(self, client, rng):
+        hostel = rng.choice(self.hostels)
+        self.call(client, "GET /waitlist/<hostel_name>", f"/waitlist/{hostel}?limit=50", who=hostel)
+        entry = self._take(self.waitlisted)
+        if entry is not None:
+            bits_id, hostel, room_type = entry
+            self.call(client, "DELETE /waitlist/<hostel_name>/<bits_id>", f"/waitlist/{hostel}/{bits_id}?room_type={room_type}",
+                      who=hostel)
+
+    def export(self, client, rng):
+        hostel = rng.choice(self.hostels)
+        self.call(client, "GET /hostels/<hostel_name>/students/export", f"/hostels/{hostel}/students/export", who=hostel)
+        self.call(client, "GET /applications/export", who=hostel)
+
+    def assign_hostel(self, client, rng):
+        application = self._take(self.awaiting_hostel)
+        if application is None:
+            return False
+        hostel = application["hostel_preference"][0]
+        status, _ = self.call(client, "PUT /assign-hostel/<bits_id>", f"/assign-hostel/{application['bits_id']}",
+                              json={"hostel_name": hostel}, who="admin")
+        if status == 200:
+            with self._lock:
+                self.awaiting_room.append({**application, "alloted_hostel": hostel})
+
+    def assign_room(self, client, rng):
+        application = self._take(self.awaiting_room)
+        if application is None:
+            return False
+        hostel = application["alloted_hostel"]
+        room_type = application["room_type_preference"]
+        status, body = self.call(client, "GET /hostels/<hostel_name>/vacancies",
+                                 f"/hostels/{hostel}/vacancies?type={room_type}", who=hostel)
+        if status == 200 and body and body.get("room_number"):
+            status, _ = self.call(client, "PUT /room-requests/<bits_id>/assign-room",
+                                  f"/room-requests/{application['bits_id']}/assign-room",
+                                  json={"hostel_name": hostel, "room_number": body["room_number"]}, who=hostel)
+            if status == 200:
+                self._put(self.placed, (application["bits_id"], hostel))
+
+    def assign_next_room(self, client, rng):
+        application = self._take(self.awaiting_room)
+        if application is None:
+            return False
+        hostel = application["alloted_hostel"]
+        room_type = application["room_type_preference"]
+        status, _ = self.call(client, "POST /room-requests/<bits_id>/assign-next-room",
+                              f"/room-requests/{application['bits_id']}/assign-next-room",
+                              json={"hostel_name": hostel, "room_type": room_type}, who=hostel)
+        if status == 200:
+            self._put(self.placed, (application["bits_id"], hostel))
+        elif status == 202:
+            self._put(self.waitlisted, (application["bits_id"], hostel, room_type))
+
+    def decide_rooms(self, client, rng):
+        with self._lock:
+            batch = [self.awaiting_room.pop() for _ in range(min(10, len(self.awaiting_room)))]
+        if not batch:
+            return False
+        self.call(client, "POST /applications/decisions/<kind>", "/applications/decisions/room",
+                  json={"status": "approved", "application_ids": [application["_id"] for application in batch]},
+                  who="admin")
+
+    def vacate(self, client, rng):
+        placed = self._take(self.placed)
+        if placed is None:
+            # More students may still be given rooms
+            return None if self.awaiting_hostel or self.awaiting_room else False
+        bits_id, hostel = placed
+        self.call(client, "POST /students/<bits_id>/vacate", f"/students/{bits_id}/vacate", who=hostel)
+
+    def health(self, client, rng):
+        self.call(client, "GET /")
+        self.call(client, "GET /healthz")
+        self.call(client, "GET /readyz")
+
+    def admin_ops(self, client, rng):
+        self.call(client, "POST /allocate/run", json={"dry_run": True}, who="admin")
+        self.call(client, "GET /cache/stats", who="admin")
+        status, job = self.call(client, "POST /jobs", json={"type": "refresh_vacancies"}, who="admin")
+        if status == 202:
+            self.call(client, "GET /jobs/<job_id>", f"/jobs/{job['_id']}", who="admin")
+        self.call(client, "GET /jobs", "/jobs?limit=50", who="admin")
+        # No worker runs during the benchmark, so queued jobs are cancelled rather than left to pile up
+        status, job = self.call(client, "POST /placements/rebuild", "/placements/rebuild?background=1", who="admin")
+        if status == 202:
+            self.call(client, "POST /jobs/<job_id>/cancel", f"/jobs/{job['_id']}/cancel", who="admin")
+        self.call(client, "GET /placements/check", who="admin")
+        hostel = rng.choice(self.hostels)
+        self.call(client, "POST /waitlist/<hostel_name>/promote", f"/waitlist/{hostel}/promote", who="admin")
+
+    def import_rooms(self, client, rng):
+        # Re-importing existing rooms is an upsert that keeps occupancy, so the campus is unchanged
+        rows = rng.sample(self.rooms, min(20, len(self.rooms)))
+        body = "hostel_name,room_number,type,capacity\n" + "".join(
+            f"{room['hostel_name']},{room['room_number']},{room['type']},{room['capacity']}\n" for room in rows
+        )
+        self.call(client, "POST /import/<kind>", "/import/rooms?format=csv", data=body, who="admin")
+
+    def mix(self, phase: str):
+        """(operation, weight) pairs for a phase."""
+        return {
+            "login": [(self.login, 1)],
+            "dashboard": [(self.admin_poll, 1), (self.warden_poll, 3), (self.student_view, 4), (self.room_view, 1),
+                          (self.placement_view, 2), (self.warden_waitlist, 1), (self.export, 0.3)],
+            "assignment": [(self.assign_hostel, 1), (self.assign_room, 1), (self.assign_next_room, 1),
+                           (self.decide_rooms, 0.1), (self.vacate, 0.3)],
+            "mixed": [(self.login, 1), (self.session, 0.2), (self.register, 0.2), (self.student_view, 6),
+                      (self.room_view, 1), (self.placement_view, 2), (self.apply, 1), (self.admin_poll, 1),
+                      (self.warden_poll, 3), (self.warden_waitlist, 1), (self.export, 0.3), (self.assign_hostel, 1),
+                      (self.assign_room, 1), (self.assign_next_room, 1), (self.decide_rooms, 0.1), (self.vacate, 0.3),
+                      (self.health, 0.5), (self.admin_ops, 0.2), (self.import_rooms, 0.1)],
+        }[phase]
+
+def run_phase(phase, make_client, campus, tokens, password, concurrency, duration, seed):
+    recorder = Recorder()
+    workload = Workload(campus, tokens, password, recorder)
+    deadline = time.perf_counter() + duration
+
+    def client_loop(index):
+        rng = random.Random(f"{seed}-{phase}-{index}")
+        client = make_client()
+        operations = list(workload.mix(phase))
+        while operations and time.perf_counter() < deadline:
+            operation = rng.choices(operations, weights=[weight for _, weight in operations])[0]
+            if operation[0](client, rng) is False:
+                operations.remove(operation)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client_loop, args=(index,)) for index in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return recorder.summary(time.perf_counter() - started)
+
+def route_names(app) -> set:
+    """Every "METHOD /rule" the Flask app serves."""
+    return {
+        f"{method} {rule.rule}"
+        for rule in app.url_map.iter_rules() if rule.endpoint != "static"
+        for method in rule.methods - {"HEAD", "OPTIONS"}
+    }
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+
+def print_summary(results: dict, baseline: dict = None):
+    print(f"{'phase':<11} {'endpoint':<48} {'count':>7} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+          + (f" {'p95 vs base':>12}" if baseline else ""))
+    for phase, summary in results["phases"].items():
+        for endpoint, stats in sorted(summary["endpoints"].items()):
+            line = (f"{phase:<11} {endpoint:<48} {stats['count']:>7} {stats['rps']:>8.1f} "
+                    f"{stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f} {stats['p99_ms']:>8.2f}")
+            if baseline:
+                before = baseline.get("phases", {}).get(phase, {}).get("endpoints", {}).get(endpoint)
+                line += f" {(stats['p95_ms'] / before['p95_ms'] - 1) * 100:>+11.1f}%" if before and before["p95_ms"] else f" {'new':>12}"
+            print(line)
+        print(f"{phase:<11} {'total':<48} {summary['requests']:>7} {summary['throughput_rps']:>8.1f}")
+    if results["unexercised_routes"]:
+        print("Not exercised:", ", ".join(results["unexercised_routes"]))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--in-memory", action="store_true", help="use mongomock instead of a mongod")
+    parser.add_argument("--url", help="benchmark a running server instead of the app in-process")
+    parser.add_argument("--hostels", type=int, default=20)
+    parser.add_argument("--rooms-per-hostel", type=int, default=50)
+    parser.add_argument("--students", type=int, default=5000)
+    parser.add_argument("--applications", type=int, default=3000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--student-sessions", type=int, default=50,
+                        help="students logged in before each phase for the student routes")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10, help="seconds per phase")
+    parser.add_argument("--phases", default=",".join(PHASES))
+    parser.add_argument("--output", default="bench_api_results.json")
+    parser.add_argument("--baseline", help="earlier results file to compare p95 latency against")
+    args = parser.parse_args()
+    if args.in_memory and args.url:
+        parser.error("--in-memory cannot be combined with --url: the server would not see the seeded data")
+
+    os.environ.setdefault("MONGO_DB_NAME", "hostel_bench")
+    if args.in_memory:
+        import mongomock  # Optional dependency, only needed with --in-memory
+        import mongomock.gridfs
+        import pymongo
+        pymongo.MongoClient = mongomock.MongoClient
+        mongomock.gridfs.enable_gridfs_integration()
+    import database
+    if args.in_memory:
+        database._transactions_supported = False
+    from benchmarks.campus import ADMIN_EMAIL, BENCH_PASSWORD, CampusSpec, seed_campus, student_email, warden_email
+    from main import app
+
+    spec = CampusSpec(hostels=args.hostels, rooms_per_hostel=args.rooms_per_hostel, students=args.students,
+                      applications=args.applications, seed=args.seed)
+    make_client = (lambda: HttpClient(args.url)) if args.url else (lambda: InProcessClient(app))
+    exercised = set()
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "created_at": datetime.utcnow().isoformat(timespec="seconds"),
+            "target": args.url or "in-process",
+            "store": "mongomock" if args.in_memory else database.MONGO_URI,
+            "campus": asdict(spec),
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+        },
+        "phases": {},
+    }
+
+    for phase in args.phases.split(","):
+        # Every phase starts from the same campus so runs are comparable
+        campus = seed_campus(spec)
+        client = make_client()
+        tokens = {"admin": client.request("POST", "/login", json={"email": ADMIN_EMAIL, "password": BENCH_PASSWORD})[1]["token"]}
+        for index, hostel in enumerate(hostel["hostel_name"] for hostel in campus["hostels"]):
+            tokens[hostel] = client.request("POST", "/login", json={"email": warden_email(index), "password": BENCH_PASSWORD})[1]["token"]
+        for index in range(max(1, min(args.student_sessions, args.students))):
+            email = student_email(index)
+            tokens[email] = client.request("POST", "/login", json={"email": email, "password": BENCH_PASSWORD})[1]["token"]
+        print(f"Running {phase} phase for {args.duration}s with {args.concurrency} clients...", file=sys.stderr)
+        results["phases"][phase] = run_phase(phase, make_client, campus, tokens, BENCH_PASSWORD,
+                                             args.concurrency, args.duration, args.seed)
+        exercised.update(results["phases"][phase]["endpoints"])
+
+    results["unexercised_routes"] = sorted(route_names(app) - exercised)
+    with open(args.output, "w") as output:
+        json.dump(results, output, indent=2, sort_keys=True)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+    print_summary(results, baseline)
+    print(f"Results written to {args.output}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
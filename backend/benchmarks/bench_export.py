@@ -0,0 +1,58 @@
+"""Peak memory of a roster download: a materialized JSON list against the streamed CSV and XLSX exports.
+
+For each roster size it builds the rows lazily, as a cursor would return them, and
+measures with tracemalloc the peak memory held while producing the whole response:
+the JSON list the roster route returns, and the chunks exports.py streams.
+
+Run from the backend directory (no MongoDB needed):
+
+    python -m benchmarks.bench_export [--sizes 1000,10000,100000]
+"""
+import argparse
+import json
+import time
+import tracemalloc
+from exports import EXPORTS, stream_csv, stream_xlsx
+
+COLUMNS = list(EXPORTS["students"][1])
+
+def roster(count):
+    for i in range(count):
+        yield {"bits_id": f"2024B{i:05d}", "username": f"Student {i}", "email": f"student{i}@bench.local",
+               "contact_number": f"8{i:09d}", "hostel_name": "Hostel 001", "room_number": f"{i // 2:04d}",
+               "room_type": "double"}
+
+def as_rows(documents):
+    return ([document[column] for column in COLUMNS] for document in documents)
+
+def measure(produce):
+    """Peak traced bytes, response bytes and seconds for one full response.
+
+    The time comes from a second, untraced run, since tracing slows allocation down.
+    """
+    tracemalloc.start()
+    size = produce()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    started = time.perf_counter()
+    produce()
+    return peak, size, time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    args = parser.parse_args()
+
+    cases = {
+        "JSON list": lambda count: len(json.dumps(list(roster(count)))),
+        "CSV stream": lambda count: sum(len(chunk) for chunk in stream_csv(as_rows(roster(count)), COLUMNS)),
+        "XLSX stream": lambda count: sum(len(chunk) for chunk in stream_xlsx(as_rows(roster(count)), COLUMNS)),
+    }
+    print(f"{'students':>9}  {'response':<12} {'peak memory':>12} {'body':>10} {'time':>9}")
+    for count in (int(size) for size in args.sizes.split(",")):
+        for name, produce in cases.items():
+            peak, size, elapsed = measure(lambda: produce(count))
+            print(f"{count:>9}  {name:<12} {peak / 2**20:9.2f} MiB {size / 2**20:6.1f} MiB {elapsed * 1000:6.0f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Compare the old recursive `convert_objectid` + jsonify path with MongoJSONProvider.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_json [--docs 10000] [--repeat 20]
+"""
+import argparse
+import timeit
+from datetime import datetime, timedelta
+from bson import ObjectId
+from flask import Flask, jsonify
+from json_provider import MongoJSONProvider
+
+def convert_objectid(data):
+    """The conversion main.py used before MongoJSONProvider, kept here as the baseline."""
+    if isinstance(data, dict):
+        return {key: convert_objectid(value) for key, value in data.items()}
+    elif isinstance(data, list):
+        return [convert_objectid(element) for element in data]
+    elif isinstance(data, ObjectId):
+        return str(data)
+    else:
+        return data
+
+def make_documents(count):
+    """Application-shaped documents with ObjectId and datetime values, as returned by PyMongo."""
+    start = datetime(2024, 7, 1)
+    return [
+        {
+            "_id": ObjectId(),
+            "bits_id": f"2024A7PS{i:04d}",
+            "hostel_preference": ["Hostel A", "Hostel B", "Hostel C"],
+            "room_type_preference": "single",
+            "application_date": start + timedelta(minutes=i),
+            "hostel_status": "pending",
+            "room_status": "pending",
+            "alloted_hostel": None,
+            "alloted_room": None,
+            "remarks": None
+        }
+        for i in range(count)
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--docs", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    documents = make_documents(args.docs)
+    legacy_app = Flask("legacy")
+    provider_app = Flask("provider")
+    provider_app.json = MongoJSONProvider(provider_app)
+
+    def legacy():
+        with legacy_app.app_context():
+            return jsonify(convert_objectid(documents)).get_data()
+
+    def provider():
+        with provider_app.app_context():
+            return jsonify(documents).get_data()
+
+    print(f"{args.docs} documents, best of {args.repeat} runs")
+    results = {}
+    for name, fn in (("convert_objectid + jsonify", legacy), ("MongoJSONProvider", provider)):
+        fn()
+        results[name] = min(timeit.repeat(fn, number=1, repeat=args.repeat))
+        print(f"  {name:<28} {results[name] * 1000:8.2f} ms")
+
+    baseline, candidate = results.values()
+    print(f"  speedup: {baseline / candidate:.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Measure the logging cost a request pays: the old setup against configure_logging() at INFO.
+
+Each simulated request logs what the warden assignment route logs: three DEBUG
+records (one with the whole warden document) and one INFO record. The old setup is
+`basicConfig(level=DEBUG)` with f-string messages written synchronously to a file;
+the new one is log_config's queue handler at INFO with lazily formatted arguments,
+written as JSON by the listener thread. The time the listener needs to drain the
+queue afterwards is reported separately, since requests do not wait for it.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_logging [--requests 20000] [--repeat 5]
+"""
+import argparse
+import logging
+import os
+import queue
+import tempfile
+import timeit
+from datetime import datetime
+from logging.handlers import QueueListener
+from bson import ObjectId
+from log_config import DeferredQueueHandler, JsonFormatter
+
+logger = logging.getLogger("bench")
+
+WARDEN = {
+    "_id": ObjectId(),
+    "bits_id": "WARDEN0001",
+    "username": "Warden 1",
+    "email": "warden1@bench.local",
+    "password_hash": "scrypt$16384$8$1$" + "ab" * 40,
+    "contact_number": "9000000001",
+    "role": "warden",
+    "registration_date": datetime(2024, 7, 1),
+    "hostel_name": "Hostel 001",
+}
+
+def eager_request(warden_email="warden1@bench.local", hostel_name="Hostel 001"):
+    logger.debug(f"Received request to assign warden '{warden_email}' to hostel ID: {hostel_name}")
+    logger.debug(f"Found warden: {WARDEN}")
+    logger.debug(f"Assigning warden ID: {WARDEN['_id']}, Name: {warden_email}, Contact: {WARDEN['contact_number']} to hostel name: {hostel_name}")
+    logger.info(f"Warden '{warden_email}' assigned to hostel with name {hostel_name}.")
+
+def lazy_request(warden_email="warden1@bench.local", hostel_name="Hostel 001"):
+    logger.debug("Received request to assign warden '%s' to hostel ID: %s", warden_email, hostel_name)
+    logger.debug("Found warden: %s", WARDEN["_id"])
+    logger.debug("Assigning warden ID: %s, Name: %s, Contact: %s to hostel name: %s",
+                 WARDEN["_id"], warden_email, WARDEN["contact_number"], hostel_name)
+    logger.info("Warden '%s' assigned to hostel with name %s.", warden_email, hostel_name)
+
+def use_handler(handler, level):
+    root = logging.getLogger()
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
+
+def measure(fn, requests, repeat):
+    """Best per-request time in microseconds over `repeat` runs of `requests` calls."""
+    return min(timeit.repeat(fn, number=requests, repeat=repeat)) / requests * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        results = {}
+        sink = open(os.path.join(directory, "sync.log"), "w")
+        sync_handler = logging.StreamHandler(sink)
+        sync_handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+        use_handler(sync_handler, logging.DEBUG)
+        results["basicConfig DEBUG, f-strings"] = measure(eager_request, args.requests, args.repeat)
+        use_handler(sync_handler, logging.INFO)
+        results["basicConfig INFO, f-strings"] = measure(eager_request, args.requests, args.repeat)
+        sink.close()
+
+        with open(os.path.join(directory, "queued.log"), "w") as queued_sink:
+            output = logging.StreamHandler(queued_sink)
+            output.setFormatter(JsonFormatter())
+            records = queue.SimpleQueue()
+            listener = QueueListener(records, output)
+            listener.start()
+            use_handler(DeferredQueueHandler(records), logging.INFO)
+            results["queue INFO, lazy arguments"] = measure(lazy_request, args.requests, args.repeat)
+            drain_started = timeit.default_timer()
+            listener.stop()
+            drain = timeit.default_timer() - drain_started
+
+    print(f"{args.requests} requests, best of {args.repeat} runs; microseconds of logging per request")
+    for name, micros in results.items():
+        print(f"  {name:<32} {micros:8.2f} us")
+    baseline, candidate = results["basicConfig DEBUG, f-strings"], results["queue INFO, lazy arguments"]
+    print(f"  speedup over the old setup: {baseline / candidate:.1f}x")
+    print(f"  listener thread drained the remaining queue in {drain * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Measure password verifications per second (the CPU cost of a login) at the configured scrypt cost.
+
+Run from the backend directory; the cost comes from the same PASSWORD_SCRYPT_* variables
+the server uses:
+
+    PASSWORD_HASH_WORKERS=8 python -m benchmarks.bench_login [--duration 10] [--clients 32]
+
+`--clients` threads log in concurrently, as request threads would; the hashing pool
+limits how many verifications run at once.
+"""
+import argparse
+import os
+import threading
+import time
+import credentials
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--clients", type=int, default=32)
+    args = parser.parse_args()
+
+    stored = credentials.hash_password("correct horse battery staple")
+    verified = 0
+    rejected = 0
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.duration
+
+    def client():
+        nonlocal verified, rejected
+        while time.perf_counter() < deadline:
+            try:
+                credentials.verify_password("correct horse battery staple", stored)
+                outcome = "verified"
+            except credentials.CredentialsBusy:
+                outcome = "rejected"
+                time.sleep(0.01)
+            with lock:
+                if outcome == "verified":
+                    verified += 1
+                else:
+                    rejected += 1
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(args.clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    print(f"scrypt N={credentials.SCRYPT_N} r={credentials.SCRYPT_R} p={credentials.SCRYPT_P} "
+          f"(~{128 * credentials.SCRYPT_N * credentials.SCRYPT_R // (1024 * 1024)} MiB per hash)")
+    print(f"cores: {os.cpu_count()}, hashing threads: {credentials.HASH_WORKERS}, clients: {args.clients}")
+    print(f"logins/s: {verified / elapsed:.1f} ({1000 * elapsed / max(verified, 1) * credentials.HASH_WORKERS:.1f} ms per hash)")
+    print(f"rejected while saturated: {rejected}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Compare the old `@dataclass` + `asdict` models with the slotted models' from_doc/to_doc.
+
+For each of `--records` user documents (as stored, with an `_id` and an ISO date) it
+times building the model and converting it back to a document, and measures with
+tracemalloc how much memory holding all the instances takes.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_models [--records 100000] [--repeat 5]
+"""
+import argparse
+import gc
+import timeit
+import tracemalloc
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+from bson import ObjectId
+from collections_format import User
+
+@dataclass
+class LegacyUser:
+    """User as collections_format.py defined it before the slotted models, kept here as the baseline."""
+    bits_id: str
+    username: str
+    email: str
+    password_hash: str
+    contact_number: str
+    role: str
+    registration_date: datetime = datetime.now()
+    room_number: Optional[str] = None
+    hostel_name: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        user_dict = asdict(self)
+        user_dict["registration_date"] = self.registration_date.isoformat()
+        return user_dict
+
+def legacy_from_doc(doc):
+    """What get_students_by_hostel did per document before from_doc."""
+    if isinstance(doc.get("registration_date"), str):
+        doc = {**doc, "registration_date": datetime.fromisoformat(doc["registration_date"])}
+    return LegacyUser(**{key: value for key, value in doc.items() if key != "_id"})
+
+def make_documents(count):
+    start = datetime(2024, 7, 1)
+    return [
+        {
+            "_id": ObjectId(),
+            "bits_id": f"2024B{i:05d}",
+            "username": f"Student {i}",
+            "email": f"student{i}@bench.local",
+            "password_hash": "scrypt$16384$8$1$" + "ab" * 40,
+            "contact_number": f"8{i:09d}",
+            "role": "student",
+            "registration_date": (start + timedelta(minutes=i)).isoformat(),
+            "room_number": None,
+            "hostel_name": "Hostel 001",
+        }
+        for i in range(count)
+    ]
+
+def held_memory(build):
+    """Bytes still allocated while the result of `build()` is alive."""
+    gc.collect()
+    tracemalloc.start()
+    instances = build()
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del instances
+    return held
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    documents = make_documents(args.records)
+    legacy = [legacy_from_doc(doc) for doc in documents]
+    slotted = [User.from_doc(doc) for doc in documents]
+    cases = {
+        "from doc": (lambda: [legacy_from_doc(doc) for doc in documents],
+                     lambda: [User.from_doc(doc) for doc in documents]),
+        "to doc": (lambda: [user.to_dict() for user in legacy],
+                   lambda: [user.to_doc() for user in slotted]),
+    }
+
+    print(f"{args.records} user documents, best of {args.repeat} runs")
+    for name, (baseline, candidate) in cases.items():
+        before = min(timeit.repeat(baseline, number=1, repeat=args.repeat))
+        after = min(timeit.repeat(candidate, number=1, repeat=args.repeat))
+        print(f"  {name:<10} dataclass {before * 1000:8.1f} ms   slotted {after * 1000:8.1f} ms   "
+              f"speedup {before / after:.2f}x")
+
+    before = held_memory(lambda: [legacy_from_doc(doc) for doc in documents])
+    after = held_memory(lambda: [User.from_doc(doc) for doc in documents])
+    print(f"  instances  dataclass {before / 2**20:8.1f} MiB   slotted {after / 2**20:8.1f} MiB   "
+          f"({before / args.records:.0f} vs {after / args.records:.0f} bytes per record)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Load-test the WSGI app and the ASGI app side by side on the dashboard read endpoints.
+
+Start both servers against the same database, for example:
+
+    gunicorn -w 4 -b 127.0.0.1:5000 main:app
+    uvicorn asgi:app --workers 4 --port 8000
+
+then run from the backend directory (requires httpx):
+
+    python -m benchmarks.bench_serving --target wsgi=http://127.0.0.1:5000 --target asgi=http://127.0.0.1:8000
+
+/pending-requests-admin, one of the default paths, needs an admin session: pass a token
+from POST /login with --token, otherwise every sample of it is a 401.
+"""
+import argparse
+import asyncio
+import itertools
+import time
+import httpx
+
+DEFAULT_PATHS = [
+    "/hostels",
+    "/available-hostels",
+    "/rooms?limit=100",
+    "/pending-requests-admin?limit=100",
+    "/hostels/Hostel A/available_rooms",
+]
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)] if ordered else float("nan")
+
+async def load(base_url, paths, concurrency, duration, token=None):
+    """Keep `concurrency` requests in flight for `duration` seconds and collect latencies."""
+    latencies = []
+    errors = 0
+    path_cycle = itertools.cycle(paths)
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    headers = {"Authorization": f"Bearer {token}"} if token else None
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30, headers=headers) as client:
+        async def worker():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                path = next(path_cycle)
+                started = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    if response.status_code >= 400:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--target", action="append", required=True, metavar="NAME=URL",
+                        help="server to test; repeat for each server being compared")
+    parser.add_argument("--path", action="append", dest="paths", help="endpoint to request (default: dashboard reads)")
+    parser.add_argument("--token", help="bearer token sent with every request, needed for admin-only paths")
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=20)
+    args = parser.parse_args()
+
+    print(f"{'target':<10} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for target in args.target:
+        name, _, url = target.partition("=")
+        result = asyncio.run(load(url, args.paths or DEFAULT_PATHS, args.concurrency, args.duration, args.token))
+        print(f"{name:<10} {result['requests']:>9} {result['errors']:>7} {result['rps']:>9.1f} "
+              f"{result['p50_ms']:>8.1f} {result['p99_ms']:>8.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Time simulator.simulate against allocation.compute_allocation on a synthetic campus.
+
+Generates `--applicants` pending applications (three hostel preferences each) with
+campus.build_campus, allocates them with the per-application loop the API uses and
+with the vectorized simulator, checks that every applicant gets the same preference
+rank from both, and prints the timings and the satisfaction summary.
+
+Run from the backend directory (no MongoDB needed):
+
+    python -m benchmarks.bench_simulator [--applicants 100000] [--hostels 40] [--rooms-per-hostel 1200]
+"""
+import argparse
+import time
+from collections import defaultdict
+import numpy as np
+from allocation import compute_allocation
+from benchmarks.campus import CampusSpec, build_campus
+from simulator import Snapshot, satisfaction, simulate
+
+def reference_state(hostels, rooms):
+    """The hostel and room state allocation.run_allocation loads, built from documents."""
+    hostel_free = {hostel["hostel_name"]: hostel["capacity"] - hostel["current_occupancy"] for hostel in hostels}
+    room_state = defaultdict(list)
+    for room in sorted(rooms, key=lambda room: room["room_number"]):
+        if room["current_occupancy"] < room["capacity"]:
+            room_state[(room["hostel_name"], room["type"])].append(
+                [room["room_number"], room["capacity"] - room["current_occupancy"]])
+    return hostel_free, room_state
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--applicants", type=int, default=100000)
+    parser.add_argument("--hostels", type=int, default=40)
+    parser.add_argument("--rooms-per-hostel", type=int, default=1200)
+    args = parser.parse_args()
+
+    spec = CampusSpec(hostels=args.hostels, rooms_per_hostel=args.rooms_per_hostel, students=args.applicants,
+                      applications=args.applicants, hostel_assigned=0)
+    campus = build_campus(spec, password_hash="unused")
+    hostels, rooms, applications = campus["hostels"], campus["rooms"], campus["applications"]
+    print(f"{len(applications)} applicants, {sum(hostel['capacity'] for hostel in hostels)} beds "
+          f"in {len(hostels)} hostels")
+
+    started = time.perf_counter()
+    outcomes = compute_allocation(applications, *reference_state(hostels, rooms))
+    loop_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    snapshot = Snapshot.from_documents(hostels, rooms, applications)
+    build_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    ranks = simulate(snapshot)
+    simulate_seconds = time.perf_counter() - started
+
+    expected = {outcome["application_id"]: outcome["preference_rank"] or 0 for outcome in outcomes}
+    mismatches = int((np.array([expected[i] for i in snapshot.application_ids]) != ranks).sum())
+    summary = satisfaction(snapshot, ranks)
+
+    print(f"  compute_allocation loop   {loop_seconds * 1000:8.1f} ms")
+    print(f"  snapshot arrays           {build_seconds * 1000:8.1f} ms")
+    print(f"  simulate                  {simulate_seconds * 1000:8.1f} ms   "
+          f"speedup {loop_seconds / simulate_seconds:.1f}x, {mismatches} mismatched applicants")
+    print(f"  assigned {summary['assigned']}, first preference {summary['first_preference_share']:.1%}, "
+          f"by rank {summary['by_rank']}")
+    return 1 if mismatches else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
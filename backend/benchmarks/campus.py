@@ -0,0 +1,123 @@
+"""Synthetic campus data for the benchmarks, built from the dataclasses in collections_format.py.
+
+`seed_campus(spec)` wipes the benchmark database (MONGO_DB_NAME, which must not be the
+live `hostel_db`) and loads a campus of `spec.hostels` hostels with wardens, rooms of
+mixed types, students and applications. The same spec and seed always produce the same data.
+"""
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+import random
+import database
+from cache import cache
+from collections_format import Application, Hostel, Room, User
+from credentials import hash_password
+from indexes import ensure_indexes
+
+BENCH_PASSWORD = "bench-password"
+ADMIN_EMAIL = "admin@bench.local"
+# (type, beds, share of rooms)
+ROOM_TYPES = [("single", 1, 0.5), ("double", 2, 0.35), ("triple", 3, 0.15)]
+
+@dataclass
+class CampusSpec:
+    hostels: int = 20
+    rooms_per_hostel: int = 50
+    students: int = 5000
+    applications: int = 3000
+    # Share of applications already given a hostel and waiting for a room
+    hostel_assigned: float = 0.3
+    seed: int = 1
+
+def hostel_name(index: int) -> str:
+    return f"Hostel {index + 1:03d}"
+
+def warden_email(index: int) -> str:
+    return f"warden{index + 1}@bench.local"
+
+def student_email(index: int) -> str:
+    return f"student{index + 1}@bench.local"
+
+def student_bits_id(index: int) -> str:
+    return f"2024B{index + 1:05d}"
+
+def build_campus(spec: CampusSpec, password_hash: str) -> dict:
+    """Generate hostels, rooms, users and applications as the documents the API stores."""
+    rng = random.Random(spec.seed)
+    registered = datetime(2024, 7, 1)
+    hostels, rooms, users, applications = [], [], [], []
+
+    users.append(User(bits_id="ADMIN0001", username="Bench Admin", email=ADMIN_EMAIL, password_hash=password_hash,
+                      contact_number="0000000000", role="admin", registration_date=registered).to_doc())
+    for h in range(spec.hostels):
+        name = hostel_name(h)
+        hostel_rooms = []
+        for r in range(spec.rooms_per_hostel):
+            room_type, beds, _ = rng.choices(ROOM_TYPES, weights=[share for _, _, share in ROOM_TYPES])[0]
+            hostel_rooms.append(Room(hostel_name=name, room_number=f"{h + 1}{r + 1:03d}", type=room_type,
+                                     capacity=beds, occupants=[]))
+        rooms.extend(room.to_doc() for room in hostel_rooms)
+        hostels.append(Hostel(
+            hostel_name=name,
+            location=rng.choice(["East Wing", "West Wing", "North Wing", "South Wing"]),
+            total_rooms=len(hostel_rooms),
+            capacity=sum(room.capacity for room in hostel_rooms),
+            rooms=[room.room_number for room in hostel_rooms],
+            warden_name=f"Warden {h + 1}",
+            warden_contact=f"9{h + 1:09d}",
+            warden_email=warden_email(h),
+        ).to_doc())
+        users.append(User(bits_id=f"WARDEN{h + 1:04d}", username=f"Warden {h + 1}", email=warden_email(h),
+                          password_hash=password_hash, contact_number=f"9{h + 1:09d}", role="warden",
+                          registration_date=registered, hostel_name=name).to_doc())
+
+    hostel_free = {hostel["hostel_name"]: hostel["capacity"] for hostel in hostels}
+    hostel_names = list(hostel_free)
+    for s in range(spec.students):
+        student = User(bits_id=student_bits_id(s), username=f"Student {s + 1}", email=student_email(s),
+                       password_hash=password_hash, contact_number=f"8{s + 1:09d}", role="student",
+                       registration_date=registered)
+        if s < spec.applications:
+            preferences = rng.sample(hostel_names, min(3, len(hostel_names)))
+            application = Application(
+                _id=f"bench-application-{s + 1}",
+                bits_id=student.bits_id,
+                hostel_preference=preferences,
+                room_type_preference=rng.choices(ROOM_TYPES, weights=[share for _, _, share in ROOM_TYPES])[0][0],
+                application_date=registered + timedelta(minutes=s),
+                hostel_status="pending",
+                room_status="pending",
+            )
+            if rng.random() < spec.hostel_assigned and hostel_free[preferences[0]] > 0:
+                hostel_free[preferences[0]] -= 1
+                application.hostel_status = "assigned"
+                application.alloted_hostel = preferences[0]
+                student.hostel_name = preferences[0]
+            document = application.to_doc()
+            document["updated_at"] = registered
+            applications.append(document)
+        users.append(student.to_doc())
+
+    for hostel in hostels:
+        hostel["current_occupancy"] = hostel["capacity"] - hostel_free[hostel["hostel_name"]]
+    return {"hostels": hostels, "rooms": rooms, "users": users, "applications": applications}
+
+def seed_campus(spec: CampusSpec) -> dict:
+    """Replace the benchmark database's contents with a generated campus; returns the documents."""
+    if database.MONGO_DB_NAME == "hostel_db":
+        raise RuntimeError("Refusing to seed benchmark data into hostel_db; set MONGO_DB_NAME to a scratch database.")
+
+    campus = build_campus(spec, hash_password(BENCH_PASSWORD))
+    for name in database.db.list_collection_names():
+        database.db.drop_collection(name)
+    ensure_indexes()
+    database.hostels_collection.insert_many(campus["hostels"])
+    database.rooms_collection.insert_many(campus["rooms"])
+    database.users_collection.insert_many(campus["users"])
+    if campus["applications"]:
+        database.applications_collection.insert_many(campus["applications"])
+    database.refresh_vacancies()
+    database.rebuild_placements()
+    for namespace in ("hostels", "available_hostels", "available_rooms"):
+        cache.invalidate(namespace)
+    database.bump_versions("hostels", "rooms", "applications")
+    return campus
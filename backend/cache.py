@@ -0,0 +1,164 @@
+from collections import OrderedDict, defaultdict
+from functools import wraps
+import inspect
+import logging
+import os
+import pickle
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+CACHE_TTL = float(os.getenv("CACHE_TTL", "30"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1024"))
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL")
+
+_MISSING = object()
+
+class InProcessBackend:
+    """Size-bounded LRU store with per-entry expiry, local to one worker process."""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return _MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl: float):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def delete_prefix(self, prefix: str):
+        with self._lock:
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                del self._entries[key]
+
+    def __len__(self):
+        return len(self._entries)
+
+class RedisBackend:
+    """Store shared by every worker, so an invalidation in one worker is seen by all of them."""
+
+    def __init__(self, url: str, namespace: str = "hostel-cache:"):
+        import redis  # Optional dependency, only needed when CACHE_REDIS_URL is set
+        self.client = redis.Redis.from_url(url)
+        self.namespace = namespace
+
+    def get(self, key):
+        value = self.client.get(self.namespace + key)
+        return _MISSING if value is None else pickle.loads(value)
+
+    def set(self, key, value, ttl: float):
+        self.client.set(self.namespace + key, pickle.dumps(value), px=int(ttl * 1000))
+
+    def delete(self, key):
+        self.client.delete(self.namespace + key)
+
+    def delete_prefix(self, prefix: str):
+        keys = list(self.client.scan_iter(match=self.namespace + prefix + "*"))
+        if keys:
+            self.client.delete(*keys)
+
+    def __len__(self):
+        return sum(1 for _ in self.client.scan_iter(match=self.namespace + "*"))
+
+class Cache:
+    """Read-through cache for database read functions, with explicit invalidation by the writers.
+
+    Cached results are shared between callers and must not be mutated. With the
+    in-process backend each worker keeps its own copy, so writes made by another
+    worker become visible once the entry's TTL runs out.
+    """
+
+    def __init__(self, backend, default_ttl: float = CACHE_TTL):
+        self.backend = backend
+        self.default_ttl = default_ttl
+        self.hits = defaultdict(int)
+        self.misses = defaultdict(int)
+
+    @staticmethod
+    def _key(namespace: str, args) -> str:
+        return f"{namespace}:{':'.join(map(str, args))}"
+
+    def cached(self, namespace: str, ttl: float = None):
+        """Decorator caching a function's result per positional arguments under `namespace`.
+
+        Works for both plain and `async def` functions, so the async data-access layer
+        shares entries (and invalidation) with database.py.
+        """
+        def decorator(func):
+            if inspect.iscoroutinefunction(func):
+                @wraps(func)
+                async def async_wrapper(*args):
+                    key = self._key(namespace, args)
+                    value = self._lookup(namespace, key)
+                    if value is _MISSING:
+                        value = await func(*args)
+                        self.backend.set(key, value, ttl or self.default_ttl)
+                    return value
+                return async_wrapper
+
+            @wraps(func)
+            def wrapper(*args):
+                key = self._key(namespace, args)
+                value = self._lookup(namespace, key)
+                if value is _MISSING:
+                    value = func(*args)
+                    self.backend.set(key, value, ttl or self.default_ttl)
+                return value
+            return wrapper
+        return decorator
+
+    def _lookup(self, namespace: str, key: str):
+        value = self.backend.get(key)
+        if value is _MISSING:
+            self.misses[namespace] += 1
+        else:
+            self.hits[namespace] += 1
+        return value
+
+    def invalidate(self, namespace: str, *args):
+        """Drop the entry for `args`, or every entry in `namespace` when no arguments are given."""
+        if args:
+            self.backend.delete(self._key(namespace, args))
+        else:
+            self.backend.delete_prefix(f"{namespace}:")
+
+    def stats(self) -> dict:
+        namespaces = sorted(set(self.hits) | set(self.misses))
+        return {
+            "backend": type(self.backend).__name__,
+            "entries": len(self.backend),
+            "namespaces": {
+                namespace: {"hits": self.hits[namespace], "misses": self.misses[namespace]}
+                for namespace in namespaces
+            }
+        }
+
+def _create_backend():
+    if CACHE_REDIS_URL:
+        try:
+            return RedisBackend(CACHE_REDIS_URL)
+        except ImportError:
+            logger.warning("CACHE_REDIS_URL is set but the redis package is not installed; using the in-process cache.")
+    return InProcessBackend()
+
+cache = Cache(_create_backend())
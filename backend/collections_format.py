@@ -1,39 +1,92 @@
-from dataclasses import dataclass, asdict
+"""Models for the documents stored in MongoDB, and the predefined hostels and rooms.
+
+The models are slotted dataclasses. `from_doc` builds one from a stored document,
+ignoring fields the model does not declare (such as `_id`); it is generated per model
+by `model()` and fills the slots directly, so a missing required field raises KeyError.
+`to_doc` returns the document to store. Both are shallow: lists are shared with the
+instance rather than deep-copied as `dataclasses.asdict` would. Datetimes are stored as
+ISO 8601 strings and parsed back by `from_doc`. Fields named in `_private` are left out
+of API responses (`to_doc(include_private=False)`, used by the JSON provider).
+"""
+from dataclasses import MISSING, dataclass, field, fields
+from operator import attrgetter
 from typing import Optional, List
 from datetime import datetime
+import typing
+
+class Model:
+    __slots__ = ()
+    _fields = ()
+    _datetime_fields = ()
+    _private = ()
+
+    def to_doc(self, include_private: bool = True) -> dict:
+        doc = dict(zip(self._fields, self._values(self)))
+        for name in self._datetime_fields:
+            if doc[name] is not None:
+                doc[name] = doc[name].isoformat()
+        if not include_private:
+            for name in self._private:
+                del doc[name]
+        return doc
+
+def _compile_from_doc(cls):
+    """Generate `from_doc(doc)` for a model, the way dataclasses generates `__init__`."""
+    namespace = {"new": object.__new__, "cls": cls, "parse": datetime.fromisoformat}
+    lines = ["def from_doc(doc):", "    self = new(cls)"]
+    for f in fields(cls):
+        if f.default is not MISSING:
+            namespace[f"default_{f.name}"] = f.default
+            value = f"doc.get({f.name!r}, default_{f.name})"
+        elif f.default_factory is not MISSING:
+            namespace[f"factory_{f.name}"] = f.default_factory
+            value = f"doc[{f.name!r}] if {f.name!r} in doc else factory_{f.name}()"
+        else:
+            value = f"doc[{f.name!r}]"
+        lines.append(f"    self.{f.name} = {value}")
+        if f.name in cls._datetime_fields:
+            lines.append(f"    if self.{f.name}.__class__ is str: self.{f.name} = parse(self.{f.name})")
+    lines.append("    return self")
+    exec("\n".join(lines), namespace)
+    return namespace["from_doc"]
+
+def model(cls):
+    """Make `cls` a slotted dataclass with generated from_doc and precomputed to_doc fields."""
+    cls = dataclass(slots=True)(cls)
+    cls._fields = tuple(f.name for f in fields(cls))
+    # attrgetter returns a bare value for a single name; every model has several fields
+    cls._values = attrgetter(*cls._fields)
+    hints = typing.get_type_hints(cls)
+    cls._datetime_fields = tuple(name for name in cls._fields if hints[name] in (datetime, Optional[datetime]))
+    cls.from_doc = staticmethod(_compile_from_doc(cls))
+    return cls
 
-@dataclass
-class User:
+@model
+class User(Model):
     bits_id: str  # Unique user identifier (MongoDB's _id format)
     username: str
     email: str
     password_hash: str
     contact_number: str
     role: str  # "student" or "admin"
-    registration_date: datetime = datetime.now()
+    registration_date: datetime = field(default_factory=datetime.now)
     room_number: Optional[str] = None  # Reference to an Allotment entry if allocated
     hostel_name: Optional[str] = None  # Reference to an Allotment entry if allocated
 
-    def to_dict(self) -> dict:
-        user_dict = asdict(self)
-        user_dict["registration_date"] = self.registration_date.isoformat()
-        return user_dict
+    _private = ("password_hash",)
 
-@dataclass
-class Room:
+@model
+class Room(Model):
     hostel_name: str  # Reference to the hostel
     room_number: str
     type: str  # "single", "double", "triple", etc.
     capacity: int
     current_occupancy: int = 0
-    occupants: List[str] = None  # List of user IDs of occupants
-    features: Optional[List[str]] = None  # List of room-specific features
+    occupants: List[str] = field(default_factory=list)  # List of user IDs of occupants
+    features: Optional[List[str]] = field(default_factory=list)  # List of room-specific features
 
-    def to_dict(self) -> dict:
-        return asdict(self)
-
-@dataclass
-class Allotment:
+@model
+class Allotment(Model):
     _id: str  # Unique allotment identifier (MongoDB's _id format)
     user_id: str  # Reference to the user
     room_id: str  # Reference to the room
@@ -43,28 +96,20 @@ class Allotment:
     status: str  # "active", "vacated", etc.
     remarks: Optional[str] = None
 
-    def to_dict(self) -> dict:
-        allotment_dict = asdict(self)
-        allotment_dict["allotment_date"] = self.allotment_date.isoformat()
-        return allotment_dict
-
-@dataclass
-class Hostel:
+@model
+class Hostel(Model):
     hostel_name: str
     location: str
     total_rooms: int
     capacity: int
     current_occupancy: int = 0
-    rooms: List[str] = None  # List of room IDs associated with the hostel
+    rooms: List[str] = field(default_factory=list)  # List of room IDs associated with the hostel
     warden_contact: Optional[str] = None
     warden_name: Optional[str] = None
     warden_email: Optional[str] = None
 
-    def to_dict(self) -> dict:
-        return asdict(self)
-
-@dataclass
-class Application:
+@model
+class Application(Model):
     _id: str  # Unique application identifier (MongoDB's _id format)
     bits_id: str  # Reference to the user
     hostel_preference: List[str]  # List of preferred hostel IDs
@@ -76,11 +121,6 @@ class Application:
     alloted_room: Optional[str] = None
     remarks: Optional[str] = None
 
-    def to_dict(self) -> dict:
-        application_dict = asdict(self)
-        application_dict["application_date"] = self.application_date.isoformat()
-        return application_dict
-
 
 # Define the list of hostels as instances of the Hostel dataclass
 hostels_data = [
@@ -0,0 +1,97 @@
+import base64
+import hashlib
+import hmac
+import logging
+import os
+import secrets
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+logger = logging.getLogger(__name__)
+
+# scrypt cost: N (CPU/memory), r (block size), p (parallelism); memory per hash is about 128 * N * r bytes
+SCRYPT_N = int(os.getenv("PASSWORD_SCRYPT_N", str(2 ** 14)))
+SCRYPT_R = int(os.getenv("PASSWORD_SCRYPT_R", "8"))
+SCRYPT_P = int(os.getenv("PASSWORD_SCRYPT_P", "1"))
+# Hashing threads per worker process; hashlib.scrypt releases the GIL, so these run in parallel
+HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1)))
+# Hashes allowed to be queued or running at once before new logins are turned away
+HASH_QUEUE_LIMIT = int(os.getenv("PASSWORD_HASH_QUEUE_LIMIT", str(HASH_WORKERS * 16)))
+HASH_TIMEOUT = float(os.getenv("PASSWORD_HASH_TIMEOUT", "10"))
+# Threads hashing imported passwords, kept apart from the login pool so a large import cannot starve logins
+IMPORT_HASH_WORKERS = int(os.getenv("PASSWORD_IMPORT_HASH_WORKERS", str(max(1, HASH_WORKERS // 4))))
+
+SCHEME = "scrypt"
+SALT_BYTES = 16
+KEY_BYTES = 32
+
+_executor = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="password-hash")
+_slots = threading.BoundedSemaphore(HASH_QUEUE_LIMIT)
+_import_executor = ThreadPoolExecutor(max_workers=IMPORT_HASH_WORKERS, thread_name_prefix="password-import-hash")
+
+class CredentialsBusy(Exception):
+    """Raised when the hashing pool is saturated; callers should answer 503 and let the client retry."""
+
+def _b64(data: bytes) -> str:
+    return base64.b64encode(data).decode("ascii")
+
+def _scrypt(password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+    return hashlib.scrypt(password.encode("utf-8"), salt=salt, n=n, r=r, p=p,
+                          maxmem=256 * n * r + 1024 * 1024, dklen=KEY_BYTES)
+
+def _hash(password: str) -> str:
+    salt = secrets.token_bytes(SALT_BYTES)
+    key = _scrypt(password, salt, SCRYPT_N, SCRYPT_R, SCRYPT_P)
+    return f"{SCHEME}${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}${_b64(salt)}${_b64(key)}"
+
+def is_hashed(stored: str) -> bool:
+    return isinstance(stored, str) and stored.startswith(SCHEME + "$")
+
+def _verify(password: str, stored: str):
+    """Return (matches, needs_rehash) for a stored hash or a legacy plaintext password."""
+    if not is_hashed(stored):
+        # Legacy rows stored the raw password
+        matches = hmac.compare_digest(password.encode("utf-8"), (stored or "").encode("utf-8"))
+        return matches, matches
+
+    _, n, r, p, salt, key = stored.split("$")
+    n, r, p = int(n), int(r), int(p)
+    candidate = _scrypt(password, base64.b64decode(salt), n, r, p)
+    matches = hmac.compare_digest(candidate, base64.b64decode(key))
+    return matches, matches and (n, r, p) != (SCRYPT_N, SCRYPT_R, SCRYPT_P)
+
+def _run(fn, *args):
+    """Run a hashing call on the bounded pool and wait for it, shedding load when the pool is full."""
+    if not _slots.acquire(blocking=False):
+        logger.warning("Password hashing pool is saturated; rejecting request.")
+        raise CredentialsBusy()
+    try:
+        future = _executor.submit(fn, *args)
+    except BaseException:
+        _slots.release()
+        raise
+    # The slot is held until the hash has actually finished, not just until this caller gives up on it
+    future.add_done_callback(lambda _: _slots.release())
+    try:
+        return future.result(timeout=HASH_TIMEOUT)
+    except FutureTimeout:
+        logger.warning("Password hashing took longer than %ss; rejecting request.", HASH_TIMEOUT)
+        raise CredentialsBusy()
+
+def hash_password(password: str) -> str:
+    """Hash a password with scrypt on the hashing pool."""
+    return _run(_hash, password)
+
+def hash_passwords(passwords: list) -> list:
+    """Hash many passwords in parallel on the import pool (bulk imports), keeping their order."""
+    return list(_import_executor.map(_hash, passwords))
+
+def verify_password(password: str, stored: str):
+    """Check a password on the hashing pool. Returns (matches, needs_rehash)."""
+    return _run(_verify, password, stored)
+
+# Verified against when the account does not exist, so unknown emails cost as much as wrong passwords
+_DUMMY_HASH = _hash(secrets.token_urlsafe(16))
+
+def burn_verification(password: str):
+    verify_password(password, _DUMMY_HASH)
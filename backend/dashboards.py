@@ -0,0 +1,103 @@
+import logging
+from database import hostels_collection
+
+logger = logging.getLogger(__name__)
+
+def _hostel_summary_stages():
+    """Pipeline stages turning each hostel document into its dashboard summary."""
+    return [
+        # Room-type breakdown: rooms, beds, occupancy and free beds per type
+        {"$lookup": {
+            "from": "rooms",
+            "let": {"hostel": "$hostel_name"},
+            "pipeline": [
+                {"$match": {"$expr": {"$eq": ["$hostel_name", "$$hostel"]}}},
+                {"$group": {
+                    "_id": "$type",
+                    "rooms": {"$sum": 1},
+                    "capacity": {"$sum": "$capacity"},
+                    "current_occupancy": {"$sum": "$current_occupancy"}
+                }},
+                {"$project": {
+                    "_id": 0,
+                    "room_type": "$_id",
+                    "rooms": 1,
+                    "capacity": 1,
+                    "current_occupancy": 1,
+                    "free_beds": {"$subtract": ["$capacity", "$current_occupancy"]}
+                }},
+                {"$sort": {"room_type": 1}}
+            ],
+            "as": "room_types"
+        }},
+        # Room request counts for the hostel's warden
+        {"$lookup": {
+            "from": "applications",
+            "let": {"hostel": "$hostel_name"},
+            "pipeline": [
+                {"$match": {"$expr": {"$eq": ["$alloted_hostel", "$$hostel"]}}},
+                {"$group": {
+                    "_id": None,
+                    "pending": {"$sum": {"$cond": [
+                        {"$and": [{"$eq": ["$room_status", "pending"]}, {"$eq": ["$hostel_status", "assigned"]}]}, 1, 0
+                    ]}},
+                    "closed": {"$sum": {"$cond": [{"$ne": ["$room_status", "pending"]}, 1, 0]}}
+                }}
+            ],
+            "as": "room_requests"
+        }},
+        {"$lookup": {
+            "from": "users",
+            "let": {"hostel": "$hostel_name"},
+            "pipeline": [
+                {"$match": {"$expr": {"$and": [{"$eq": ["$hostel_name", "$$hostel"]}, {"$eq": ["$role", "student"]}]}}},
+                {"$count": "count"}
+            ],
+            "as": "students"
+        }},
+        {"$project": {
+            "_id": {"$toString": "$_id"},
+            "hostel_name": 1,
+            "location": 1,
+            "total_rooms": 1,
+            "capacity": 1,
+            "current_occupancy": 1,
+            "free_beds": {"$subtract": ["$capacity", "$current_occupancy"]},
+            "warden_name": {"$ifNull": ["$warden_name", None]},
+            "warden_contact": {"$ifNull": ["$warden_contact", None]},
+            "warden_email": {"$ifNull": ["$warden_email", None]},
+            "room_types": 1,
+            "students": {"$ifNull": [{"$first": "$students.count"}, 0]},
+            "pending_room_requests": {"$ifNull": [{"$first": "$room_requests.pending"}, 0]},
+            "closed_room_requests": {"$ifNull": [{"$first": "$room_requests.closed"}, 0]}
+        }}
+    ]
+
+def get_admin_dashboard():
+    """Per-hostel occupancy, room-type breakdown, request counts and warden info, plus the
+    number of applications waiting for a hostel, in a single aggregation."""
+    pipeline = [
+        {"$sort": {"hostel_name": 1}},
+        *_hostel_summary_stages(),
+        {"$group": {"_id": None, "hostels": {"$push": "$$ROOT"}}},
+        {"$lookup": {
+            "from": "applications",
+            "pipeline": [{"$match": {"hostel_status": "pending"}}, {"$count": "count"}],
+            "as": "pending_hostel_requests"
+        }},
+        {"$project": {
+            "_id": 0,
+            "hostels": 1,
+            "pending_hostel_requests": {"$ifNull": [{"$first": "$pending_hostel_requests.count"}, 0]}
+        }}
+    ]
+    result = next(hostels_collection.aggregate(pipeline), None)
+    logger.info("Built admin dashboard summary.")
+    return result or {"hostels": [], "pending_hostel_requests": 0}
+
+def get_warden_dashboard(hostel_name: str):
+    """Dashboard summary for one hostel in a single aggregation, or None if it does not exist."""
+    pipeline = [{"$match": {"hostel_name": hostel_name}}, *_hostel_summary_stages()]
+    result = next(hostels_collection.aggregate(pipeline), None)
+    logger.info("Built warden dashboard summary for hostel: %s", hostel_name)
+    return result
@@ -1,50 +1,273 @@
-from pymongo import MongoClient
+from pymongo import ASCENDING, DESCENDING, DeleteOne, MongoClient, ReplaceOne, ReturnDocument, UpdateOne
+from pymongo.monitoring import ConnectionPoolListener
+from pymongo.errors import DuplicateKeyError, OperationFailure
 from bson.objectid import ObjectId
+import hashlib
 import os
 import logging
+import threading
+import time
+from bisect import bisect_left
 from datetime import datetime
+from cache import cache
+from metrics import command_metrics
+from credentials import CredentialsBusy, burn_verification, hash_password, verify_password
 from collections_format import User, Room, Allotment, Hostel, Application, hostels_data, rooms_data
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-# Establish connection to MongoDB
+class PoolStats(ConnectionPoolListener):
+    """Track this process's connection pool so readiness checks can report it."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.open = 0
+        self.checked_out = 0
+        self.checkout_failures = 0
+
+    def _add(self, field, delta):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + delta)
+
+    def connection_created(self, event):
+        self._add("open", 1)
+
+    def connection_closed(self, event):
+        self._add("open", -1)
+
+    def connection_checked_out(self, event):
+        self._add("checked_out", 1)
+
+    def connection_checked_in(self, event):
+        self._add("checked_out", -1)
+
+    def connection_check_out_failed(self, event):
+        self._add("checkout_failures", 1)
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_check_out_started(self, event):
+        pass
+
+pool_stats = PoolStats()
+
+# Establish connection to MongoDB. The client connects lazily, so each server worker
+# that imports this module after fork gets its own pool.
 MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017/hostel_db")
-client = MongoClient(MONGO_URI)
+MONGO_DB_NAME = os.getenv("MONGO_DB_NAME", "hostel_db")
+client = MongoClient(
+    MONGO_URI,
+    maxPoolSize=int(os.getenv("MONGO_MAX_POOL_SIZE", "100")),
+    minPoolSize=int(os.getenv("MONGO_MIN_POOL_SIZE", "0")),
+    connectTimeoutMS=int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000")),
+    serverSelectionTimeoutMS=int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000")),
+    socketTimeoutMS=int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "30000")),
+    readPreference=os.getenv("MONGO_READ_PREFERENCE", "primary"),
+    event_listeners=[pool_stats, command_metrics],
+    connect=False
+)
 
 # Select database and collections
-db = client.hostel_db
+db = client[MONGO_DB_NAME]
 users_collection = db.users
 rooms_collection = db.rooms
 allotments_collection = db.allotments
 hostels_collection = db.hostels
 applications_collection = db.applications
+vacancies_collection = db.vacancies
+revoked_tokens_collection = db.revoked_tokens
+jobs_collection = db.jobs
+waitlist_collection = db.waitlist
+waitlist_queues_collection = db.waitlist_queues
+placements_collection = db.placements
+versions_collection = db.versions
+
+# Transactions need a replica set or mongos; flipped off the first time a standalone server rejects one
+_transactions_supported = True
+
+class ReservationError(Exception):
+    """Raised inside a transaction callback to abort it when a capacity check fails."""
+
+class StudentNotFound(ReservationError):
+    """Raised inside a reservation when the student has no user or application document to update."""
+
+def run_in_transaction(callback):
+    """Run `callback(session)` in a transaction, retrying transient errors such as write conflicts.
+
+    On a standalone mongod (no transaction support) the callback runs with `session=None`,
+    so conditional updates still guard capacity but multi-document writes are not atomic.
+    """
+    global _transactions_supported
+    if _transactions_supported:
+        try:
+            with client.start_session() as session:
+                return session.with_transaction(callback)
+        except OperationFailure as e:
+            # 20 = IllegalOperation: "Transaction numbers are only allowed on a replica set member or mongos"
+            if e.code != 20:
+                raise
+            logger.warning("MongoDB deployment does not support transactions; running writes without one.")
+            _transactions_supported = False
+    return callback(None)
+
+def database_status() -> dict:
+    """Ping MongoDB and describe this worker's connection pool, for readiness checks."""
+    started = time.perf_counter()
+    client.admin.command("ping")
+    pool_options = client.options.pool_options
+    return {
+        "pid": os.getpid(),
+        "ping_ms": round((time.perf_counter() - started) * 1000, 2),
+        "read_preference": client.read_preference.mongos_mode,
+        "pool": {
+            "max_size": pool_options.max_pool_size,
+            "min_size": pool_options.min_pool_size,
+            "open": pool_stats.open,
+            "checked_out": pool_stats.checked_out,
+            "checkout_failures": pool_stats.checkout_failures
+        }
+    }
+
+# Fields the list endpoints return; everything else stays on the server
+ROOM_LIST_FIELDS = {"hostel_name": 1, "room_number": 1, "type": 1, "capacity": 1, "current_occupancy": 1, "features": 1}
+# Left out whenever a user document is returned to a client
+USER_PRIVATE_FIELDS = {"password_hash": 0}
+APPLICATION_LIST_FIELDS = {
+    "bits_id": 1, "hostel_preference": 1, "room_type_preference": 1, "application_date": 1,
+    "hostel_status": 1, "room_status": 1, "alloted_hostel": 1, "alloted_room": 1
+}
+
+def find_page(collection, query: dict, projection: dict = None, limit: int = None, after=None):
+    """Return a cursor over `query` in `_id` order, starting after the `after` id (keyset pagination)."""
+    if after is not None:
+        query = {"$and": [query, {"_id": {"$gt": after}}]}
+    cursor = collection.find(query, projection).sort("_id", ASCENDING)
+    if limit:
+        cursor = cursor.limit(limit)
+    return cursor
+
+def _insert_missing(collection, documents: list, key_fields: tuple) -> list:
+    """Insert the documents whose key is not stored yet, in one bulk write, and return their new ids."""
+    if not documents:
+        return []
+    result = collection.bulk_write([
+        UpdateOne({field: document[field] for field in key_fields}, {"$setOnInsert": document}, upsert=True)
+        for document in documents
+    ], ordered=False)
+    return [str(inserted_id) for inserted_id in result.upserted_ids.values()]
+
+# Collection Versions
+# One `versions` document per collection the read routes list, with a counter the write functions
+# bump, so a route can build its ETag and answer a conditional GET without reading the documents.
+# Bumps happen after the write commits: inside the transaction every reservation would conflict on
+# the same counter, and before the commit a read could tag the old documents with the new version.
+# Writes made outside these functions (a mongo shell, a restore) need a bump_versions of their own.
+
+# Cached views of each versioned collection, dropped when another worker is seen to have bumped it
+VERSION_CACHE_NAMESPACES = {"hostels": ("hostels", "available_hostels"), "rooms": ("available_rooms",)}
+_seen_versions = {}
+
+def bump_versions(*names):
+    """Mark collections as changed so ETags built from their versions stop matching."""
+    try:
+        versions_collection.bulk_write([
+            UpdateOne({"_id": name}, {"$inc": {"version": 1}, "$setOnInsert": {"created_at": datetime.utcnow()}},
+                      upsert=True)
+            for name in names
+        ], ordered=False)
+    except Exception as e:
+        # The write itself has committed; clients keep their copy until the next bump
+        logger.error("Failed to bump versions of %s: %s", ", ".join(names), e)
+
+def note_versions(names, documents) -> dict:
+    """Map each name to its (version, created_at) from the `versions` documents read for it.
+
+    A version this worker has not seen yet means a write elsewhere, so its cached views are
+    dropped before the route reads them and tags them with the new version.
+    """
+    stored = {document["_id"]: document for document in documents}
+    versions = {}
+    for name in names:
+        document = stored.get(name, {})
+        version = (document.get("version", 0), document.get("created_at"))
+        if _seen_versions.get(name) != version:
+            for namespace in VERSION_CACHE_NAMESPACES.get(name, ()):
+                cache.invalidate(namespace)
+            _seen_versions[name] = version
+        versions[name] = version
+    return versions
+
+def collection_versions(names) -> dict:
+    """Current versions of the named collections, in one read of the `versions` collection."""
+    return note_versions(names, versions_collection.find({"_id": {"$in": list(names)}}))
+
+def version_tag(versions: dict, *parts) -> str:
+    """A strong ETag value for a response built from collections at `versions`, varying with `parts`."""
+    key = repr((sorted(versions.items()), parts)).encode()
+    return hashlib.sha1(key).hexdigest()
 
 # User Database Functions
 def register_user(username, password, role, email, contact_number, bits_id):
     existing_user = users_collection.find_one({"username": username})
     if existing_user:
-        logger.info(f"User already exists: {username}")
+        logger.info("User already exists: %s", username)
+        return False
+    user = User(username=username, password_hash=hash_password(password), role=role, email=email, contact_number=contact_number, bits_id=bits_id)
+    try:
+        users_collection.insert_one(user.to_doc())
+    except DuplicateKeyError:
+        logger.info("User with email %s or BITS ID %s already exists.", email, bits_id)
         return False
-    user = User(username=username, password_hash=password, role=role, email=email, contact_number=contact_number, bits_id=bits_id)
-    users_collection.insert_one(user.to_dict())
-    logger.info(f"User registered successfully: {username}")
+    logger.info("User registered successfully: %s", username)
     return True
 
 def authenticate_user(email, password):
-    """Authenticate a user based on email and password."""
-    user = users_collection.find_one({"email": email, "password_hash": password})
-    if user:
-        logger.info(f"User authenticated: {email}")
+    """Authenticate a user based on email and password.
+
+    The password is checked on the credentials hashing pool; rows still holding a legacy
+    plaintext password, or a hash made with an older cost, are rehashed on success.
+    """
+    user = users_collection.find_one({"email": email})
+    if not user:
+        burn_verification(password)
+        logger.warning("Failed authentication attempt for: %s", email)
+        return None
+
+    matches, needs_rehash = verify_password(password, user.get("password_hash"))
+    if matches:
+        if needs_rehash:
+            # Best effort: a busy hashing pool must not fail a login whose password was correct
+            try:
+                # Conditional on the old value so a concurrent password change is not overwritten
+                users_collection.update_one(
+                    {"_id": user["_id"], "password_hash": user.get("password_hash")},
+                    {"$set": {"password_hash": hash_password(password)}}
+                )
+                logger.info("Rehashed password for: %s", email)
+            except CredentialsBusy:
+                logger.warning("Skipped rehashing the password for %s; hashing pool busy.", email)
+        logger.info("User authenticated: %s", email)
         return user
     else:
-        logger.warning(f"Failed authentication attempt for: {email}")
+        logger.warning("Failed authentication attempt for: %s", email)
         return None
 
 def find_user(email):
-    logger.info(f"Finding user for email: {email}")
-    return users_collection.find_one({"email": email})
+    logger.debug("Finding user for email: %s", email)
+    return users_collection.find_one({"email": email}, USER_PRIVATE_FIELDS)
 
 def fetch_all_wardens():
     """Fetch all users with role 'warden' from the users collection."""
@@ -62,7 +285,7 @@ def fetch_all_wardens():
                 "email": warden["email"]
             })
 
-        logger.info("Fetched all wardens from the users collection successfully.")
+        logger.debug("Fetched all wardens from the users collection successfully.")
         return warden_list
 
     except Exception as e:
@@ -85,7 +308,7 @@ def wardens_to_assign():
                 "email": warden["email"]
             })
 
-        logger.info("Fetched all wardens from the users collection successfully.")
+        logger.debug("Fetched all wardens from the users collection successfully.")
         return warden_list
 
     except Exception as e:
@@ -95,43 +318,30 @@ def wardens_to_assign():
 def update_user_details(user_id, update_data: dict) -> bool:
     """Update user details."""
     result = users_collection.update_one({"_id": ObjectId(user_id)}, {"$set": update_data})
-    logger.info(f"User updated: {user_id}")
+    logger.info("User updated: %s", user_id)
     return result.modified_count > 0
 
 def delete_user(user_id: str) -> bool:
     """Delete a user by ID."""
-    result = users_collection.delete_one({"_id": user_id})
-    return result.deleted_count > 0
+    user = users_collection.find_one_and_delete({"_id": user_id}, {"bits_id": 1})
+    if user:
+        remove_placement(user.get("bits_id"))
+    return user is not None
 
 # Room Database Functions
 def add_rooms():
     """Add all predefined room from collections_format.py into the database."""
-    inserted_id = []
-
-    for room in rooms_data:
-        try:
-            # Convert the room instance to a dictionary
-            room_dict = room.to_dict()
-
-            # Optional: Check if the room already exists to prevent duplicates (by room name)
-            existing_room = rooms_collection.find_one({"hostel_name": room_dict["hostel_name"],"room_number": room_dict["room_number"]})
-            if existing_room:
-                logger.info(f"room '{room_dict['room_number']}' already exists in the database.")
-                continue
-
-            # Insert the room document into MongoDB
-            result = rooms_collection.insert_one(room_dict)
-            inserted_id.append(str(result.inserted_id))
-            logger.info(f"room '{room_dict['room_number']}' added successfully with ID: {result.inserted_id}")
-
-        except Exception as e:
-            logger.error(f"Failed to add room '{room.room_number}' to the database.", exc_info=True)
+    inserted_id = _insert_missing(rooms_collection, [room.to_doc() for room in rooms_data], ("hostel_name", "room_number"))
+    logger.info("Added %s new rooms.", len(inserted_id))
 
+    refresh_vacancies()
+    cache.invalidate("available_rooms")
+    bump_versions("hostels", "rooms")
     return inserted_id
 
-def list_all_rooms():
-    """List all rooms across hostels."""
-    return list(rooms_collection.find({}))
+def list_all_rooms(limit: int = None, after=None):
+    """Return a cursor over all rooms across hostels."""
+    return find_page(rooms_collection, {}, ROOM_LIST_FIELDS, limit, after)
 
 def check_room_availability(room_id: str) -> bool:
     """Check if a room is available."""
@@ -139,35 +349,58 @@ def check_room_availability(room_id: str) -> bool:
     return room and room["current_occupancy"] < room["capacity"]
 
 def get_room(room_id: str):
-    logger.info(f"Fetching room with ID: {room_id}")
+    logger.debug("Fetching room with ID: %s", room_id)
     room_data = rooms_collection.find_one({"_id": ObjectId(room_id)})
-    return Room(**room_data) if room_data else None
+    return Room.from_doc(room_data) if room_data else None
 
 def update_room(room_id: str, update_data: dict) -> bool:
     result = rooms_collection.update_one({"_id": ObjectId(room_id)}, {"$set": update_data})
-    logger.info(f"Room updated: {room_id}")
+    room = rooms_collection.find_one({"_id": ObjectId(room_id)}, {"hostel_name": 1})
+    if room:
+        refresh_vacancies([room["hostel_name"]])
+    cache.invalidate("available_rooms")
+    bump_versions("hostels", "rooms")
+    logger.info("Room updated: %s", room_id)
     return result.modified_count > 0
 
 def delete_room(room_id: str) -> bool:
     """Delete a room by ID."""
     result = rooms_collection.delete_one({"_id": room_id})
+    cache.invalidate("available_rooms")
+    if result.deleted_count:
+        bump_versions("rooms")
     return result.deleted_count > 0
 
 # Allotment Database Functions
 def add_allotment(allotment_data: Allotment) -> str:
-    result = allotments_collection.insert_one(allotment_data.to_dict())
-    logger.info(f"Allotment added with ID: {result.inserted_id}")
+    result = allotments_collection.insert_one(allotment_data.to_doc())
+    logger.info("Allotment added with ID: %s", result.inserted_id)
     return str(result.inserted_id)
 
 def list_allotments_by_user(user_id: str):
     """List all allotments by user ID."""
     return list(allotments_collection.find({"user_id": user_id}))
 
+def _delete_allotment(query: dict) -> bool:
+    """Delete an allotment; deleting an active one frees the student's bed for the waitlist in the same transaction."""
+    def delete(session):
+        allotment = allotments_collection.find_one_and_delete(query, session=session)
+        vacated = vacate_bed(allotment["user_id"], session) if allotment and allotment.get("status") == "active" else None
+        return allotment, vacated
+
+    allotment, vacated = run_in_transaction(delete)
+    if vacated:
+        invalidate_hostel_views()
+        cache.invalidate("available_rooms", vacated["hostel_name"])
+        bump_versions("hostels", "rooms", "applications")
+        logger.info("Vacated %s with its allotment; promoted %s.", allotment["user_id"], vacated["promoted"])
+    return allotment is not None
+
 def remove_allotment(allotment_id: str) -> bool:
     """Remove an allotment by ID."""
-    result = allotments_collection.delete_one({"_id": ObjectId(allotment_id)})
-    logger.info(f"Allotment removed: {allotment_id}")
-    return result.deleted_count > 0
+    removed = _delete_allotment({"_id": ObjectId(allotment_id)})
+    logger.info("Allotment removed: %s", allotment_id)
+    return removed
 
 def update_allotment(allotment_id: str, update_data: dict) -> bool:
     """Update allotment details."""
@@ -176,40 +409,30 @@ def update_allotment(allotment_id: str, update_data: dict) -> bool:
 
 def delete_allotment(allotment_id: str) -> bool:
     """Delete an allotment by ID."""
-    result = allotments_collection.delete_one({"_id": allotment_id})
-    return result.deleted_count > 0
+    return _delete_allotment({"_id": allotment_id})
 
 def get_allotment(allotment_id: str):
-    logger.info(f"Fetching allotment with ID: {allotment_id}")
+    logger.debug("Fetching allotment with ID: %s", allotment_id)
     allotment_data = allotments_collection.find_one({"_id": ObjectId(allotment_id)})
-    return Allotment(**allotment_data) if allotment_data else None
+    return Allotment.from_doc(allotment_data) if allotment_data else None
 
 # Hostel Database Functions
+def invalidate_hostel_views():
+    """Drop cached hostel listings after a write that changes hostel occupancy or details."""
+    cache.invalidate("hostels")
+    cache.invalidate("available_hostels")
+
 def add_hostels():
     """Add all predefined hostels from collections_format.py into the database."""
-    inserted_ids = []
-
-    for hostel in hostels_data:
-        try:
-            # Convert the Hostel instance to a dictionary
-            hostel_dict = hostel.to_dict()
-
-            # Optional: Check if the hostel already exists to prevent duplicates (by hostel name)
-            existing_hostel = hostels_collection.find_one({"hostel_name": hostel_dict["hostel_name"]})
-            if existing_hostel:
-                logger.info(f"Hostel '{hostel_dict['hostel_name']}' already exists in the database.")
-                continue
-
-            # Insert the hostel document into MongoDB
-            result = hostels_collection.insert_one(hostel_dict)
-            inserted_ids.append(str(result.inserted_id))
-            logger.info(f"Hostel '{hostel_dict['hostel_name']}' added successfully with ID: {result.inserted_id}")
-
-        except Exception as e:
-            logger.error(f"Failed to add hostel '{hostel.hostel_name}' to the database.", exc_info=True)
+    inserted_ids = _insert_missing(hostels_collection, [hostel.to_doc() for hostel in hostels_data], ("hostel_name",))
+    logger.info("Added %s new hostels.", len(inserted_ids))
 
+    refresh_vacancies()
+    invalidate_hostel_views()
+    bump_versions("hostels")
     return inserted_ids
 
+@cache.cached("hostels")
 def list_all_hostels():
     """Fetch and return the list of hostels from the database with warden details."""
     try:
@@ -232,31 +455,40 @@ def list_all_hostels():
             for hostel in hostels
         ]
 
-        logger.info("Fetched all hostels successfully from the database.")
+        logger.debug("Fetched all hostels successfully from the database.")
         return hostel_list
 
     except Exception as e:
+        # Re-raised rather than returning [] so the failure is not cached
         logger.error("Error fetching hostels from the database", exc_info=True)
-        return []
+        raise
 
 def update_hostel(hostel_id: str, update_data: dict) -> bool:
     """Update hostel details."""
     result = hostels_collection.update_one({"_id": ObjectId(hostel_id)}, {"$set": update_data})
-    logger.info(f"Hostel updated: {hostel_id}")
+    hostel = hostels_collection.find_one({"_id": ObjectId(hostel_id)}, {"hostel_name": 1})
+    if hostel:
+        refresh_vacancies([hostel["hostel_name"]])
+    invalidate_hostel_views()
+    bump_versions("hostels")
+    logger.info("Hostel updated: %s", hostel_id)
     return result.modified_count > 0
 
 def get_hostel(hostel_id: str):
-    logger.info(f"Fetching hostel with ID: {hostel_id}")
+    logger.debug("Fetching hostel with ID: %s", hostel_id)
     hostel_data = hostels_collection.find_one({"_id": ObjectId(hostel_id)})
-    return Hostel(**hostel_data) if hostel_data else None
+    return Hostel.from_doc(hostel_data) if hostel_data else None
 
+@cache.cached("available_hostels")
 def get_available_hostels():
     """Fetches all hostels where remaining capacity (capacity - current_occupancy) is greater than zero."""
     try:
-        # Query to find hostels where remaining capacity > 0
-        available_hostels = hostels_collection.find({
-            "$expr": { "$gt": ["$capacity", "$current_occupancy"] }
-        })
+        # Hostels with free beds come from the vacancy index rather than an unindexable $expr scan
+        hostel_names = [
+            vacancy["hostel_name"]
+            for vacancy in vacancies_collection.find({"room_type": None, "free_beds": {"$gt": 0}}, {"hostel_name": 1})
+        ]
+        available_hostels = hostels_collection.find({"hostel_name": {"$in": hostel_names}})
         
         # Convert each hostel document to a dictionary, and add it to the list
         hostel_list = []
@@ -266,44 +498,77 @@ def get_available_hostels():
         
         return hostel_list
     except Exception as e:
-        print(f"Error fetching available hostels: {e}")
-        return []
+        logger.error("Error fetching available hostels: %s", e)
+        raise
 
 def delete_hostel(hostel_id: str) -> bool:
     """Delete a hostel by ID."""
     result = hostels_collection.delete_one({"_id": hostel_id})
+    invalidate_hostel_views()
+    if result.deleted_count:
+        bump_versions("hostels")
     return result.deleted_count > 0
 
-def assign_hostel_to_student(bits_id: str, hostel_name: str):
-    try:        
-        # Check if the selected hostel has available capacity
-        hostel = hostels_collection.find_one({"hostel_name": hostel_name})
-        
-        if not hostel or hostel["current_occupancy"] >= hostel["capacity"]:
-            print("Hostel is full or does not exist.")
-            return False
-        
-        # Update the application with the assigned hostel
-        applications_collection.update_one(
-            {"bits_id": bits_id},
-            {"$set": {"hostel_status": "assigned", "alloted_hostel": hostel_name}}
-        )
+def reserve_hostel_bed(bits_id: str, hostel_name: str, session=None):
+    """Give a student a bed in a hostel, raising ReservationError if it is full or does not exist."""
+    # Check capacity and take the bed in one conditional update so concurrent assignments cannot overbook
+    hostel = hostels_collection.find_one_and_update(
+        {"hostel_name": hostel_name, "$expr": {"$lt": ["$current_occupancy", "$capacity"]}},
+        {"$inc": {"current_occupancy": 1}},
+        session=session
+    )
+    if not hostel:
+        raise ReservationError(f"Hostel {hostel_name} is full or does not exist.")
+
+    def release(application=None):
+        # No transaction to roll back, so undo the writes made above
+        if session is None:
+            hostels_collection.update_one({"hostel_name": hostel_name}, {"$inc": {"current_occupancy": -1}})
+            if application is not None:
+                restore = {"$set": {}, "$unset": {}}
+                for field in ("hostel_status", "alloted_hostel", "updated_at"):
+                    if field in application:
+                        restore["$set"][field] = application[field]
+                    else:
+                        restore["$unset"][field] = ""
+                applications_collection.update_one({"_id": application["_id"]}, {k: v for k, v in restore.items() if v})
+
+    # Update the application with the assigned hostel; the document before the update is kept for release()
+    application = applications_collection.find_one_and_update(
+        {"bits_id": bits_id},
+        {"$set": {"hostel_status": "assigned", "alloted_hostel": hostel_name, "updated_at": datetime.utcnow()}},
+        {"hostel_status": 1, "alloted_hostel": 1, "updated_at": 1},
+        session=session
+    )
+    if application is None:
+        release()
+        raise StudentNotFound(f"Student {bits_id} has no application.")
+
+    user = users_collection.find_one_and_update(
+        {"bits_id": bits_id},
+        {"$set": {"hostel_name": hostel_name}},
+        PLACEMENT_USER_FIELDS,
+        return_document=ReturnDocument.AFTER,
+        session=session
+    )
+    if user is None:
+        release(application)
+        raise StudentNotFound(f"Failed to update student {bits_id} with hostel information.")
+    take_hostel_bed(hostel_name, session=session)
+    save_placement(user, session=session)
 
-        users_collection.update_one(
-            {"bits_id": bits_id},
-            {"$set": {"hostel_name": hostel_name}}
-        )
-        
-        # Increment the current occupancy of the assigned hostel
-        hostels_collection.update_one(
-            {"hostel_name": hostel_name},
-            {"$inc": {"current_occupancy": 1}}
-        )
-        
-        print(f"Hostel {hostel_name} assigned successfully to BITS ID {bits_id}.")
+def assign_hostel_to_student(bits_id: str, hostel_name: str):
+    try:
+        run_in_transaction(lambda session: reserve_hostel_bed(bits_id, hostel_name, session))
+        invalidate_hostel_views()
+        bump_versions("hostels", "applications")
+        logger.info("Hostel %s assigned to BITS ID %s.", hostel_name, bits_id)
         return True
+    except ReservationError as e:
+        logger.warning("Hostel assignment for %s rejected: %s", bits_id, e)
+        return False
     except Exception as e:
-        print(f"Error assigning hostel: {e}")
+        logger.error("Error assigning hostel %s to %s", hostel_name, bits_id, exc_info=True)
         return False
 
 # Application Database Functions
@@ -317,108 +582,234 @@ def create_application(user_id, hostel_preference, room_type_preference):
         hostel_status="pending",
         room_status="pending"
     )
-    result = applications_collection.insert_one(application.to_dict())
+    document = application.to_doc()
+    # Tailed by the live pending-queue feed when change streams are unavailable
+    document["updated_at"] = datetime.utcnow()
+    result = applications_collection.insert_one(document)
+    bump_versions("applications")
     return str(result.inserted_id)
 
-def get_closed_applications_admin():
-    """Get applications by their status (e.g., pending, approved)."""
-    return list(applications_collection.find({"hostel_status": {"$ne": "pending"}}))
+def get_closed_applications_admin(limit: int = None, after=None):
+    """Return a cursor over applications whose hostel request has been decided."""
+    return find_page(applications_collection, {"hostel_status": {"$ne": "pending"}}, APPLICATION_LIST_FIELDS, limit, after)
 
-def get_pending_applications_admin():
-    """Get applications by their status (e.g., pending, approved)."""
-    return list(applications_collection.find({"hostel_status": "pending"}))
+def get_pending_applications_admin(limit: int = None, after=None):
+    """Return a cursor over applications waiting for a hostel."""
+    return find_page(applications_collection, {"hostel_status": "pending"}, APPLICATION_LIST_FIELDS, limit, after)
 
-def get_closed_applications_warden(hostel_name: str):
-    """Get applications by their status (e.g., pending, approved)."""
-    return list(applications_collection.find({"room_status": {"$ne": "pending"}, "alloted_hostel":hostel_name}))
+def get_closed_applications_warden(hostel_name: str, limit: int = None, after=None):
+    """Return a cursor over a hostel's applications whose room request has been decided."""
+    return find_page(
+        applications_collection,
+        {"room_status": {"$ne": "pending"}, "alloted_hostel": hostel_name},
+        APPLICATION_LIST_FIELDS, limit, after
+    )
 
-def get_pending_applications_warden(hostel_name: str):
-    """Get applications by their status (e.g., pending, approved)."""
-    return list(applications_collection.find({"room_status": "pending", "hostel_status": "assigned", "alloted_hostel":hostel_name}))
+def get_pending_applications_warden(hostel_name: str, limit: int = None, after=None):
+    """Return a cursor over a hostel's applications waiting for a room."""
+    return find_page(
+        applications_collection,
+        {"room_status": "pending", "hostel_status": "assigned", "alloted_hostel": hostel_name},
+        APPLICATION_LIST_FIELDS, limit, after
+    )
 
 def update_application_status(application_id: str, status: str) -> bool:
     """Update the status of an application."""
-    result = applications_collection.update_one({"_id": ObjectId(application_id)}, {"$set": {"status": status}})
-    logger.info(f"Application status updated for: {application_id}")
+    result = applications_collection.update_one(
+        {"_id": {"$in": _stored_ids([application_id])}},
+        {"$set": {"status": status, "updated_at": datetime.utcnow()}}
+    )
+    if result.modified_count:
+        bump_versions("applications")
+    logger.info("Application status updated for: %s", application_id)
     return result.modified_count > 0
 
 def get_application(application_id: str):
-    logger.info(f"Fetching application with ID: {application_id}")
-    application_data = applications_collection.find_one({"_id": ObjectId(application_id)})
-    return Application(**application_data) if application_data else None
+    logger.debug("Fetching application with ID: %s", application_id)
+    application_data = applications_collection.find_one({"_id": {"$in": _stored_ids([application_id])}})
+    return Application.from_doc(application_data) if application_data else None
 
 def delete_application(application_id: str) -> bool:
     """Delete an application by ID."""
     result = applications_collection.delete_one({"_id": application_id})
+    if result.deleted_count:
+        bump_versions("applications")
     return result.deleted_count > 0
 
+# Bulk decisions set the hostel_status (admin) or room_status (warden) of many applications at once.
+# Only applications still pending in that field change, so a bulk decision never overrides an
+# assignment or an earlier decision.
+DECISION_FIELDS = {"hostel": "hostel_status", "room": "room_status"}
+DECISION_STATUSES = ("approved", "rejected")
+MAX_BULK_DECISIONS = int(os.getenv("MAX_BULK_DECISIONS", "1000"))
+
+def _stored_ids(application_ids) -> list:
+    """Applications are created with string ids; match ObjectIds too for ones written by other tools."""
+    ids = []
+    for application_id in application_ids:
+        ids.append(application_id)
+        if ObjectId.is_valid(application_id):
+            ids.append(ObjectId(application_id))
+    return ids
+
+def decision_query(kind: str, hostel_name: str = None, room_type: str = None,
+                   applied_after: datetime = None, applied_before: datetime = None) -> dict:
+    """The pending applications a filter-based decision covers; the date range is half-open."""
+    field = DECISION_FIELDS[kind]
+    query = {field: "pending"}
+    if kind == "room":
+        # The same applications get_pending_applications_warden lists
+        query["hostel_status"] = "assigned"
+        if hostel_name:
+            query["alloted_hostel"] = hostel_name
+    elif hostel_name:
+        query["hostel_preference"] = hostel_name
+    if room_type:
+        query["room_type_preference"] = room_type
+    # application_date is stored as an ISO string, which sorts chronologically
+    dates = {}
+    if applied_after:
+        dates["$gte"] = applied_after.isoformat()
+    if applied_before:
+        dates["$lt"] = applied_before.isoformat()
+    if dates:
+        query["application_date"] = dates
+    return query
+
+def decide_applications(kind: str, status: str, application_ids: list = None, filters: dict = None,
+                        scope_hostel: str = None) -> dict:
+    """Set `status` on many applications with one update_many and report what happened to each.
+
+    Applications are chosen by `application_ids`, or when that is None by `filters` (the keyword
+    arguments of decision_query), at most MAX_BULK_DECISIONS per call; `more` tells the caller to
+    repeat a filter-based decision. `scope_hostel` limits the decision to one hostel's students,
+    for wardens. Each result is `updated`, `not_pending` (with the current status), `forbidden`
+    or `not_found`.
+    """
+    field = DECISION_FIELDS[kind]
+    if status not in DECISION_STATUSES:
+        raise ValueError(f"status must be one of {', '.join(DECISION_STATUSES)}")
+    if application_ids is not None:
+        if len(application_ids) > MAX_BULK_DECISIONS:
+            raise ValueError(f"At most {MAX_BULK_DECISIONS} applications can be decided at once")
+        query = {"_id": {"$in": _stored_ids(application_ids)}}
+    else:
+        query = decision_query(kind, **(filters or {}))
+        if scope_hostel is not None:
+            query["alloted_hostel"] = scope_hostel
+    projection = {field: 1, "hostel_status": 1, "alloted_hostel": 1}
+
+    def decide(session):
+        found = list(applications_collection.find(query, projection, session=session).limit(MAX_BULK_DECISIONS + 1))
+        more = len(found) > MAX_BULK_DECISIONS
+        results, eligible = {}, []
+        for application in found[:MAX_BULK_DECISIONS]:
+            application_id = str(application["_id"])
+            if scope_hostel is not None and application.get("alloted_hostel") != scope_hostel:
+                results[application_id] = {"result": "forbidden"}
+            elif application.get(field) != "pending" or (kind == "room" and application.get("hostel_status") != "assigned"):
+                results[application_id] = {"result": "not_pending", "status": application.get(field)}
+            else:
+                results[application_id] = {"result": "updated", "status": status}
+                eligible.append(application["_id"])
+
+        if eligible:
+            now = datetime.utcnow()
+            result = applications_collection.update_many(
+                {"_id": {"$in": eligible}, field: "pending"},
+                {"$set": {field: status, "updated_at": now}},
+                session=session
+            )
+            if result.modified_count < len(eligible):
+                # Without a transaction another writer got to some of them first
+                changed = {doc["_id"] for doc in applications_collection.find(
+                    {"_id": {"$in": eligible}, "updated_at": now}, {"_id": 1}, session=session)}
+                for application_id in eligible:
+                    if application_id not in changed:
+                        results[str(application_id)] = {"result": "not_pending"}
+        return results, more
+
+    results, more = run_in_transaction(decide)
+    if application_ids is not None:
+        ordered = [{"application_id": application_id, **results.get(application_id, {"result": "not_found"})}
+                   for application_id in application_ids]
+    else:
+        ordered = [{"application_id": application_id, **outcome} for application_id, outcome in results.items()]
+    updated = sum(1 for outcome in ordered if outcome["result"] == "updated")
+    if updated:
+        bump_versions("applications")
+    logger.info("Bulk %s decision: %d of %d applications set to %s", kind, updated, len(ordered), status)
+    return {"updated": updated, "more": more, "results": ordered}
+
 # Utility Functions
+@cache.cached("available_rooms")
 def find_available_rooms(hostel_name: str):
     try:
-        # Query to find rooms with current occupancy less than capacity
-        rooms = rooms_collection.find({
-            "hostel_name": hostel_name,
-            "$expr": {"$lt": ["$current_occupancy", "$capacity"]}
-        })
+        # Rooms with space come from the vacancy index, then are fetched by (hostel_name, room_number)
+        room_numbers = [
+            room_number
+            for vacancy in vacancies_collection.find({"hostel_name": hostel_name, "room_type": {"$ne": None}}, {"rooms": 1})
+            for room_number in vacancy["rooms"]
+        ]
+        rooms = rooms_collection.find({"hostel_name": hostel_name, "room_number": {"$in": room_numbers}})
 
-        logger.info(f"Fetched available rooms for hostel: {hostel_name}")
+        logger.debug("Fetched available rooms for hostel: %s", hostel_name)
 
-        # Convert MongoDB result to Room dataclass instances
-        return [Room(
-            hostel_name=room["hostel_name"],
-            room_number=room["room_number"],
-            type=room["type"],
-            capacity=room["capacity"],
-            current_occupancy=room["current_occupancy"],
-            occupants=room.get("occupants", []),
-            features=room.get("features", [])
-        ) for room in rooms]
+        return [Room.from_doc(room) for room in rooms]
 
     except Exception as e:
-        logger.error(f"Error finding available rooms for hostel {hostel_name}: {e}")
-        return []
+        logger.error("Error finding available rooms for hostel %s: %s", hostel_name, e)
+        raise
+
+def reserve_room_bed(bits_id: str, room_number: str, hostel_name: str, session=None) -> dict:
+    """Give a student a bed in a room, raising ReservationError if it is full or does not exist."""
+    # Check capacity and take the bed in one conditional update so concurrent assignments cannot overbook
+    room = rooms_collection.find_one_and_update(
+        {"room_number": room_number, "hostel_name": hostel_name, "$expr": {"$lt": ["$current_occupancy", "$capacity"]}},
+        {"$inc": {"current_occupancy": 1}},
+        return_document=ReturnDocument.AFTER,
+        session=session
+    )
+    if not room:
+        raise ReservationError(f"Room {room_number} in hostel {hostel_name} is full or does not exist.")
+
+    # Update the student's room and hostel details
+    user = users_collection.find_one_and_update(
+        {"bits_id": bits_id},
+        {"$set": {"room_number": room_number, "hostel_name": hostel_name}},
+        PLACEMENT_USER_FIELDS,
+        return_document=ReturnDocument.AFTER,
+        session=session
+    )
+    if user is None:
+        if session is None:
+            # No transaction to roll back, so release the bed taken above
+            rooms_collection.update_one(
+                {"room_number": room_number, "hostel_name": hostel_name},
+                {"$inc": {"current_occupancy": -1}}
+            )
+        raise StudentNotFound(f"Failed to update student {bits_id} with room information.")
+    take_room_bed(room, session=session)
+    save_placement(user, room["type"], session=session)
+
+    applications_collection.update_one(
+        {"bits_id": bits_id},
+        {"$set": {"room_status": "assigned", "alloted_room": room_number, "updated_at": datetime.utcnow()}},
+        session=session
+    )
+    return room
 
 def assign_room_to_student(bits_id: str, room_number: str, hostel_name: str) -> bool:
     try:
-        # Find the room by its ObjectId
-        room = rooms_collection.find_one({"room_number": room_number, "hostel_name":hostel_name})
-        if not room:
-            logger.error(f"Room with room_number {room_number} not found.")
-            return False
-
-        # Check if the room has available capacity
-        if room["current_occupancy"] >= room["capacity"]:
-            logger.error(f"Room {room_number} has reached its full capacity.")
-            return False
-
-        # Update the student's room and hostel details
-        update_student = users_collection.update_one(
-            {"bits_id": bits_id},
-            {"$set": {"room_number": room_number, "hostel_name": hostel_name}}
-        )
-        
-        if update_student.modified_count == 0:
-            logger.error(f"Failed to update student {bits_id} with room information.")
-            return False
-
-        # Increment the room's current occupancy
-        update_room = rooms_collection.update_one(
-            {"room_number": room_number, "hostel_name":hostel_name},
-            {"$inc": {"current_occupancy": 1}}
-        )
-
-        applications_collection.update_one(
-            {"bits_id": bits_id},
-            {"$set": {"room_status": "assigned", "alloted_room": room_number}}
-        )
-
-        if update_room.modified_count == 0:
-            logger.error(f"Failed to update room occupancy for room {room_number}.")
-            return False
-
-        logger.info(f"Assigned room {room_number} in hostel {hostel_name} to student {bits_id}.")
+        run_in_transaction(lambda session: reserve_room_bed(bits_id, room_number, hostel_name, session))
+        cache.invalidate("available_rooms", hostel_name)
+        bump_versions("rooms", "applications")
+        logger.info("Assigned room %s in hostel %s to student %s.", room_number, hostel_name, bits_id)
         return True
 
+    except ReservationError as e:
+        logger.error(str(e))
+        return False
     except Exception as e:
         logger.error("Error assigning room to student", exc_info=True)
         return False
@@ -427,17 +818,17 @@ def assign_warden_to_hostel(hostel_name, warden_email):
     """Assign a warden to a specific hostel by finding the warden by name and updating hostel details."""
     try:
         # Log the input parameters for debugging
-        logger.debug(f"Assigning warden with name: {warden_email} to hostel with hostel_name: {hostel_name}")
+        logger.debug("Assigning warden with name: %s to hostel with hostel_name: %s", warden_email, hostel_name)
 
         # Look up the warden in the users collection by name and role
         warden = users_collection.find_one({"email": warden_email, "role": "warden"})
         
         # Check if warden was found and log details
         if not warden:
-            logger.warning(f"No warden found with name '{warden_email}'.")
+            logger.warning("No warden found with name '%s'.", warden_email)
             return False
         else:
-            logger.debug(f"Found warden: {warden}")
+            logger.debug("Found warden: %s", warden["_id"])
 
         # Retrieve the warden's ObjectId and contact details
         warden_id = warden["_id"]
@@ -446,7 +837,7 @@ def assign_warden_to_hostel(hostel_name, warden_email):
         warden_email = warden_email
         
         # Log warden details being assigned to the hostel
-        logger.debug(f"Assigning warden ID: {warden_id}, Name: {warden_email}, Contact: {warden_contact} to hostel name: {hostel_name}")
+        logger.debug("Assigning warden ID: %s, Name: %s, Contact: %s to hostel name: %s", warden_id, warden_email, warden_contact, hostel_name)
 
         # Update the hostel document with the warden's name and contact
         result = hostels_collection.update_one(
@@ -467,14 +858,16 @@ def assign_warden_to_hostel(hostel_name, warden_email):
 
         # Log the result of the update operation
         if result.modified_count > 0:
-            logger.info(f"Warden '{warden_name}' assigned to hostel with ID {hostel_name}.")
+            invalidate_hostel_views()
+            bump_versions("hostels")
+            logger.info("Warden '%s' assigned to hostel with ID %s.", warden_name, hostel_name)
             return True
         else:
-            logger.warning(f"No updates made for hostel with ID {hostel_name}.")
+            logger.warning("No updates made for hostel with ID %s.", hostel_name)
             return False
 
     except Exception as e:
-        logger.error(f"Error assigning warden '{warden_name}' to hostel with ID {hostel_name}", exc_info=True)
+        logger.error("Error assigning warden '%s' to hostel with ID %s", warden_name, hostel_name, exc_info=True)
         return False
     
 def remove_warden_from_hostel(hostel_name, warden_email):
@@ -482,7 +875,7 @@ def remove_warden_from_hostel(hostel_name, warden_email):
     try:
         # Validate if hostel_name is a valid ObjectId
         if not hostel_name:
-            logger.error(f"Invalid ObjectId for hostel_name: {hostel_name}")
+            logger.error("Invalid ObjectId for hostel_name: %s", hostel_name)
             return False
         # Update the hostel document to remove the warden details
         result = hostels_collection.update_one(
@@ -501,31 +894,599 @@ def remove_warden_from_hostel(hostel_name, warden_email):
         )       
         # Log the result
         if result.modified_count > 0:
-            logger.info(f"Warden removed from hostel with ID {hostel_name}.")
+            invalidate_hostel_views()
+            bump_versions("hostels")
+            logger.info("Warden removed from hostel with ID %s.", hostel_name)
             return True
         else:
-            logger.warning(f"No updates made for hostel with ID {hostel_name}.")
+            logger.warning("No updates made for hostel with ID %s.", hostel_name)
             return False
 
     except Exception as e:
-        logger.error(f"Error removing warden from hostel with ID {hostel_name}", exc_info=True)
+        logger.error("Error removing warden from hostel with ID %s", hostel_name, exc_info=True)
         return False
     
-def get_students_by_hostel(hostel_name):
-    """Fetch all students assigned to a specific hostel."""
+def get_students_by_hostel(hostel_name, room_number=None):
+    """Fetch all students assigned to a specific hostel, or one of its rooms, from the placement read model."""
     try:
-        students = users_collection.find({"hostel_name": hostel_name, "role": "student"})
-        
-        # Convert MongoDB documents to User instances, converting date strings to datetime if needed
-        student_list = []
-        for student in students:
-            # Convert `registration_date` if it exists and is a string
-            if "registration_date" in student and isinstance(student["registration_date"], str):
-                student["registration_date"] = datetime.fromisoformat(student["registration_date"])
-            # Exclude '_id' field as needed
-            student_list.append(User(**{key: value for key, value in student.items() if key != "_id"}))
-        
-        return student_list
+        return get_hostel_roster(hostel_name, room_number)
     except Exception as e:
-        print(f"Error fetching students for hostel {hostel_name}: {e}")
-        return []
\ No newline at end of file
+        logger.error("Error fetching students for hostel %s", hostel_name, exc_info=True)
+        return []
+
+# Vacancy Index Functions
+# One document per (hostel_name, room_type) holds the free-bed count and the sorted room numbers
+# that still have space; the document with room_type None holds the hostel-level free beds.
+def take_hostel_bed(hostel_name: str, count: int = 1, session=None):
+    """Record `count` beds taken at hostel level."""
+    vacancies_collection.update_one(
+        {"hostel_name": hostel_name, "room_type": None},
+        {"$inc": {"free_beds": -count}},
+        session=session
+    )
+
+def take_room_bed(room: dict, session=None):
+    """Record one bed taken in `room`, the room document as it is after its occupancy was incremented."""
+    update = {"$inc": {"free_beds": -1}}
+    if room["current_occupancy"] >= room["capacity"]:
+        update["$pull"] = {"rooms": room["room_number"]}
+    vacancies_collection.update_one({"hostel_name": room["hostel_name"], "room_type": room["type"]}, update, session=session)
+
+def release_hostel_bed(hostel_name: str, session=None):
+    """Record one bed freed at hostel level."""
+    take_hostel_bed(hostel_name, -1, session=session)
+
+def release_room_bed(room: dict, session=None):
+    """Record one bed freed in `room`, the room document as it is after its occupancy was decremented."""
+    key = {"hostel_name": room["hostel_name"], "room_type": room["type"]}
+    vacancies_collection.update_one(key, {"$inc": {"free_beds": 1}}, session=session)
+    # The room list stays sorted so find_free_room keeps returning the lowest-numbered room
+    vacancies_collection.update_one(
+        {**key, "rooms": {"$ne": room["room_number"]}},
+        {"$push": {"rooms": {"$each": [room["room_number"]], "$sort": 1}}},
+        session=session
+    )
+
+def refresh_vacancies(hostel_names=None):
+    """Rebuild vacancy documents from the hostel and room occupancy counters.
+
+    Limited to `hostel_names` when given, otherwise every hostel is rebuilt.
+    """
+    query = {} if hostel_names is None else {"hostel_name": {"$in": list(hostel_names)}}
+    vacancies = {}
+
+    for hostel in hostels_collection.find(query, {"hostel_name": 1, "capacity": 1, "current_occupancy": 1}):
+        vacancies[(hostel["hostel_name"], None)] = {
+            "hostel_name": hostel["hostel_name"],
+            "room_type": None,
+            "free_beds": max(hostel.get("capacity", 0) - hostel.get("current_occupancy", 0), 0)
+        }
+
+    for room in rooms_collection.find(query, {"hostel_name": 1, "room_number": 1, "type": 1, "capacity": 1, "current_occupancy": 1}):
+        vacancy = vacancies.setdefault((room["hostel_name"], room["type"]), {
+            "hostel_name": room["hostel_name"], "room_type": room["type"], "free_beds": 0, "rooms": []
+        })
+        free_beds = room["capacity"] - room.get("current_occupancy", 0)
+        if free_beds > 0:
+            vacancy["free_beds"] += free_beds
+            vacancy["rooms"].append(room["room_number"])
+
+    operations = []
+    for (hostel_name, room_type), vacancy in vacancies.items():
+        if "rooms" in vacancy:
+            vacancy["rooms"].sort()
+        operations.append(ReplaceOne({"hostel_name": hostel_name, "room_type": room_type}, vacancy, upsert=True))
+    for stale in vacancies_collection.find(query, {"hostel_name": 1, "room_type": 1}):
+        if (stale["hostel_name"], stale.get("room_type")) not in vacancies:
+            operations.append(DeleteOne({"_id": stale["_id"]}))
+
+    if operations:
+        vacancies_collection.bulk_write(operations, ordered=False)
+    logger.info("Refreshed %s vacancy entries.", len(vacancies))
+
+def ensure_vacancy_index():
+    """Build vacancy documents at start-up for every hostel that has no hostel-level (room_type None) entry.
+
+    Covers the first start as well as hostels added while the index was not being maintained.
+    """
+    indexed = set(vacancies_collection.distinct("hostel_name", {"room_type": None}))
+    missing = set(hostels_collection.distinct("hostel_name")) - indexed
+    if missing:
+        logger.info("Building vacancy index for %s hostels.", len(missing))
+        refresh_vacancies(missing)
+        invalidate_hostel_views()
+        cache.invalidate("available_rooms")
+        bump_versions("hostels", "rooms")
+
+def reconcile_occupancy(progress=None):
+    """Recount occupancy from the users collection, correct drifted counters and rebuild the vacancy index.
+
+    `progress(message)`, when given, is called after the recount and before anything is written,
+    so a background job can still be cancelled there.
+    """
+    room_counts = {
+        (group["_id"]["hostel_name"], group["_id"]["room_number"]): group["count"]
+        for group in users_collection.aggregate([
+            {"$match": {"role": "student", "hostel_name": {"$ne": None}, "room_number": {"$ne": None}}},
+            {"$group": {"_id": {"hostel_name": "$hostel_name", "room_number": "$room_number"}, "count": {"$sum": 1}}}
+        ])
+    }
+    hostel_counts = {
+        group["_id"]: group["count"]
+        for group in users_collection.aggregate([
+            {"$match": {"role": "student", "hostel_name": {"$ne": None}}},
+            {"$group": {"_id": "$hostel_name", "count": {"$sum": 1}}}
+        ])
+    }
+
+    room_fixes = [
+        UpdateOne({"_id": room["_id"]}, {"$set": {"current_occupancy": room_counts.get((room["hostel_name"], room["room_number"]), 0)}})
+        for room in rooms_collection.find({}, {"hostel_name": 1, "room_number": 1, "current_occupancy": 1})
+        if room.get("current_occupancy", 0) != room_counts.get((room["hostel_name"], room["room_number"]), 0)
+    ]
+    hostel_fixes = [
+        UpdateOne({"_id": hostel["_id"]}, {"$set": {"current_occupancy": hostel_counts.get(hostel["hostel_name"], 0)}})
+        for hostel in hostels_collection.find({}, {"hostel_name": 1, "current_occupancy": 1})
+        if hostel.get("current_occupancy", 0) != hostel_counts.get(hostel["hostel_name"], 0)
+    ]
+    if progress:
+        progress(f"Correcting {len(room_fixes)} rooms and {len(hostel_fixes)} hostels")
+    if room_fixes:
+        rooms_collection.bulk_write(room_fixes, ordered=False)
+    if hostel_fixes:
+        hostels_collection.bulk_write(hostel_fixes, ordered=False)
+
+    refresh_vacancies()
+    invalidate_hostel_views()
+    cache.invalidate("available_rooms")
+    bump_versions("hostels", "rooms")
+    logger.info("Occupancy reconciled: %s rooms and %s hostels corrected.", len(room_fixes), len(hostel_fixes))
+    return {"rooms_corrected": len(room_fixes), "hostels_corrected": len(hostel_fixes)}
+
+def find_free_room(hostel_name: str, room_type: str, session=None):
+    """Return the lowest-numbered room of `room_type` in the hostel that has a free bed, or None."""
+    vacancy = vacancies_collection.find_one(
+        {"hostel_name": hostel_name, "room_type": room_type},
+        {"rooms": {"$slice": 1}},
+        session=session
+    )
+    return vacancy["rooms"][0] if vacancy and vacancy["rooms"] else None
+
+def get_hostel_vacancies(hostel_name: str):
+    """Free beds per room type for a hostel, plus the next room with space for each type."""
+    vacancies = []
+    for vacancy in vacancies_collection.find({"hostel_name": hostel_name}, {"_id": 0}).sort("room_type", ASCENDING):
+        rooms = vacancy.pop("rooms", None)
+        if rooms is not None:
+            vacancy["rooms_with_space"] = len(rooms)
+            vacancy["next_room"] = rooms[0] if rooms else None
+        vacancies.append(vacancy)
+    return vacancies
+
+# Placement Read Model
+# One `placements` document per student with a bed says who they are and where they live. The
+# reservation, allocation and vacate functions write it in the same transaction as the student's
+# user document, so roster and roommate lookups are single indexed reads. The users collection
+# stays the source of truth: rebuild_placements recreates documents from it and check_placements
+# reports where the users, placements, applications and room counters disagree.
+PLACEMENT_USER_FIELDS = {"_id": 0, "bits_id": 1, "username": 1, "email": 1, "contact_number": 1,
+                         "hostel_name": 1, "room_number": 1}
+PLACEMENT_FIELDS = ("bits_id", "username", "email", "contact_number", "hostel_name", "room_number", "room_type")
+# What roster reads return and their order, shared with async_database.get_students_by_hostel
+ROSTER_PROJECTION = {"_id": 0, "updated_at": 0}
+ROSTER_ORDER = [("hostel_name", ASCENDING), ("room_number", ASCENDING), ("bits_id", ASCENDING)]
+MAX_REPORTED_DIFFERENCES = 100
+
+def _placement(user: dict, room_type=None) -> dict:
+    placement = {field: user.get(field) for field in PLACEMENT_USER_FIELDS if field != "_id"}
+    placement["room_type"] = room_type if placement["room_number"] else None
+    placement["updated_at"] = datetime.utcnow()
+    return placement
+
+def save_placement(user: dict, room_type: str = None, session=None):
+    """Write the placement of `user` (a document with PLACEMENT_USER_FIELDS) as it is now."""
+    if user.get("room_number") and room_type is None:
+        room = rooms_collection.find_one({"hostel_name": user["hostel_name"], "room_number": user["room_number"]},
+                                         {"type": 1}, session=session)
+        room_type = room and room["type"]
+    placements_collection.replace_one({"bits_id": user["bits_id"]}, _placement(user, room_type), upsert=True,
+                                      session=session)
+
+def remove_placement(bits_id: str, session=None):
+    placements_collection.delete_one({"bits_id": bits_id}, session=session)
+
+def _room_types(hostel_names=None, session=None) -> dict:
+    query = {} if hostel_names is None else {"hostel_name": {"$in": list(hostel_names)}}
+    return {
+        (room["hostel_name"], room["room_number"]): room["type"]
+        for room in rooms_collection.find(query, {"_id": 0, "hostel_name": 1, "room_number": 1, "type": 1}, session=session)
+    }
+
+def _expected_placements(bits_ids=None, session=None) -> dict:
+    """Placement documents as the users collection says they should be, keyed by bits_id."""
+    query = {"role": "student", "hostel_name": {"$ne": None}}
+    if bits_ids is not None:
+        query["bits_id"] = {"$in": list(bits_ids)}
+    users = list(users_collection.find(query, PLACEMENT_USER_FIELDS, session=session))
+    room_types = _room_types({user["hostel_name"] for user in users} if bits_ids is not None else None, session)
+    return {
+        user["bits_id"]: _placement(user, room_types.get((user["hostel_name"], user.get("room_number"))))
+        for user in users
+    }
+
+def rebuild_placements(bits_ids=None, session=None, progress=None) -> dict:
+    """Recreate placement documents from the users collection, for every student or only `bits_ids`.
+
+    `progress(message)` is called once the placements are computed, before they are written.
+    """
+    expected = _expected_placements(bits_ids, session)
+    operations = [ReplaceOne({"bits_id": bits_id}, placement, upsert=True) for bits_id, placement in expected.items()]
+    query = {} if bits_ids is None else {"bits_id": {"$in": list(bits_ids)}}
+    removed = 0
+    for stale in placements_collection.find(query, {"bits_id": 1}, session=session):
+        if stale["bits_id"] not in expected:
+            operations.append(DeleteOne({"_id": stale["_id"]}))
+            removed += 1
+    if progress:
+        progress(f"Writing {len(expected)} placements")
+    if operations:
+        placements_collection.bulk_write(operations, ordered=False, session=session)
+    if bits_ids is None:
+        logger.info("Rebuilt %s placements, removed %s stale ones.", len(expected), removed)
+    return {"placements": len(expected), "removed": removed}
+
+def check_placements(progress=None) -> dict:
+    """Compare placements with the users, applications and room occupancy counters without changing anything.
+
+    Returns the number of differences of each kind with up to MAX_REPORTED_DIFFERENCES examples:
+    students whose placement is `missing`, `stale` placements of students without a bed,
+    placements that `differ` from the user document, assigned `applications` whose hostel or
+    room disagrees with the placement, and rooms whose `occupancy` counter differs from the
+    number of students placed in them. `progress(message)` is called before each of those passes.
+    """
+    expected = _expected_placements()
+    found = {placement["bits_id"]: placement for placement in placements_collection.find({}, {"_id": 0, "updated_at": 0})}
+    report = {kind: {"count": 0, "examples": []} for kind in ("missing", "stale", "differ", "applications", "occupancy")}
+
+    def add(kind, example):
+        report[kind]["count"] += 1
+        if len(report[kind]["examples"]) < MAX_REPORTED_DIFFERENCES:
+            report[kind]["examples"].append(example)
+
+    if progress:
+        progress(f"Comparing {len(expected)} placements")
+    for bits_id, placement in expected.items():
+        if bits_id not in found:
+            add("missing", bits_id)
+            continue
+        differences = {field: {"expected": placement[field], "found": found[bits_id].get(field)}
+                       for field in PLACEMENT_FIELDS if placement[field] != found[bits_id].get(field)}
+        if differences:
+            add("differ", {"bits_id": bits_id, "fields": differences})
+    for bits_id in found.keys() - expected.keys():
+        add("stale", bits_id)
+
+    if progress:
+        progress("Checking applications")
+    for application in applications_collection.find(
+        {"$or": [{"hostel_status": "assigned"}, {"room_status": "assigned"}]},
+        {"bits_id": 1, "hostel_status": 1, "room_status": 1, "alloted_hostel": 1, "alloted_room": 1}
+    ):
+        placement = found.get(application.get("bits_id")) or {}
+        if (application.get("hostel_status") == "assigned" and application.get("alloted_hostel") != placement.get("hostel_name")) \
+                or (application.get("room_status") == "assigned" and application.get("alloted_room") != placement.get("room_number")):
+            add("applications", {"application_id": str(application["_id"]), "bits_id": application.get("bits_id"),
+                                 "alloted_hostel": application.get("alloted_hostel"),
+                                 "alloted_room": application.get("alloted_room"),
+                                 "placement": [placement.get("hostel_name"), placement.get("room_number")]})
+
+    placed = {}
+    for placement in found.values():
+        if placement.get("room_number"):
+            key = (placement["hostel_name"], placement["room_number"])
+            placed[key] = placed.get(key, 0) + 1
+    if progress:
+        progress("Checking room occupancy")
+    for room in rooms_collection.find({}, {"hostel_name": 1, "room_number": 1, "current_occupancy": 1}):
+        count = placed.get((room["hostel_name"], room["room_number"]), 0)
+        if room.get("current_occupancy", 0) != count:
+            add("occupancy", {"hostel_name": room["hostel_name"], "room_number": room["room_number"],
+                              "current_occupancy": room.get("current_occupancy", 0), "placed": count})
+
+    report["consistent"] = not any(report[kind]["count"] for kind in report)
+    logger.info("Placement check: %s", {kind: value["count"] for kind, value in report.items() if kind != "consistent"})
+    return report
+
+def get_placement(bits_id: str):
+    """Where a student lives and who shares their room, or None if they have no bed."""
+    placement = placements_collection.find_one({"bits_id": bits_id}, {"_id": 0, "updated_at": 0})
+    if placement and placement["room_number"]:
+        placement["roommates"] = [
+            roommate for roommate in get_hostel_roster(placement["hostel_name"], placement["room_number"])
+            if roommate["bits_id"] != bits_id
+        ]
+    return placement
+
+def get_hostel_roster(hostel_name: str, room_number: str = None):
+    """Placed students of a hostel, or of one room, in room order."""
+    query = {"hostel_name": hostel_name}
+    if room_number is not None:
+        query["room_number"] = room_number
+    return list(placements_collection.find(query, ROSTER_PROJECTION).sort(ROSTER_ORDER))
+
+# Waitlist Database Functions
+# A student waits either for a bed in a hostel (room_type None) or, once in a hostel, for a room of a
+# given type there. Each queue is served by priority (highest first), then application date, then
+# arrival. Every queue has a `waitlist_queues` document whose version is bumped whenever the queue
+# changes; transactions that check a queue also write that document, so a bed freed while a student
+# is being waitlisted cannot be missed.
+WAITLIST_ORDER = [("priority", DESCENDING), ("application_date", ASCENDING), ("_id", ASCENDING)]
+
+def _queue_key(hostel_name: str, room_type) -> dict:
+    return {"hostel_name": hostel_name, "room_type": room_type}
+
+def _touch_queue(hostel_name: str, room_type, length_change: int = 0, session=None):
+    update = {"$set": {"touched_at": datetime.utcnow()}}
+    if length_change:
+        update["$inc"] = {"version": 1, "length": length_change}
+    waitlist_queues_collection.update_one(_queue_key(hostel_name, room_type), update, upsert=True, session=session)
+
+def join_waitlist(bits_id: str, hostel_name: str, room_type=None, priority: int = 0, session=None) -> bool:
+    """Add a student to a queue; returns False if they were already in it."""
+    _touch_queue(hostel_name, room_type, session=session)
+    application = applications_collection.find_one({"bits_id": bits_id}, {"application_date": 1}, session=session)
+    application_date = (application or {}).get("application_date") or datetime.now()
+    # Stored as the ISO strings applications use, so entries always compare as one type
+    if isinstance(application_date, datetime):
+        application_date = application_date.isoformat()
+    result = waitlist_collection.update_one(
+        {"bits_id": bits_id, **_queue_key(hostel_name, room_type)},
+        {"$setOnInsert": {"priority": int(priority), "application_date": application_date, "joined_at": datetime.utcnow()}},
+        upsert=True,
+        session=session
+    )
+    if result.upserted_id is None:
+        return False
+    _touch_queue(hostel_name, room_type, 1, session=session)
+    logger.info("Waitlisted %s for %s (room type %s).", bits_id, hostel_name, room_type)
+    return True
+
+def leave_waitlist(bits_id: str, hostel_name: str, room_type=None, session=None) -> bool:
+    result = waitlist_collection.delete_one({"bits_id": bits_id, **_queue_key(hostel_name, room_type)}, session=session)
+    if not result.deleted_count:
+        return False
+    _touch_queue(hostel_name, room_type, -1, session=session)
+    return True
+
+def _waiting_for_hostel(bits_id: str, session=None) -> bool:
+    # A student deleted while waiting is skipped rather than failing the vacate that promotes them
+    return (applications_collection.count_documents({"bits_id": bits_id, "hostel_status": "pending"}, session=session) > 0
+            and users_collection.count_documents({"bits_id": bits_id}, session=session) > 0)
+
+def _waiting_for_room(bits_id: str, hostel_name: str, session=None) -> bool:
+    return users_collection.count_documents(
+        {"bits_id": bits_id, "hostel_name": hostel_name, "room_number": None}, session=session
+    ) > 0
+
+def _pop_waitlist(hostel_name: str, room_type, session=None):
+    """Remove and return the first entry of a queue whose student still needs the bed, or None.
+
+    Students placed by other means (an admin, a bulk allocation run) are dropped when they reach the head.
+    """
+    _touch_queue(hostel_name, room_type, session=session)
+    while True:
+        entry = waitlist_collection.find_one_and_delete(_queue_key(hostel_name, room_type), sort=WAITLIST_ORDER, session=session)
+        if entry is None:
+            return None
+        _touch_queue(hostel_name, room_type, -1, session=session)
+        if room_type is None and _waiting_for_hostel(entry["bits_id"], session):
+            return entry
+        if room_type is not None and _waiting_for_room(entry["bits_id"], hostel_name, session):
+            return entry
+        logger.info("Dropped %s from the %s waitlist; already placed.", entry["bits_id"], hostel_name)
+
+def _fill_from_waitlist(hostel_name: str, room_type=None, room_number: str = None, session=None):
+    """Give a free hostel bed, or a free bed in `room_number`, to the head of its queue; returns its bits_id or None."""
+    entry = _pop_waitlist(hostel_name, room_type, session)
+    if entry is None:
+        return None
+    if room_type is None:
+        reserve_hostel_bed(entry["bits_id"], hostel_name, session)
+    else:
+        reserve_room_bed(entry["bits_id"], room_number, hostel_name, session)
+    logger.info("Promoted %s from the %s waitlist (room type %s).", entry["bits_id"], hostel_name, room_type)
+    return entry["bits_id"]
+
+def assign_hostel_or_waitlist(bits_id: str, hostel_name: str, priority: int = 0) -> dict:
+    """Give a student a bed in a hostel, or queue them for the next one if it is full.
+
+    Returns `{"status": "assigned"}` or `{"status": "waitlisted", "position": n}`.
+    Raises ReservationError if the hostel does not exist, StudentNotFound if the student does not.
+    """
+    def reserve(session):
+        try:
+            reserve_hostel_bed(bits_id, hostel_name, session)
+            return {"status": "assigned"}
+        except StudentNotFound:
+            # Raised after the bed was taken, so the transaction must not go on to commit
+            raise
+        except ReservationError:
+            if hostels_collection.count_documents({"hostel_name": hostel_name}, session=session) == 0:
+                raise
+        join_waitlist(bits_id, hostel_name, None, priority, session)
+        return {"status": "waitlisted"}
+
+    outcome = run_in_transaction(reserve)
+    if outcome["status"] == "assigned":
+        invalidate_hostel_views()
+        bump_versions("hostels", "applications")
+        leave_waitlist(bits_id, hostel_name)
+    else:
+        outcome["position"] = waitlist_position(bits_id, hostel_name)
+    return outcome
+
+def assign_room_or_waitlist(bits_id: str, hostel_name: str, room_type: str, priority: int = 0) -> dict:
+    """Give a student the lowest-numbered free room of `room_type` in their hostel, or queue them for one.
+
+    Returns `{"status": "assigned", "room_number": ...}` or `{"status": "waitlisted", "position": n}`.
+    """
+    def reserve(session):
+        # Written first so a concurrent vacate that finds the queue empty conflicts with this transaction
+        _touch_queue(hostel_name, room_type, session=session)
+        room_number = find_free_room(hostel_name, room_type, session)
+        if room_number is not None:
+            reserve_room_bed(bits_id, room_number, hostel_name, session)
+            return {"status": "assigned", "room_number": room_number}
+        join_waitlist(bits_id, hostel_name, room_type, priority, session)
+        return {"status": "waitlisted"}
+
+    outcome = run_in_transaction(reserve)
+    if outcome["status"] == "assigned":
+        cache.invalidate("available_rooms", hostel_name)
+        bump_versions("rooms", "applications")
+        leave_waitlist(bits_id, hostel_name, room_type)
+    else:
+        outcome["position"] = waitlist_position(bits_id, hostel_name, room_type)
+    return outcome
+
+def vacate_bed(bits_id: str, session=None, hostel_name: str = None):
+    """Release a student's hostel bed and room, then give them to the heads of the matching queues.
+
+    Must run inside run_in_transaction so the release and the promotions commit together.
+    With `hostel_name`, raises ReservationError unless the student lives in that hostel.
+    Returns `{"hostel_name", "room_number", "promoted": [bits_id, ...]}`, or None if the
+    student held no bed.
+    """
+    query = {"bits_id": bits_id, "role": "student", "hostel_name": {"$ne": None}}
+    if hostel_name is not None:
+        query["hostel_name"] = hostel_name
+    user = users_collection.find_one_and_update(query, {"$set": {"hostel_name": None, "room_number": None}}, session=session)
+    if user is None:
+        if hostel_name is not None:
+            raise ReservationError(f"Student {bits_id} has no bed in hostel {hostel_name}.")
+        return None
+    hostel_name, room_number = user["hostel_name"], user.get("room_number")
+    remove_placement(bits_id, session)
+
+    hostels_collection.update_one(
+        {"hostel_name": hostel_name, "current_occupancy": {"$gt": 0}}, {"$inc": {"current_occupancy": -1}}, session=session
+    )
+    release_hostel_bed(hostel_name, session)
+    room = None
+    if room_number:
+        room = rooms_collection.find_one_and_update(
+            {"hostel_name": hostel_name, "room_number": room_number, "current_occupancy": {"$gt": 0}},
+            {"$inc": {"current_occupancy": -1}},
+            return_document=ReturnDocument.AFTER,
+            session=session
+        )
+        if room:
+            release_room_bed(room, session)
+    applications_collection.update_one(
+        {"bits_id": bits_id},
+        {"$set": {"hostel_status": "vacated", "room_status": "vacated", "updated_at": datetime.utcnow()}},
+        session=session
+    )
+
+    # The room goes to a student already in the hostel; the hostel bed to the next one waiting for the hostel
+    promoted = []
+    if room:
+        promoted.append(_fill_from_waitlist(hostel_name, room["type"], room_number, session))
+    promoted.append(_fill_from_waitlist(hostel_name, None, session=session))
+    return {"hostel_name": hostel_name, "room_number": room_number, "promoted": [p for p in promoted if p]}
+
+def vacate_student(bits_id: str, hostel_name: str = None):
+    """Move a student out and promote the waitlisted students their beds go to. Returns None if they held no bed."""
+    outcome = run_in_transaction(lambda session: vacate_bed(bits_id, session, hostel_name))
+    if outcome:
+        invalidate_hostel_views()
+        cache.invalidate("available_rooms", outcome["hostel_name"])
+        bump_versions("hostels", "rooms", "applications")
+        logger.info("Vacated %s from %s; promoted %s.", bits_id, outcome["hostel_name"], outcome["promoted"])
+    return outcome
+
+def promote_waitlist(hostel_name: str) -> list:
+    """Fill every free bed in a hostel from its queues, e.g. after its capacity was raised; returns the promoted bits_ids."""
+    promoted = []
+
+    def promote_room(room_type):
+        def fill(session):
+            room_number = find_free_room(hostel_name, room_type, session)
+            return _fill_from_waitlist(hostel_name, room_type, room_number, session) if room_number else None
+        return fill
+
+    def promote_hostel(session):
+        hostel = hostels_collection.find_one(
+            {"hostel_name": hostel_name, "$expr": {"$lt": ["$current_occupancy", "$capacity"]}}, {"_id": 1}, session=session
+        )
+        return _fill_from_waitlist(hostel_name, session=session) if hostel else None
+
+    fills = [promote_room(queue["room_type"]) for queue in waitlist_queues_collection.find(
+        {"hostel_name": hostel_name, "room_type": {"$ne": None}, "length": {"$gt": 0}}, {"room_type": 1}
+    )]
+    fills.append(promote_hostel)
+    for fill in fills:
+        while True:
+            bits_id = run_in_transaction(fill)
+            if bits_id is None:
+                break
+            promoted.append(bits_id)
+    if promoted:
+        invalidate_hostel_views()
+        cache.invalidate("available_rooms", hostel_name)
+        bump_versions("hostels", "rooms", "applications")
+    return promoted
+
+class WaitlistIndex:
+    """Per-process sorted copy of each queue's order, so a student's position is found by bisection.
+
+    A queue's copy is reloaded only when its version in `waitlist_queues` has moved on,
+    so repeated position lookups against a stable queue cost two indexed reads and an
+    O(log n) search rather than a count over the queue.
+    """
+
+    def __init__(self):
+        self._queues = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def sort_key(entry: dict) -> tuple:
+        return (-entry["priority"], entry["application_date"], entry["_id"])
+
+    def position(self, entry: dict) -> int:
+        key = (entry["hostel_name"], entry["room_type"])
+        queue = waitlist_queues_collection.find_one(_queue_key(*key), {"version": 1})
+        version = queue.get("version", 0) if queue else 0
+        with self._lock:
+            snapshot = self._queues.get(key)
+        if snapshot is None or snapshot[0] != version:
+            # Read after the version, so the copy is at least as new as the version it is stored under
+            keys = [self.sort_key(queued) for queued in waitlist_collection.find(
+                _queue_key(*key), {"priority": 1, "application_date": 1}
+            ).sort(WAITLIST_ORDER)]
+            snapshot = (version, keys)
+            with self._lock:
+                self._queues[key] = snapshot
+        return bisect_left(snapshot[1], self.sort_key(entry)) + 1
+
+waitlist_index = WaitlistIndex()
+
+def waitlist_position(bits_id: str, hostel_name: str, room_type=None):
+    """A student's 1-based place in a queue, or None if they are not in it."""
+    entry = waitlist_collection.find_one({"bits_id": bits_id, **_queue_key(hostel_name, room_type)})
+    return waitlist_index.position(entry) if entry else None
+
+def get_waitlist_positions(bits_id: str) -> list:
+    """Every queue a student is in, with their place in it."""
+    return [
+        {"hostel_name": entry["hostel_name"], "room_type": entry["room_type"], "priority": entry["priority"],
+         "position": waitlist_index.position(entry)}
+        for entry in waitlist_collection.find({"bits_id": bits_id})
+    ]
+
+def get_waitlist(hostel_name: str, room_type=None, limit: int = None):
+    """Return a cursor over a queue in the order it will be served."""
+    cursor = waitlist_collection.find(_queue_key(hostel_name, room_type), {"hostel_name": 0, "room_type": 0}).sort(WAITLIST_ORDER)
+    if limit:
+        cursor = cursor.limit(limit)
+    return cursor
@@ -0,0 +1,204 @@
+"""Streamed CSV and XLSX exports of hostel rosters and applications.
+
+Rows are read from a projected cursor and written to the response a chunk at a time,
+so memory use stays flat however large the export is. An XLSX workbook is a zip of
+XML parts; its sheet is compressed and sent as rows arrive, without a spreadsheet
+library, so downloads start at once in either format.
+
+    GET /hostels/<hostel_name>/students/export?format=xlsx&columns=bits_id,username,room_number
+    GET /applications/export?hostel_status=pending&applied_after=2024-07-01
+"""
+from datetime import datetime
+from xml.sax.saxutils import escape
+import csv
+import io
+import os
+import re
+import zipfile
+from database import applications_collection, placements_collection
+
+# Rows written to the response per chunk, and documents fetched per cursor batch
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "500"))
+EXPORT_BATCH_SIZE = 1000
+
+# kind -> (collection, {column: stored field} in default order, {query parameter: stored field}, sort)
+EXPORTS = {
+    "students": (
+        placements_collection,
+        {"bits_id": "bits_id", "username": "username", "email": "email", "contact_number": "contact_number",
+         "hostel_name": "hostel_name", "room_number": "room_number", "room_type": "room_type"},
+        {"hostel_name": "hostel_name", "room_number": "room_number", "room_type": "room_type"},
+        # The hostel_name_room_number index serves both the filter and the order
+        [("hostel_name", 1), ("room_number", 1), ("bits_id", 1)],
+    ),
+    "applications": (
+        applications_collection,
+        {"application_id": "_id", "bits_id": "bits_id", "hostel_preference": "hostel_preference",
+         "room_type_preference": "room_type_preference", "application_date": "application_date",
+         "hostel_status": "hostel_status", "room_status": "room_status", "alloted_hostel": "alloted_hostel",
+         "alloted_room": "alloted_room", "remarks": "remarks"},
+        {"hostel_status": "hostel_status", "room_status": "room_status", "alloted_hostel": "alloted_hostel",
+         "hostel": "hostel_preference", "room_type": "room_type_preference"},
+        [("_id", 1)],
+    ),
+}
+
+# Characters XML 1.0 does not allow, even escaped
+_INVALID_XML = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+# Cells starting with one of these may be evaluated as a formula; plain signed numbers (phone numbers) are left alone
+_FORMULA_STARTS = frozenset("=@\t\r+-")
+_SIGNED_NUMBER = re.compile(r"[+-]?\d[\d ]*(\.\d+)?")
+
+def select_columns(kind: str, requested: str = None) -> list:
+    """The columns named in a comma-separated `requested` list, or every column of the export."""
+    available = EXPORTS[kind][1]
+    if not requested:
+        return list(available)
+    columns = [column.strip() for column in requested.split(",") if column.strip()]
+    unknown = [column for column in columns if column not in available]
+    if unknown or not columns:
+        raise ValueError(f"Unknown columns {', '.join(unknown)}; choose from {', '.join(available)}")
+    return columns
+
+def export_query(kind: str, args) -> dict:
+    """Build the MongoDB filter from the request's query parameters; unknown parameters are ignored."""
+    filters = EXPORTS[kind][2]
+    query = {field: args[parameter] for parameter, field in filters.items() if args.get(parameter)}
+    if kind == "applications":
+        # application_date is stored as an ISO string, which sorts chronologically
+        dates = {}
+        for parameter, operator in (("applied_after", "$gte"), ("applied_before", "$lt")):
+            if args.get(parameter):
+                dates[operator] = datetime.fromisoformat(args[parameter]).isoformat()
+        if dates:
+            query["application_date"] = dates
+    return query
+
+def _cell(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        return "; ".join(str(item) for item in value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+def export_rows(kind: str, query: dict, columns: list):
+    """Yield each matching document as a list of cell strings, reading only the selected fields."""
+    collection, available, _, sort = EXPORTS[kind]
+    fields = [available[column] for column in columns]
+    projection = {field: 1 for field in fields}
+    if "_id" not in projection:
+        projection["_id"] = 0
+    cursor = collection.find(query, projection).sort(sort).batch_size(EXPORT_BATCH_SIZE)
+    for document in cursor:
+        yield [_cell(document.get(field)) for field in fields]
+
+def _safe(cell: str) -> str:
+    """Keep spreadsheet programs from running user-supplied text (names, remarks) as formulas."""
+    return "'" + cell if cell[:1] in _FORMULA_STARTS and not _SIGNED_NUMBER.fullmatch(cell) else cell
+
+def stream_csv(rows, columns: list):
+    """Yield the CSV text of `rows`, a header line first, EXPORT_CHUNK_ROWS rows per chunk."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for count, row in enumerate(rows, start=1):
+        writer.writerow([_safe(cell) for cell in row])
+        if count % EXPORT_CHUNK_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+class _ChunkSink:
+    """A write-only, unseekable file: zipfile writes to it and the generator drains it."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+_XLSX_PARTS = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+def _xlsx_row(number: int, cells) -> str:
+    # Inline strings avoid a shared-strings table, which would have to be held until the end
+    return f'<row r="{number}">' + "".join(
+        f'<c t="inlineStr"><is><t xml:space="preserve">{escape(_INVALID_XML.sub("", cell))}</t></is></c>'
+        for cell in cells
+    ) + "</row>"
+
+def stream_xlsx(rows, columns: list, sheet_name: str = "Export"):
+    """Yield an XLSX workbook of `rows` with one sheet, compressed as it is written."""
+    sink = _ChunkSink()
+    workbook = zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED)
+    for name, content in _XLSX_PARTS.items():
+        workbook.writestr(name, content)
+    # Sheet names are at most 31 characters and cannot contain []:*?/\
+    sheet_name = escape(re.sub(r"[\[\]:*?/\\]", " ", sheet_name)[:31], {'"': "&quot;"})
+    workbook.writestr("xl/workbook.xml", (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        f'<sheets><sheet name="{sheet_name}" sheetId="1" r:id="rId1"/></sheets></workbook>'
+    ))
+    yield sink.drain()
+
+    with workbook.open("xl/worksheets/sheet1.xml", "w") as sheet:
+        sheet.write(('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                     '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+                     + _xlsx_row(1, columns)).encode())
+        chunk = []
+        for number, row in enumerate(rows, start=2):
+            chunk.append(_xlsx_row(number, row))
+            if len(chunk) == EXPORT_CHUNK_ROWS:
+                sheet.write("".join(chunk).encode())
+                chunk.clear()
+                yield sink.drain()
+        sheet.write(("".join(chunk) + "</sheetData></worksheet>").encode())
+    workbook.close()
+    yield sink.drain()
+
+# format -> (mimetype, file extension, writer)
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv", lambda rows, columns, title: stream_csv(rows, columns)),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx", stream_xlsx),
+}
@@ -0,0 +1,220 @@
+"""Bulk import of hostels, rooms and users from CSV or JSONL files.
+
+    python importer.py rooms campus_rooms.csv [--batch-size 1000]
+
+Rows are streamed, validated against the dataclasses in collections_format.py and
+upserted in unordered bulk_write batches keyed by each record's natural key. A report
+with throughput and per-row errors is printed (CLI) or returned (POST /import/<kind>).
+"""
+import argparse
+import csv
+import json
+import logging
+import os
+import sys
+import time
+import typing
+from dataclasses import MISSING, fields
+from datetime import datetime
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from cache import cache
+from collections_format import User, Room, Hostel
+from credentials import hash_passwords, is_hashed
+from database import (
+    users_collection, rooms_collection, hostels_collection, refresh_vacancies, invalidate_hostel_views, rebuild_placements,
+    bump_versions
+)
+from log_config import configure_logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+# kind -> (model, collection, natural key fields, fields only written when the document is created)
+IMPORTS = {
+    "hostels": (Hostel, hostels_collection, ("hostel_name",), ("current_occupancy", "rooms")),
+    "rooms": (Room, rooms_collection, ("hostel_name", "room_number"), ("current_occupancy", "occupants")),
+    "users": (User, users_collection, ("bits_id",), ("password_hash", "registration_date", "room_number", "hostel_name")),
+}
+
+class RowError(ValueError):
+    """A row that does not match its model."""
+
+def read_rows(stream, file_format: str):
+    """Yield (line_number, row dict) pairs from a text stream of CSV or JSONL records."""
+    if file_format == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            if None in row:
+                yield reader.line_num, RowError("More values than columns")
+                continue
+            # Empty cells are treated as missing values
+            yield reader.line_num, {key: value for key, value in row.items() if value not in ("", None)}
+    elif file_format == "jsonl":
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield line_number, json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_number, RowError(f"Invalid JSON: {e}")
+    else:
+        raise ValueError(f"Unsupported format: {file_format}")
+
+def _coerce(value, field_type):
+    """Convert a raw CSV/JSON value to the dataclass field's type."""
+    if typing.get_origin(field_type) is typing.Union:
+        field_type = next(arg for arg in typing.get_args(field_type) if arg is not type(None))
+    if typing.get_origin(field_type) is list:
+        if isinstance(value, str):
+            # CSV cells hold lists as semicolon-separated values
+            return [item.strip() for item in value.split(";") if item.strip()]
+        if not isinstance(value, list):
+            raise ValueError("expected a list")
+        return [str(item) for item in value]
+    if field_type is int:
+        return int(value)
+    if field_type is datetime:
+        return value if isinstance(value, datetime) else datetime.fromisoformat(value)
+    return str(value)
+
+def validate_row(model, row: dict):
+    """Build a `model` instance from a row, raising RowError if it does not fit."""
+    if not isinstance(row, dict):
+        raise RowError("Expected an object")
+    model_fields = {field.name: field for field in fields(model)}
+    unknown = set(row) - set(model_fields)
+    if unknown:
+        raise RowError(f"Unknown columns: {', '.join(sorted(unknown))}")
+
+    type_hints = typing.get_type_hints(model)
+    values = {}
+    for name, field in model_fields.items():
+        if name not in row or row[name] is None:
+            if field.default is MISSING and field.default_factory is MISSING:
+                raise RowError(f"Missing required field '{name}'")
+            continue
+        try:
+            values[name] = _coerce(row[name], type_hints[name])
+        except (TypeError, ValueError) as e:
+            raise RowError(f"Invalid value for '{name}': {row[name]!r} ({e})")
+    return model(**values)
+
+def _upsert(key_fields, insert_only_fields, document: dict, provided: set):
+    """Upsert by natural key, overwriting only the columns the row provided.
+
+    Defaults for missing columns and the `insert_only_fields` (occupancy, passwords,
+    allocations) are written only when the document is created, so re-importing an
+    inventory never resets live state such as occupancy or warden assignments.
+    """
+    key = {field: document[field] for field in key_fields}
+    updated = {name: value for name, value in document.items() if name in provided and name not in insert_only_fields}
+    update = {"$set": updated}
+    insert_only = {name: value for name, value in document.items() if name not in updated}
+    if insert_only:
+        update["$setOnInsert"] = insert_only
+    return UpdateOne(key, update, upsert=True)
+
+def _hash_plaintext_passwords(documents):
+    """Hash roster passwords given in plaintext, in parallel, before they are written."""
+    pending = [document for document in documents if not is_hashed(document["password_hash"])]
+    for document, password_hash in zip(pending, hash_passwords([document["password_hash"] for document in pending])):
+        document["password_hash"] = password_hash
+
+def import_records(kind: str, stream, file_format: str, batch_size: int = DEFAULT_BATCH_SIZE, progress=None) -> dict:
+    """Validate and upsert every record of `kind` from `stream`, returning a report.
+
+    `progress(rows)` is called after each batch is written.
+    """
+    model, collection, key_fields, insert_only_fields = IMPORTS[kind]
+    report = {"kind": kind, "rows": 0, "upserted": 0, "modified": 0, "matched": 0, "error_count": 0, "errors": []}
+    started = time.perf_counter()
+    hostel_names = set()
+    user_bits_ids = set()
+
+    def add_error(line_number, message):
+        report["error_count"] += 1
+        if len(report["errors"]) < MAX_REPORTED_ERRORS:
+            report["errors"].append({"line": line_number, "error": message})
+
+    def flush(batch):
+        line_numbers = [line_number for line_number, _, _ in batch]
+        if kind == "users":
+            _hash_plaintext_passwords([document for _, document, _ in batch])
+        operations = [_upsert(key_fields, insert_only_fields, document, provided) for _, document, provided in batch]
+        try:
+            result = collection.bulk_write(operations, ordered=False).bulk_api_result
+        except BulkWriteError as e:
+            result = e.details
+            for write_error in result["writeErrors"]:
+                add_error(line_numbers[write_error["index"]], write_error["errmsg"])
+        report["upserted"] += result["nUpserted"]
+        report["modified"] += result["nModified"]
+        report["matched"] += result["nMatched"]
+        if progress:
+            progress(report["rows"])
+
+    batch = []
+    for line_number, row in read_rows(stream, file_format):
+        report["rows"] += 1
+        try:
+            if isinstance(row, RowError):
+                raise row
+            document = validate_row(model, row).to_doc()
+        except RowError as e:
+            add_error(line_number, str(e))
+            continue
+
+        if "hostel_name" in document:
+            hostel_names.add(document["hostel_name"])
+        if kind == "users" and document.get("bits_id"):
+            user_bits_ids.add(document["bits_id"])
+        batch.append((line_number, document, set(row)))
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+
+    if kind in ("hostels", "rooms") and hostel_names:
+        refresh_vacancies(hostel_names)
+        invalidate_hostel_views()
+        cache.invalidate("available_rooms")
+        bump_versions("hostels", "rooms")
+    if user_bits_ids:
+        # Imported rows may place, move or unplace a student, so every one of them gets its placement rebuilt
+        rebuild_placements(user_bits_ids)
+
+    elapsed = time.perf_counter() - started
+    report["elapsed_s"] = round(elapsed, 3)
+    report["rows_per_s"] = round(report["rows"] / elapsed, 1) if elapsed else None
+    logger.info("Imported %s: %s rows, %s inserted, %s updated, %s errors in %ss", kind, report["rows"],
+                report["upserted"], report["modified"], report["error_count"], report["elapsed_s"])
+    return report
+
+def detect_format(filename: str, default: str = "csv") -> str:
+    extension = os.path.splitext(filename or "")[1].lower()
+    return {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl"}.get(extension, default)
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import hostels, rooms or users from CSV or JSONL.")
+    parser.add_argument("kind", choices=sorted(IMPORTS))
+    parser.add_argument("path", help="file to import, or - for stdin")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="defaults to the file extension")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+    configure_logging()
+
+    file_format = args.format or detect_format(args.path)
+    if args.path == "-":
+        report = import_records(args.kind, sys.stdin, file_format, args.batch_size)
+    else:
+        with open(args.path, newline="", encoding="utf-8") as stream:
+            report = import_records(args.kind, stream, file_format, args.batch_size)
+    print(json.dumps(report, indent=2))
+    return 1 if report["error_count"] else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,118 @@
+import logging
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+from database import (
+    users_collection, rooms_collection, allotments_collection, hostels_collection, applications_collection,
+    vacancies_collection, revoked_tokens_collection, jobs_collection, waitlist_collection, waitlist_queues_collection,
+    placements_collection
+)
+
+logger = logging.getLogger(__name__)
+
+# Index options that change what an index accepts; an existing index that differs in any is rebuilt
+INDEX_OPTIONS = ("unique", "sparse", "partialFilterExpression", "expireAfterSeconds")
+
+# Indexes backing the query shapes issued in database.py, keyed by collection
+INDEXES = [
+    (users_collection, [
+        # authenticate_user, find_user, assign_warden_to_hostel
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        # every {"bits_id": ...} user update; partial so accounts with an empty or null BITS ID don't
+        # collide, which a sparse index would still allow
+        IndexModel([("bits_id", ASCENDING)], name="bits_id_unique", unique=True,
+                   partialFilterExpression={"bits_id": {"$type": "string", "$gt": ""}}),
+        # get_students_by_hostel, fetch_all_wardens, wardens_to_assign
+        IndexModel([("role", ASCENDING), ("hostel_name", ASCENDING)], name="role_hostel_name"),
+    ]),
+    (rooms_collection, [
+        # add_rooms, assign_room_to_student, find_available_rooms
+        IndexModel([("hostel_name", ASCENDING), ("room_number", ASCENDING)], name="hostel_name_room_number", unique=True),
+    ]),
+    (hostels_collection, [
+        # assign_hostel_to_student, assign_warden_to_hostel, add_hostels
+        IndexModel([("hostel_name", ASCENDING)], name="hostel_name_unique", unique=True),
+    ]),
+    (applications_collection, [
+        # every {"bits_id": ...} application update
+        IndexModel([("bits_id", ASCENDING)], name="bits_id"),
+        # get_pending_applications_admin, get_closed_applications_admin
+        IndexModel([("hostel_status", ASCENDING), ("alloted_hostel", ASCENDING)], name="hostel_status_alloted_hostel"),
+        # get_pending_applications_warden, get_closed_applications_warden
+        IndexModel([("alloted_hostel", ASCENDING), ("room_status", ASCENDING), ("hostel_status", ASCENDING)],
+                   name="alloted_hostel_room_status"),
+        # live_updates polling fallback
+        IndexModel([("updated_at", ASCENDING)], name="updated_at"),
+    ]),
+    (vacancies_collection, [
+        # take_hostel_bed, take_room_bed, find_free_room, find_available_rooms
+        IndexModel([("hostel_name", ASCENDING), ("room_type", ASCENDING)], name="hostel_name_room_type", unique=True),
+        # get_available_hostels
+        IndexModel([("room_type", ASCENDING), ("free_beds", ASCENDING)], name="room_type_free_beds"),
+    ]),
+    (revoked_tokens_collection, [
+        # sessions._sync_revocations
+        IndexModel([("revoked_at", ASCENDING)], name="revoked_at"),
+        # drops revocations once the sessions they cover have expired anyway
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ]),
+    (jobs_collection, [
+        # jobs.claim_job, jobs.requeue_stale_jobs
+        IndexModel([("status", ASCENDING), ("created_at", ASCENDING)], name="status_created_at"),
+        # jobs.enqueue; sparse so jobs without a key don't collide
+        IndexModel([("idempotency_key", ASCENDING)], name="idempotency_key_unique", unique=True, sparse=True),
+        # finished jobs are kept for a week
+        IndexModel([("finished_at", ASCENDING)], name="finished_at_ttl", expireAfterSeconds=7 * 24 * 3600),
+    ]),
+    (waitlist_collection, [
+        # _pop_waitlist, get_waitlist, WaitlistIndex: a queue in serving order
+        IndexModel([("hostel_name", ASCENDING), ("room_type", ASCENDING), ("priority", DESCENDING),
+                    ("application_date", ASCENDING), ("_id", ASCENDING)], name="queue_order"),
+        # join_waitlist, leave_waitlist, get_waitlist_positions; one entry per student per queue
+        IndexModel([("bits_id", ASCENDING), ("hostel_name", ASCENDING), ("room_type", ASCENDING)],
+                   name="bits_id_queue_unique", unique=True),
+    ]),
+    (waitlist_queues_collection, [
+        # _touch_queue upserts, WaitlistIndex version checks
+        IndexModel([("hostel_name", ASCENDING), ("room_type", ASCENDING)], name="hostel_name_room_type", unique=True),
+    ]),
+    (placements_collection, [
+        # save_placement, remove_placement, get_placement, rebuild_placements
+        IndexModel([("bits_id", ASCENDING)], name="bits_id_unique", unique=True),
+        # get_hostel_roster, roommates in get_placement; the sort is served by the index
+        IndexModel([("hostel_name", ASCENDING), ("room_number", ASCENDING), ("bits_id", ASCENDING)],
+                   name="hostel_name_room_number"),
+    ]),
+    (allotments_collection, [
+        # list_allotments_by_user
+        IndexModel([("user_id", ASCENDING)], name="user_id"),
+    ]),
+]
+
+def ensure_indexes():
+    """Create any declared index that does not exist yet and return the names of those built.
+
+    Safe to run on every startup: existing indexes are skipped by name, unless their
+    INDEX_OPTIONS no longer match the declaration, in which case they are dropped and
+    rebuilt. An index that cannot be built (e.g. duplicate emails already stored) is
+    logged and skipped so the remaining indexes are still created.
+    """
+    built = []
+    for collection, models in INDEXES:
+        existing = collection.index_information()
+        for model in models:
+            name = model.document["name"]
+            if name in existing:
+                if all(existing[name].get(option) == model.document.get(option) for option in INDEX_OPTIONS):
+                    continue
+                logger.warning("Index '%s' on '%s' has outdated options; rebuilding it.", name, collection.name)
+                collection.drop_index(name)
+            try:
+                collection.create_indexes([model])
+                built.append(f"{collection.name}.{name}")
+                logger.info("Created index '%s' on '%s'.", name, collection.name)
+            except OperationFailure as e:
+                logger.error("Failed to create index '%s' on '%s': %s", name, collection.name, e)
+
+    if not built:
+        logger.info("All indexes already exist.")
+    return built
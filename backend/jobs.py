@@ -0,0 +1,302 @@
+"""Background jobs for admin operations that outlast a request (allocation, imports, reconciliation).
+
+Jobs are documents in the `jobs` collection. The API enqueues them and returns at once;
+worker processes claim them one at a time with an atomic update and run them:
+
+    python jobs.py [--concurrency 2]
+
+A running job's worker heartbeats every JOB_HEARTBEAT seconds. A job whose heartbeat
+is older than JOB_STALE_AFTER (its worker died) is queued again, up to JOB_MAX_ATTEMPTS
+runs, so handlers must be safe to re-run; the built-in ones are. Cancelling a running
+job is cooperative: it stops at the handler's next progress report. The allocation,
+reconcile and placement jobs report between reading and writing, so a cancelled one
+writes nothing; an import keeps the batches it already wrote.
+
+New job types are registered with `@job_type("name")`; the handler is called with the
+job's params and a `progress(done, total=None, message=None)` callback and returns a
+JSON-serializable result.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import argparse
+import io
+import logging
+import os
+import socket
+import threading
+import time
+import gridfs
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from allocation import run_allocation
+from database import (
+    db, jobs_collection, find_page, reconcile_occupancy, refresh_vacancies, rebuild_placements, check_placements,
+    bump_versions
+)
+from importer import import_records
+from log_config import configure_logging
+
+logger = logging.getLogger(__name__)
+
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1"))
+JOB_HEARTBEAT = float(os.getenv("JOB_HEARTBEAT", "10"))
+JOB_STALE_AFTER = float(os.getenv("JOB_STALE_AFTER", "60"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+# Progress is written at most this often, however frequently a handler reports it
+PROGRESS_INTERVAL = 1.0
+
+QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED = "queued", "running", "succeeded", "failed", "cancelled"
+
+# Uploaded files waiting to be imported by a job
+uploads = gridfs.GridFS(db, collection="job_uploads")
+
+JOB_TYPES = {}
+
+class JobCancelled(Exception):
+    """Raised from `progress()` to stop a handler whose job was cancelled."""
+
+def job_type(name: str):
+    """Register a function as the handler for jobs of type `name`."""
+    def register(handler):
+        JOB_TYPES[name] = handler
+        return handler
+    return register
+
+# Job Queue Functions
+def enqueue(kind: str, params: dict = None, idempotency_key: str = None) -> dict:
+    """Queue a job and return its document.
+
+    With an `idempotency_key`, enqueueing again returns the job already created for
+    that key instead of queueing a duplicate.
+    """
+    if kind not in JOB_TYPES:
+        raise ValueError(f"Unknown job type '{kind}'")
+    job = {
+        "type": kind,
+        "params": params or {},
+        "status": QUEUED,
+        "progress": None,
+        "result": None,
+        "error": None,
+        "attempts": 0,
+        "cancel_requested": False,
+        "created_at": datetime.utcnow(),
+    }
+    if idempotency_key is None:
+        job["_id"] = jobs_collection.insert_one(job).inserted_id
+        logger.info("Queued %s job %s.", kind, job['_id'])
+        return job
+
+    job["idempotency_key"] = idempotency_key
+    try:
+        job = jobs_collection.find_one_and_update(
+            {"idempotency_key": idempotency_key},
+            {"$setOnInsert": job},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+    except DuplicateKeyError:
+        # A concurrent request with the same key won the upsert
+        job = jobs_collection.find_one({"idempotency_key": idempotency_key})
+    logger.info("Queued %s job %s (idempotency key %s).", kind, job['_id'], idempotency_key)
+    return job
+
+def stage_upload(stream, filename: str) -> str:
+    """Store an uploaded file for a job to read later; returns its id for the job's params."""
+    return str(uploads.put(stream, filename=filename))
+
+def _release_upload(job: dict):
+    file_id = job["params"].get("file_id")
+    if file_id:
+        uploads.delete(ObjectId(file_id))
+
+def get_job(job_id) -> dict:
+    return jobs_collection.find_one({"_id": job_id})
+
+def list_jobs(limit: int = None, after=None):
+    """Return a cursor over jobs, oldest first, without their results."""
+    return find_page(jobs_collection, {}, {"result": 0}, limit, after)
+
+def cancel_job(job_id) -> dict:
+    """Cancel a queued job at once, or ask a running one to stop. Returns the job, or None."""
+    job = jobs_collection.find_one_and_update(
+        {"_id": job_id, "status": QUEUED},
+        {"$set": {"status": CANCELLED, "cancel_requested": True, "finished_at": datetime.utcnow()}},
+        return_document=ReturnDocument.AFTER
+    )
+    if job:
+        _release_upload(job)
+        logger.info("Cancelled queued job %s.", job_id)
+        return job
+    job = jobs_collection.find_one_and_update(
+        {"_id": job_id, "status": RUNNING},
+        {"$set": {"cancel_requested": True}},
+        return_document=ReturnDocument.AFTER
+    )
+    if job:
+        logger.info("Requested cancellation of running job %s.", job_id)
+        return job
+    return get_job(job_id)
+
+# Worker Functions
+def claim_job(worker_id: str):
+    """Atomically take the oldest queued job, or return None."""
+    now = datetime.utcnow()
+    return jobs_collection.find_one_and_update(
+        {"status": QUEUED},
+        {"$set": {"status": RUNNING, "worker": worker_id, "started_at": now, "heartbeat_at": now},
+         "$inc": {"attempts": 1}},
+        sort=[("created_at", 1)],
+        return_document=ReturnDocument.AFTER
+    )
+
+def requeue_stale_jobs() -> int:
+    """Put back jobs whose worker stopped heartbeating; fail those out of attempts."""
+    stale = {"status": RUNNING, "heartbeat_at": {"$lt": datetime.utcnow() - timedelta(seconds=JOB_STALE_AFTER)}}
+    requeued = jobs_collection.update_many(
+        {**stale, "attempts": {"$lt": JOB_MAX_ATTEMPTS}, "cancel_requested": False},
+        {"$set": {"status": QUEUED}, "$unset": {"worker": ""}}
+    ).modified_count
+    for job in jobs_collection.find(stale):
+        _finish(job, CANCELLED if job["cancel_requested"] else FAILED, error="Worker stopped responding")
+    if requeued:
+        logger.warning("Requeued %s jobs whose worker stopped responding.", requeued)
+    return requeued
+
+def _finish(job: dict, status: str, result=None, error: str = None):
+    finished = jobs_collection.update_one(
+        {"_id": job["_id"], "status": RUNNING, "attempts": job["attempts"]},
+        {"$set": {"status": status, "result": result, "error": error, "finished_at": datetime.utcnow()}}
+    )
+    if finished.modified_count:
+        _release_upload(job)
+        logger.info("Job %s (%s) %s.", job['_id'], job['type'], status)
+
+def run_job(job: dict):
+    """Run a claimed job's handler, heartbeating and watching for cancellation meanwhile."""
+    stopped = threading.Event()
+    cancelled = threading.Event()
+    last_report = 0.0
+
+    def heartbeat():
+        while not stopped.wait(JOB_HEARTBEAT):
+            try:
+                current = jobs_collection.find_one_and_update(
+                    {"_id": job["_id"], "status": RUNNING, "attempts": job["attempts"]},
+                    {"$set": {"heartbeat_at": datetime.utcnow()}},
+                    {"cancel_requested": 1}
+                )
+            except Exception as e:
+                logger.error("Heartbeat for job %s failed: %s", job['_id'], e)
+                continue
+            # Missing means the job was taken back as stale; stop rather than run it twice
+            if current is None or current["cancel_requested"]:
+                cancelled.set()
+
+    def progress(done: int, total: int = None, message: str = None):
+        nonlocal last_report
+        if cancelled.is_set():
+            raise JobCancelled()
+        now = time.monotonic()
+        if now - last_report >= PROGRESS_INTERVAL or (total is not None and done >= total):
+            last_report = now
+            jobs_collection.update_one(
+                {"_id": job["_id"]},
+                {"$set": {"progress": {"done": done, "total": total, "message": message}}}
+            )
+
+    heartbeat_thread = threading.Thread(target=heartbeat, name=f"job-heartbeat-{job['_id']}", daemon=True)
+    heartbeat_thread.start()
+    started = time.perf_counter()
+    try:
+        result = JOB_TYPES[job["type"]](job["params"], progress)
+        _finish(job, SUCCEEDED, result=result)
+    except JobCancelled:
+        _finish(job, CANCELLED)
+    except Exception as e:
+        logger.error("Job %s (%s) failed", job['_id'], job['type'], exc_info=True)
+        _finish(job, FAILED, error=str(e))
+    finally:
+        stopped.set()
+        heartbeat_thread.join()
+        logger.info("Job %s ran for %.1fs.", job['_id'], time.perf_counter() - started)
+
+def work(concurrency: int = 1):
+    """Claim and run jobs until interrupted, `concurrency` at a time."""
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    slots = threading.BoundedSemaphore(concurrency)
+    last_stale_check = 0.0
+    logger.info("Job worker %s started with %s slots.", worker_id, concurrency)
+
+    def run_and_release(job):
+        try:
+            run_job(job)
+        finally:
+            slots.release()
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="job") as executor:
+        while True:
+            if time.monotonic() - last_stale_check >= JOB_STALE_AFTER / 2:
+                last_stale_check = time.monotonic()
+                requeue_stale_jobs()
+            slots.acquire()
+            job = claim_job(worker_id)
+            if job is None:
+                slots.release()
+                time.sleep(JOB_POLL_INTERVAL)
+                continue
+            logger.info("Worker %s claimed job %s (%s).", worker_id, job['_id'], job['type'])
+            executor.submit(run_and_release, job)
+
+# Job Types
+@job_type("allocation")
+def allocation_job(params: dict, progress):
+    progress(0, 2, "Allocating pending applications")
+    return run_allocation(assign_rooms=params.get("assign_rooms", True), dry_run=params.get("dry_run", False),
+                          progress=lambda message: progress(1, 2, message))
+
+@job_type("reconcile")
+def reconcile_job(params: dict, progress):
+    progress(0, 2, "Recounting occupancy")
+    return reconcile_occupancy(progress=lambda message: progress(1, 2, message))
+
+@job_type("refresh_vacancies")
+def refresh_vacancies_job(params: dict, progress):
+    progress(0, message="Rebuilding the vacancy index")
+    refresh_vacancies(params.get("hostel_names"))
+    bump_versions("hostels")
+    return {"hostel_names": params.get("hostel_names")}
+
+@job_type("rebuild_placements")
+def rebuild_placements_job(params: dict, progress):
+    progress(0, 2, "Rebuilding placements from student records")
+    return rebuild_placements(params.get("bits_ids"), progress=lambda message: progress(1, 2, message))
+
+@job_type("check_placements")
+def check_placements_job(params: dict, progress):
+    steps = iter(range(1, 4))
+    progress(0, 4, "Checking placements against students, applications and rooms")
+    return check_placements(progress=lambda message: progress(next(steps), 4, message))
+
+@job_type("import")
+def import_job(params: dict, progress):
+    """Import an uploaded file staged with stage_upload. Cancelling stops between batches,
+    keeping the batches already written (re-importing the file is safe)."""
+    upload = uploads.get(ObjectId(params["file_id"]))
+    stream = io.TextIOWrapper(upload, encoding="utf-8", newline="")
+    return import_records(params["kind"], stream, params["format"],
+                          progress=lambda rows: progress(rows, message=f"{rows} rows read"))
+
+def main():
+    parser = argparse.ArgumentParser(description="Run background jobs queued by the API.")
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("JOB_CONCURRENCY", "1")))
+    args = parser.parse_args()
+    configure_logging()
+    try:
+        work(args.concurrency)
+    except KeyboardInterrupt:
+        logger.info("Job worker stopped.")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,35 @@
+from dataclasses import fields, is_dataclass
+from datetime import date, datetime
+import time
+from bson import ObjectId
+from flask.json.provider import DefaultJSONProvider
+from collections_format import Model
+from metrics import add_serialization_time
+
+class MongoJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that encodes Mongo documents and model dataclasses as they are serialized.
+
+    ObjectIds become strings, datetimes ISO 8601 strings (matching `Model.to_doc` in
+    collections_format.py) and models are expanded one level at a time without their
+    private fields, so responses need no pre-converted copy of the data.
+    """
+    sort_keys = False
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, ObjectId):
+            return str(o)
+        if isinstance(o, (datetime, date)):
+            return o.isoformat()
+        if isinstance(o, Model):
+            return o.to_doc(include_private=False)
+        if is_dataclass(o) and not isinstance(o, type):
+            return {field.name: getattr(o, field.name) for field in fields(o)}
+        return DefaultJSONProvider.default(o)
+
+    def dumps(self, obj, **kwargs):
+        started = time.perf_counter()
+        try:
+            return super().dumps(obj, **kwargs)
+        finally:
+            add_serialization_time(time.perf_counter() - started)
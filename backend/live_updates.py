@@ -0,0 +1,208 @@
+"""Live deltas for the pending request queues, pushed to the dashboards over Server-Sent Events.
+
+Each worker runs one background thread, started by the first subscriber and stopped
+after the last one leaves, that follows `applications` with a change stream. On a
+standalone mongod, where change streams are not available, it polls the `updated_at`
+field every LIVE_POLL_INTERVAL seconds instead. Every inserted or changed application
+is fanned out to the subscribers whose queue it belongs to: all of them for the admin
+queue, only the warden's own hostel for a warden queue.
+"""
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+import asyncio
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from pymongo.errors import OperationFailure, PyMongoError
+from database import APPLICATION_LIST_FIELDS, applications_collection
+from json_provider import MongoJSONProvider
+
+logger = logging.getLogger(__name__)
+
+LIVE_POLL_INTERVAL = float(os.getenv("LIVE_POLL_INTERVAL", "1"))
+# Events buffered per subscriber before it is told to reload its list instead
+SUBSCRIBER_BUFFER = int(os.getenv("LIVE_SUBSCRIBER_BUFFER", "256"))
+# Idle streams send a comment this often so proxies keep them open and dead clients are noticed
+HEARTBEAT_INTERVAL = float(os.getenv("LIVE_HEARTBEAT_INTERVAL", "15"))
+# Re-read changes this far behind the newest one seen, to tolerate clock skew between workers
+POLL_OVERLAP = timedelta(seconds=10)
+
+# "The $changeStream stage is only supported on replica sets"
+CHANGE_STREAMS_UNSUPPORTED = 40573
+
+class Subscription:
+    """One dashboard listening to the admin queue (`hostel_name=None`) or a warden's queue."""
+
+    def __init__(self, hostel_name: Optional[str], deliver: Callable[[dict], None]):
+        self.hostel_name = hostel_name
+        self.deliver = deliver
+
+    def event_for(self, application: dict) -> Optional[dict]:
+        """The delta to send for a changed application, or None if it is not in this queue."""
+        if self.hostel_name is None:
+            pending = application.get("hostel_status") == "pending"
+        elif application.get("alloted_hostel") == self.hostel_name:
+            pending = application.get("room_status") == "pending" and application.get("hostel_status") == "assigned"
+        else:
+            return None
+        return {"application": application, "pending": pending}
+
+class ApplicationFeed:
+    def __init__(self, collection):
+        self.collection = collection
+        self._subscriptions = set()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._change_streams = True
+
+    def subscribe(self, hostel_name: Optional[str], deliver: Callable[[dict], None]) -> Subscription:
+        """Start calling `deliver(event)` for changes to a queue; `deliver` must not block."""
+        subscription = Subscription(hostel_name, deliver)
+        with self._lock:
+            self._subscriptions.add(subscription)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="application-feed", daemon=True)
+                self._thread.start()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def __len__(self):
+        return len(self._subscriptions)
+
+    def _publish(self, application: dict):
+        for subscription in list(self._subscriptions):
+            event = subscription.event_for(application)
+            if event is None:
+                continue
+            try:
+                subscription.deliver(event)
+            except Exception as e:
+                # e.g. the event loop of a closed ASGI stream; drop the subscriber, not the feed
+                logger.warning("Dropping a live update subscriber that failed to accept an event: %s", e)
+                self.unsubscribe(subscription)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._subscriptions:
+                    self._thread = None
+                    return
+            try:
+                if self._change_streams:
+                    self._watch()
+                else:
+                    self._poll()
+            except OperationFailure as e:
+                if e.code == CHANGE_STREAMS_UNSUPPORTED:
+                    logger.info("Change streams are not supported by this server; polling applications.updated_at instead.")
+                    self._change_streams = False
+                else:
+                    logger.error("Application feed failed, restarting: %s", e)
+                    time.sleep(1)
+            except PyMongoError as e:
+                logger.error("Application feed lost its connection, restarting: %s", e)
+                time.sleep(1)
+            except Exception:
+                logger.error("Application feed crashed, restarting", exc_info=True)
+                time.sleep(1)
+
+    def _watch(self):
+        pipeline = [{"$match": {"operationType": {"$in": ["insert", "update", "replace"]}}}]
+        with self.collection.watch(pipeline, full_document="updateLookup", max_await_time_ms=1000) as stream:
+            while self._subscriptions:
+                change = stream.try_next()
+                # The full document is missing if the application was deleted after the change
+                if change is None or change.get("fullDocument") is None:
+                    continue
+                document = change["fullDocument"]
+                self._publish({"_id": document["_id"], **{field: document.get(field) for field in APPLICATION_LIST_FIELDS}})
+
+    def _poll(self):
+        watermark = datetime.utcnow()
+        sent = {}  # _id -> updated_at of the version already published
+        projection = {**APPLICATION_LIST_FIELDS, "updated_at": 1}
+        while self._subscriptions:
+            since = watermark - POLL_OVERLAP
+            for document in self.collection.find({"updated_at": {"$gte": since}}, projection).sort("updated_at", 1):
+                updated_at = document.pop("updated_at")
+                watermark = max(watermark, updated_at)
+                if sent.get(document["_id"]) != updated_at:
+                    sent[document["_id"]] = updated_at
+                    self._publish(document)
+            for application_id in [key for key, updated_at in sent.items() if updated_at < since]:
+                del sent[application_id]
+            time.sleep(LIVE_POLL_INTERVAL)
+
+application_feed = ApplicationFeed(applications_collection)
+
+# Server-Sent Events
+def sse(data: dict, event: str = None) -> str:
+    """Format one Server-Sent Event."""
+    message = f"event: {event}\n" if event else ""
+    return message + f"data: {json.dumps(data, default=MongoJSONProvider.default)}\n\n"
+
+def stream_queue(hostel_name: Optional[str]):
+    """Yield SSE messages for a queue; used by the Flask routes, one request thread per stream.
+
+    A `ready` event is sent once the subscription is registered. A subscriber that falls
+    more than SUBSCRIBER_BUFFER events behind gets a `resync` event and should reload its list.
+    """
+    events = queue.Queue(SUBSCRIBER_BUFFER)
+    lagging = threading.Event()
+
+    def deliver(event):
+        try:
+            events.put_nowait(event)
+        except queue.Full:
+            lagging.set()
+
+    subscription = application_feed.subscribe(hostel_name, deliver)
+    try:
+        yield sse({}, "ready")
+        while True:
+            if lagging.is_set():
+                while not events.empty():
+                    events.get_nowait()
+                lagging.clear()
+                yield sse({}, "resync")
+            try:
+                yield sse(events.get(timeout=HEARTBEAT_INTERVAL))
+            except queue.Empty:
+                yield ": keepalive\n\n"
+    finally:
+        application_feed.unsubscribe(subscription)
+
+async def stream_queue_async(hostel_name: Optional[str]):
+    """Async version of stream_queue for the ASGI app, which holds no thread per stream."""
+    loop = asyncio.get_running_loop()
+    events = asyncio.Queue(SUBSCRIBER_BUFFER)
+    lagging = False
+
+    def put(event):
+        nonlocal lagging
+        try:
+            events.put_nowait(event)
+        except asyncio.QueueFull:
+            lagging = True
+
+    subscription = application_feed.subscribe(hostel_name, lambda event: loop.call_soon_threadsafe(put, event))
+    try:
+        yield sse({}, "ready")
+        while True:
+            if lagging:
+                while not events.empty():
+                    events.get_nowait()
+                lagging = False
+                yield sse({}, "resync")
+            try:
+                yield sse(await asyncio.wait_for(events.get(), HEARTBEAT_INTERVAL))
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+    finally:
+        application_feed.unsubscribe(subscription)
@@ -0,0 +1,94 @@
+"""Logging setup for the API, the ASGI app and the job worker.
+
+`configure_logging()` puts a queue in front of the root logger: request threads only
+append records to it, and one background thread formats them and writes them to
+stderr. Records below LOG_LEVEL are dropped before anything is formatted, so pass
+values as arguments (`logger.info("Assigned %s", bits_id)`) instead of building the
+message with an f-string; they are only interpolated on the logging thread, which
+also means arguments should not be mutated after they are logged.
+
+    LOG_LEVEL   DEBUG, INFO (default), WARNING, ...
+    LOG_FORMAT  json (default): one JSON object per line, with any `extra` fields
+                text: `time - LEVEL - logger - message` lines for local development
+"""
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+import atexit
+import json
+import logging
+import os
+import queue
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+
+# Attributes every LogRecord has; anything else was passed with `extra=`
+STANDARD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+
+_listener = None
+
+def extra_fields(record: logging.LogRecord) -> dict:
+    return {key: value for key, value in vars(record).items() if key not in STANDARD_ATTRIBUTES}
+
+class JsonFormatter(logging.Formatter):
+    """Format a record as one line of JSON."""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            **extra_fields(record),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str)
+
+class TextFormatter(logging.Formatter):
+    """The previous human-readable format, with any `extra` fields appended as key=value."""
+
+    def __init__(self):
+        super().__init__("%(asctime)s - %(levelname)s - %(name)s - %(message)s")
+
+    def formatMessage(self, record):
+        message = super().formatMessage(record)
+        extras = extra_fields(record)
+        if extras:
+            message += " " + " ".join(f"{key}={json.dumps(value, default=str)}" for key, value in extras.items())
+        return message
+
+class DeferredQueueHandler(QueueHandler):
+    """Queue records unformatted; the listener thread in this process formats them.
+
+    The stock QueueHandler renders the message in the calling thread so records can be
+    pickled to another process, which is exactly the cost this handler is meant to move.
+    """
+
+    def prepare(self, record):
+        return record
+
+def configure_logging(level: str = None, fmt: str = None, stream=None) -> QueueListener:
+    """Route the root logger through a queue to a background writer; safe to call more than once."""
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    output = logging.StreamHandler(stream)
+    output.setFormatter(TextFormatter() if (fmt or LOG_FORMAT) == "text" else JsonFormatter())
+    records = queue.SimpleQueue()
+    _listener = QueueListener(records, output)
+    _listener.start()
+    # Flush what is still queued when the process exits
+    atexit.register(_listener.stop)
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(DeferredQueueHandler(records))
+    root.setLevel(level or LOG_LEVEL)
+    # The driver logs every server heartbeat at DEBUG
+    logging.getLogger("pymongo").setLevel(logging.WARNING)
+    return _listener
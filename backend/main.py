@@ -1,6 +1,7 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify, make_response, stream_with_context
 from flask_cors import CORS 
 from bson import ObjectId
+from bson.errors import InvalidId
 from database import (
     register_user, authenticate_user, find_user, update_user_details, delete_user,
     add_rooms, list_all_rooms, check_room_availability, get_room, update_room, delete_room,
@@ -9,45 +10,226 @@ from database import (
     update_application_status, get_application, delete_application,
     find_available_rooms, fetch_all_wardens, assign_warden_to_hostel, remove_warden_from_hostel, create_application,
     get_pending_applications_admin, get_closed_applications_admin, get_available_hostels, assign_hostel_to_student, get_students_by_hostel,
-    get_closed_applications_warden, get_pending_applications_warden, assign_room_to_student, wardens_to_assign
+    get_closed_applications_warden, get_pending_applications_warden, assign_room_to_student, wardens_to_assign,
+    ensure_vacancy_index, reconcile_occupancy, find_free_room, get_hostel_vacancies, database_status,
+    assign_hostel_or_waitlist, assign_room_or_waitlist, vacate_student, promote_waitlist, leave_waitlist,
+    get_waitlist, get_waitlist_positions, decide_applications, get_placement, rebuild_placements, check_placements
 )
+from database import DECISION_FIELDS, ReservationError, StudentNotFound, collection_versions, pool_stats, version_tag
+from credentials import CredentialsBusy
+from sessions import SESSION_TTL, AccessDenied, authorize, issue_token, revoke_token, revoke_user_sessions
+from allocation import run_allocation
+from json_provider import MongoJSONProvider
+from cache import cache
+from indexes import ensure_indexes
+from importer import IMPORTS, detect_format, import_records
+from dashboards import get_admin_dashboard, get_warden_dashboard
+from live_updates import stream_queue
+from exports import EXPORT_FORMATS, export_query, export_rows, select_columns
+from jobs import JOB_TYPES, cancel_job, enqueue, get_job, list_jobs, stage_upload
+import metrics
+from log_config import configure_logging
+from datetime import datetime
+from functools import wraps
+from werkzeug.utils import secure_filename
+import io
 import logging
 
 app = Flask(__name__)
+app.json = MongoJSONProvider(app)
 
 CORS(app)
+metrics.instrument(app)
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
+# Configure logging (LOG_LEVEL, LOG_FORMAT)
+configure_logging()
 logger = logging.getLogger(__name__)
 
-logging.getLogger("pymongo").setLevel(logging.WARNING)
-
-# Helper function to convert ObjectId to string recursively
-def convert_objectid(data):
-    if isinstance(data, dict):
-        return {key: convert_objectid(value) for key, value in data.items()}
-    elif isinstance(data, list):
-        return [convert_objectid(element) for element in data]
-    elif isinstance(data, ObjectId):
-        return str(data)
-    else:
-        return data
+# Create any missing indexes before serving requests. If MongoDB is unreachable the worker
+# still starts, and /readyz reports it as unavailable until the database is back.
+try:
+    built_indexes = ensure_indexes()
+    logger.info("Index bootstrap complete, built: %s", built_indexes)
+    ensure_vacancy_index()
+except Exception as e:
+    logger.error("Startup bootstrap skipped, database unavailable: %s", e)
+
+metrics.gauge("mongo_pool_open_connections", "Connections open in this worker's MongoDB pool.",
+              lambda: pool_stats.open)
+metrics.gauge("mongo_pool_checked_out_connections", "Connections currently in use by this worker.",
+              lambda: pool_stats.checked_out)
+
+MAX_PAGE_SIZE = 1000
+
+def page_args(id_type=ObjectId):
+    """Read the `limit`/`after` query parameters used for keyset pagination."""
+    limit = request.args.get("limit", type=int)
+    if limit is not None:
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+    after = request.args.get("after")
+    if after is not None:
+        after = id_type(after)
+    return limit, after
+
+def background_requested():
+    """Whether the client asked for a slow operation to run as a background job."""
+    return request.args.get("background", "").lower() in ("1", "true", "yes")
+
+def wants_ndjson():
+    """Whether the client asked for a streamed NDJSON response instead of a JSON array."""
+    return request.args.get("format") == "ndjson" or request.accept_mimetypes.best == "application/x-ndjson"
+
+def event_stream(events):
+    """Stream Server-Sent Events to the client, unbuffered by proxies."""
+    return Response(stream_with_context(events), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+def list_response(cursor, limit):
+    """Serialize a list cursor as a JSON array, or stream it as NDJSON when requested.
+
+    When a page is full, the `_id` of its last document is returned in the
+    `X-Next-After` header to be passed back as `after` for the next page.
+    """
+    if wants_ndjson():
+        def generate():
+            for document in cursor:
+                yield app.json.dumps(document) + "\n"
+        return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+    documents = list(cursor)
+    response = jsonify(documents)
+    if limit and len(documents) == limit:
+        response.headers["X-Next-After"] = str(documents[-1]["_id"])
+    return response
+
+def export_response(kind: str, query: dict, filename: str):
+    """Stream an export as the `format` (csv or xlsx) and `columns` query parameters ask."""
+    file_format = request.args.get("format", "csv")
+    if file_format not in EXPORT_FORMATS:
+        raise ValueError(f"format must be one of {', '.join(EXPORT_FORMATS)}")
+    columns = select_columns(kind, request.args.get("columns"))
+    mimetype, extension, write = EXPORT_FORMATS[file_format]
+    rows = export_rows(kind, query, columns)
+    return Response(stream_with_context(write(rows, columns, filename)), mimetype=mimetype, headers={
+        "Content-Disposition": f'attachment; filename="{secure_filename(filename)}.{extension}"',
+        "X-Accel-Buffering": "no",
+    })
+
+# Cache-Control of the conditional read routes: clients may keep a copy but must revalidate it each time
+PUBLIC_REVALIDATE = "public, no-cache"
+PRIVATE_REVALIDATE = "private, no-cache"
+
+def conditional(*collections, cache_control: str = PUBLIC_REVALIDATE):
+    """Tag a read route's 200 responses with a strong ETag built from the versions of `collections`.
+
+    A request whose If-None-Match holds the current tag gets 304 Not Modified before the
+    view runs, so only the small `versions` collection is read. Put it below require_role,
+    so a 304 is only ever sent to a client allowed to see the body.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                # The URL and the negotiated format (JSON or NDJSON) are part of the representation
+                etag = version_tag(collection_versions(collections), request.full_path, wants_ndjson())
+            except Exception as e:
+                logger.error("Could not read collection versions for %s: %s", request.path, e)
+                return view(*args, **kwargs)
+            if request.if_none_match.contains_weak(etag):
+                response = Response(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            response.headers["Cache-Control"] = cache_control
+            response.vary.add("Accept")
+            return response
+        return wrapper
+    return decorator
+
+def require_hostel(hostel_name):
+    """For routes whose hostel comes from a document rather than the path: wardens may only act on their own."""
+    if g.principal.role == "warden" and (hostel_name is None or hostel_name != g.principal.hostel_name):
+        raise AccessDenied("Not allowed for this hostel", 403)
+
+def require_role(*roles, query_token=False):
+    """Only let requests with a session token for one of `roles` through; the principal is set on `g`.
+
+    Routes with a `hostel_name` path parameter are limited to the warden of that hostel.
+    With `query_token` the token may also be passed as `?access_token=`, for EventSource
+    streams, which cannot send headers.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            authorization = request.headers.get("Authorization")
+            if authorization is None and query_token and "access_token" in request.args:
+                authorization = f"Bearer {request.args['access_token']}"
+            g.principal = authorize(authorization, roles, kwargs.get("hostel_name"))
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+@app.errorhandler(InvalidId)
+def invalid_id(e):
+    return jsonify({"error": "Invalid id"}), 400
+
+@app.errorhandler(AccessDenied)
+def access_denied(e):
+    return jsonify({"message": str(e)}), e.status
 
 # Sample route to check the server is running
 @app.route('/')
 def index():
     return jsonify({"message": "Hostel Allotment System API is running."})
 
+@app.route('/healthz', methods=['GET'])
+def healthz():
+    """Liveness check: the worker is up and serving requests."""
+    return jsonify({"status": "ok"}), 200
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Request latency and MongoDB command metrics for this worker, in the Prometheus text format."""
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+@app.route('/readyz', methods=['GET'])
+def readyz():
+    """Readiness check: MongoDB answers a ping; reports this worker's connection pool."""
+    try:
+        return jsonify({"status": "ready", "database": database_status()}), 200
+    except Exception as e:
+        logger.error("Readiness check failed: %s", e)
+        return jsonify({"status": "unavailable", "error": str(e)}), 503
+
 # User Routes
-@app.route('/register', methods=['POST'])
-def register():
-    data = request.json
-    success = register_user(data['name'], data['password'], data['role'], data['email'], data['contact_number'], data['bits_id'])
+USER_ROLES = ("student", "warden", "admin")
+
+def create_account(data: dict, role: str):
+    try:
+        success = register_user(data['name'], data['password'], role, data['email'], data['contact_number'], data['bits_id'])
+    except CredentialsBusy:
+        return jsonify({"message": "Server busy, please retry"}), 503, {"Retry-After": "1"}
     if success:
         return jsonify({"message": "User registered successfully"}), 201
     return jsonify({"message": "User already exists"}), 409
 
+@app.route('/register', methods=['POST'])
+def register():
+    """Self-registration, which always creates a student; wardens and admins are added with POST /users."""
+    return create_account(request.json, "student")
+
+@app.route('/users', methods=['POST'])
+@require_role("admin")
+def create_user():
+    """API endpoint for admins to create an account of any role."""
+    data = request.json
+    role = data.get('role', 'student')
+    if role not in USER_ROLES:
+        return jsonify({"message": f"role must be one of {', '.join(USER_ROLES)}"}), 400
+    return create_account(data, role)
+
 @app.route('/login', methods=['POST'])
 def login():
     data = request.json
@@ -57,23 +239,24 @@ def login():
         return jsonify({"message": "Missing email or password"}), 400
 
     # Authenticate user based on the provided email and password
-    user = authenticate_user(data['email'], data['password'])
+    try:
+        user = authenticate_user(data['email'], data['password'])
+    except CredentialsBusy:
+        return jsonify({"message": "Too many login attempts in progress, please retry"}), 503, {"Retry-After": "1"}
 
     # If no user is found, return an error
     if user is None:
         return jsonify({"message": "Invalid credentials"}), 401
 
-    # If user contains an ObjectId, convert it to string
-    if '_id' in user and isinstance(user['_id'], ObjectId):
-        user['_id'] = str(user['_id'])
-
     # Ensure the user has a 'role' field (e.g., 'student', 'admin', 'warden')
     if 'role' not in user:
         return jsonify({"message": "User role not found"}), 400
 
-    # Return the successful login response with user data and role
+    # Return the successful login response with user data, role and a session token
     return jsonify({
         "message": "Login successful",
+        "token": issue_token(user),
+        "expires_in": SESSION_TTL,
         "user": {
             "_id": user['_id'],
             "email": user['email'],
@@ -81,31 +264,42 @@ def login():
         }
     }), 200
 
+@app.route('/logout', methods=['POST'])
+@require_role("student", "warden", "admin")
+def logout():
+    revoke_token(g.principal)
+    return jsonify({"message": "Logged out"}), 200
+
 @app.route('/user/<email>', methods=['GET'])
+@require_role("student", "warden", "admin")
 def get_user(email):
+    # Students and wardens may only read their own record
+    if g.principal.role != "admin" and email != g.principal.email:
+        return jsonify({"message": "Not allowed for this user"}), 403
     user = find_user(email)
     if user:
-        user = convert_objectid(user)
         return jsonify(user), 200
     return jsonify({"message": "User not found"}), 404
 
 @app.route('/wardens', methods=['GET'])
+@require_role("admin")
 def get_all_wardens():
     """API endpoint to fetch all wardens."""
     try:
         wardens = fetch_all_wardens()  # Call the database function
-        logger.info("Successfully fetched all wardens.")
+        logger.debug("Successfully fetched all wardens.")
         return jsonify(wardens), 200
     except Exception as e:
         logger.error("Error fetching wardens", exc_info=True)
         return jsonify({"error": "Unable to fetch wardens"}), 500
 
 @app.route('/wardens-for-assign', methods=['GET'])
+@require_role("admin")
 def get_wardens_to_assign():
     """API endpoint to fetch all wardens."""
     try:
         wardens = wardens_to_assign()  # Call the database function
-        logger.info("Successfully fetched all wardens.")
+        logger.debug("Successfully fetched all wardens.")
         return jsonify(wardens), 200
     except Exception as e:
         logger.error("Error fetching wardens", exc_info=True)
@@ -113,9 +307,10 @@ def get_wardens_to_assign():
 
 # Room Routes
 @app.route('/rooms', methods=['GET'])
+@conditional("rooms")
 def get_rooms():
-    rooms = list_all_rooms()
-    return jsonify(rooms), 200
+    limit, after = page_args()
+    return list_response(list_all_rooms(limit, after), limit), 200
 
 @app.route('/room/<room_id>/availability', methods=['GET'])
 def check_availability(room_id):
@@ -126,10 +321,11 @@ def check_availability(room_id):
 def get_room_info(room_id):
     room = get_room(room_id)
     if room:
-        return jsonify(room.to_dict()), 200
+        return jsonify(room), 200
     return jsonify({"message": "Room not found"}), 404
 
 @app.route('/room/<room_id>', methods=['PUT'])
+@require_role("admin")
 def update_room_info(room_id):
     data = request.json
     success = update_room(room_id, data)
@@ -138,6 +334,7 @@ def update_room_info(room_id):
     return jsonify({"message": "Room update failed"}), 400
 
 @app.route('/room/<room_id>', methods=['DELETE'])
+@require_role("admin")
 def delete_room_info(room_id):
     success = delete_room(room_id)
     if success:
@@ -146,8 +343,11 @@ def delete_room_info(room_id):
 
 # Allotment Routes
 @app.route('/allotment', methods=['POST'])
+@require_role("warden", "admin")
 def create_allotment():
     data = request.json
+    placement = get_placement(data.get("user_id"))
+    require_hostel(placement["hostel_name"] if placement else None)
     allotment_id = add_allotment(data)
     return jsonify({"message": "Allotment created", "allotment_id": allotment_id}), 201
 
@@ -157,7 +357,14 @@ def get_user_allotments(user_id):
     return jsonify(allotments), 200
 
 @app.route('/allotment/<allotment_id>', methods=['DELETE'])
-def remove_allotment(allotment_id):
+@require_role("warden", "admin")
+def remove_allotment_route(allotment_id):
+    """API endpoint deleting an allotment; deleting an active one vacates the student's bed for the waitlist."""
+    allotment = get_allotment(allotment_id)
+    if allotment is None:
+        return jsonify({"message": "Allotment not found"}), 404
+    placement = get_placement(allotment.user_id)
+    require_hostel(placement["hostel_name"] if placement else None)
     success = remove_allotment(allotment_id)
     if success:
         return jsonify({"message": "Allotment removed successfully"}), 200
@@ -165,6 +372,7 @@ def remove_allotment(allotment_id):
 
 # Hostel Routes
 @app.route('/hostels', methods=['GET'])
+@conditional("hostels")
 def get_hostels():
     """Route to fetch the list of hostels, including warden information."""
     try:
@@ -175,6 +383,7 @@ def get_hostels():
         return jsonify({"error": "Failed to fetch hostels"}), 500
 
 @app.route('/available-hostels', methods=['GET'])
+@conditional("hostels")
 def available_hostels():
     """API endpoint to get the list of available hostels."""
     try:
@@ -184,10 +393,11 @@ def available_hostels():
         # Return the list of hostels in JSON format
         return jsonify(hostels), 200
     except Exception as e:
-        print(f"Error in available_hostels endpoint: {e}")
+        logger.error("Error in available_hostels endpoint", exc_info=True)
         return jsonify({"error": "Failed to fetch available hostels"}), 500
 
 @app.route('/assign-hostel/<bits_id>', methods=['POST', 'PUT'])
+@require_role("admin")
 def assign_hostel(bits_id):
     try:
         data = request.get_json()
@@ -195,7 +405,19 @@ def assign_hostel(bits_id):
         
         if not hostel_name:
             return jsonify({"error": "hostel_name is required"}), 400
-        
+
+        # A full hostel queues the student for its next free bed unless the caller opts out
+        if data.get("waitlist", True):
+            try:
+                outcome = assign_hostel_or_waitlist(bits_id, hostel_name, data.get("priority", 0))
+            except StudentNotFound as e:
+                return jsonify({"error": str(e)}), 404
+            except ReservationError:
+                return jsonify({"error": f"Hostel {hostel_name} does not exist"}), 400
+            if outcome["status"] == "waitlisted":
+                return jsonify({"message": "Hostel is full; student waitlisted", **outcome}), 202
+            return jsonify({"message": "Hostel assigned successfully", **outcome}), 200
+
         # Call the database function to assign the hostel
         success = assign_hostel_to_student(bits_id, hostel_name)
         
@@ -204,16 +426,18 @@ def assign_hostel(bits_id):
         else:
             return jsonify({"error": "Failed to assign hostel. Hostel may be full or not exist."}), 400
     except Exception as e:
-        print(f"Error in assign_hostel endpoint: {e}")
+        logger.error("Error in assign_hostel endpoint for %s", bits_id, exc_info=True)
         return jsonify({"error": "An error occurred while assigning hostel"}), 500
 
 @app.route('/hostel', methods=['POST'])
+@require_role("admin")
 def create_hostel():
     data = request.json
     hostel_id = add_hostels(data)
     return jsonify({"message": "Hostel created", "hostel_id": hostel_id}), 201
 
 @app.route('/hostel/<hostel_id>', methods=['PUT'])
+@require_role("admin")
 def update_hostel_info(hostel_id):
     data = request.json
     success = update_hostel(hostel_id, data)
@@ -223,25 +447,45 @@ def update_hostel_info(hostel_id):
 
 # Application Routes
 @app.route('/closed-requests-admin', methods=['GET'])
+@require_role("admin")
+@conditional("applications", cache_control=PRIVATE_REVALIDATE)
 def get_closed_applications_for_admin():
-    applications = get_closed_applications_admin()
-    return jsonify(applications), 200
+    limit, after = page_args(str)
+    return list_response(get_closed_applications_admin(limit, after), limit), 200
 
 @app.route('/pending-requests-admin', methods=['GET'])
+@require_role("admin")
+@conditional("applications", cache_control=PRIVATE_REVALIDATE)
 def get_pending_applications_for_admin():
-    applications = get_pending_applications_admin()
-    return jsonify(applications), 200
+    limit, after = page_args(str)
+    return list_response(get_pending_applications_admin(limit, after), limit), 200
  
 @app.route('/closed-requests-warden/<hostel_name>', methods=['GET'])
+@require_role("warden", "admin")
+@conditional("applications", cache_control=PRIVATE_REVALIDATE)
 def get_closed_applications_for_warden(hostel_name):
-    applications = get_closed_applications_warden(hostel_name)
-    return jsonify(applications), 200
+    limit, after = page_args(str)
+    return list_response(get_closed_applications_warden(hostel_name, limit, after), limit), 200
 
 @app.route('/pending-requests-warden/<hostel_name>', methods=['GET'])
+@require_role("warden", "admin")
+@conditional("applications", cache_control=PRIVATE_REVALIDATE)
 def get_pending_applications_for_warden(hostel_name):
-    applications = get_pending_applications_warden(hostel_name)
-    return jsonify(applications), 200
- 
+    limit, after = page_args(str)
+    return list_response(get_pending_applications_warden(hostel_name, limit, after), limit), 200
+
+@app.route('/pending-requests-admin/stream', methods=['GET'])
+@require_role("admin", query_token=True)
+def stream_pending_applications_for_admin():
+    """Server-Sent Events with each application added to or leaving the admin's pending queue."""
+    return event_stream(stream_queue(None))
+
+@app.route('/pending-requests-warden/<hostel_name>/stream', methods=['GET'])
+@require_role("warden", "admin", query_token=True)
+def stream_pending_applications_for_warden(hostel_name):
+    """Server-Sent Events with each application added to or leaving a hostel's pending room queue."""
+    return event_stream(stream_queue(hostel_name))
+
 @app.route('/applications', methods=['POST'])
 def submit_application():
     data = request.json
@@ -256,24 +500,228 @@ def submit_application():
     return jsonify({"message": "Application submitted", "application_id": application_id}), 201
 
 @app.route('/application/<application_id>/status', methods=['PUT'])
+@require_role("warden", "admin")
 def update_application_status_route(application_id):
+    application = get_application(application_id)
+    if application is None:
+        return jsonify({"message": "Application not found"}), 404
+    require_hostel(application.alloted_hostel)
     data = request.json
     success = update_application_status(application_id, data['status'])
     if success:
         return jsonify({"message": "Application status updated"}), 200
     return jsonify({"message": "Failed to update application status"}), 400
 
+@app.route('/applications/decisions/<kind>', methods=['POST'])
+@require_role("warden", "admin")
+def decide_applications_route(kind):
+    """Approve or reject many pending hostel (admin) or room (warden) requests in one call.
+
+    The body has a `status` and either `application_ids` or a `filter` with any of
+    `hostel_name`, `room_type`, `applied_after` and `applied_before` (ISO dates).
+    """
+    try:
+        if kind not in DECISION_FIELDS:
+            return jsonify({"error": f"Unknown decision kind {kind}"}), 404
+        if kind == "hostel" and g.principal.role != "admin":
+            return jsonify({"message": "Not allowed for this role"}), 403
+        data = request.json or {}
+        application_ids = data.get("application_ids")
+        criteria = data.get("filter")
+        if (application_ids is None) == (criteria is None):
+            return jsonify({"error": "Give either application_ids or filter"}), 400
+        if application_ids is not None and (not isinstance(application_ids, list)
+                                            or not all(isinstance(i, str) for i in application_ids)):
+            return jsonify({"error": "application_ids must be a list of ids"}), 400
+
+        filters = None
+        if criteria is not None:
+            filters = {key: criteria.get(key) for key in ("hostel_name", "room_type")}
+            for key in ("applied_after", "applied_before"):
+                if criteria.get(key):
+                    filters[key] = datetime.fromisoformat(criteria[key])
+        # Wardens decide only their own hostel's room requests
+        scope_hostel = g.principal.hostel_name if g.principal.role == "warden" else None
+
+        outcome = decide_applications(kind, data.get("status"), application_ids, filters, scope_hostel)
+        return jsonify(outcome), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error("Error deciding %s requests in bulk", kind, exc_info=True)
+        return jsonify({"error": "An error occurred while deciding the requests"}), 500
+
+@app.route('/applications/export', methods=['GET'])
+@require_role("warden", "admin")
+def export_applications():
+    """Stream applications as CSV or XLSX, filtered by `hostel_status`, `room_status`, `alloted_hostel`,
+    `hostel`, `room_type`, `applied_after` and `applied_before`; wardens get their own hostel's."""
+    try:
+        query = export_query("applications", request.args)
+        if g.principal.role == "warden":
+            query["alloted_hostel"] = g.principal.hostel_name
+        return export_response("applications", query, "applications")
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+# Dashboard Routes
+@app.route('/dashboard/admin', methods=['GET'])
+@require_role("admin")
+def admin_dashboard():
+    """API endpoint returning every hostel's summary and the pending hostel request count."""
+    try:
+        return jsonify(get_admin_dashboard()), 200
+    except Exception as e:
+        logger.error("Error building admin dashboard", exc_info=True)
+        return jsonify({"error": "Failed to build admin dashboard"}), 500
+
+@app.route('/dashboard/warden/<hostel_name>', methods=['GET'])
+@require_role("warden", "admin")
+def warden_dashboard(hostel_name):
+    """API endpoint returning one hostel's occupancy, room types, request counts and warden."""
+    try:
+        summary = get_warden_dashboard(hostel_name)
+        if summary is None:
+            return jsonify({"message": "Hostel not found"}), 404
+        return jsonify(summary), 200
+    except Exception as e:
+        logger.error("Error building warden dashboard for hostel %s", hostel_name, exc_info=True)
+        return jsonify({"error": "Failed to build warden dashboard"}), 500
+
+# Allocation Routes
+@app.route('/allocate/run', methods=['POST'])
+@require_role("admin")
+def run_bulk_allocation():
+    """API endpoint to allocate every pending application in one pass (`?background=1` queues a job)."""
+    try:
+        data = request.get_json(silent=True) or {}
+        if background_requested():
+            job = enqueue("allocation", {"assign_rooms": data.get("assign_rooms", True), "dry_run": data.get("dry_run", False)},
+                          request.headers.get("Idempotency-Key"))
+            return jsonify(job), 202, {"Location": f"/jobs/{job['_id']}"}
+        result = run_allocation(
+            assign_rooms=data.get("assign_rooms", True),
+            dry_run=data.get("dry_run", False)
+        )
+        return jsonify(result), 200
+    except ReservationError as e:
+        logger.warning("Bulk allocation aborted: %s", e)
+        return jsonify({"error": f"{e} Please re-run the allocation."}), 409
+    except Exception as e:
+        logger.error("Error running bulk allocation", exc_info=True)
+        return jsonify({"error": "An error occurred while running the allocation"}), 500
+
+# Import Routes
+@app.route('/import/<kind>', methods=['POST'])
+@require_role("admin")
+def import_data(kind):
+    """API endpoint to bulk import hostels, rooms or users from an uploaded CSV or JSONL file.
+
+    The file is sent as the multipart field `file` or as the raw request body; the format
+    comes from `?format=` or the file extension. With `?background=1` the file is staged
+    and imported by a job worker instead (202 with the job).
+    """
+    if kind not in IMPORTS:
+        return jsonify({"error": f"Unknown import kind '{kind}'"}), 404
+    try:
+        upload = request.files.get("file")
+        stream = upload.stream if upload else request.stream
+        file_format = request.args.get("format") or detect_format(upload.filename if upload else None)
+        if file_format not in ("csv", "jsonl"):
+            return jsonify({"error": "format must be csv or jsonl"}), 400
+        if background_requested():
+            file_id = stage_upload(stream, upload.filename if upload else f"{kind}.{file_format}")
+            job = enqueue("import", {"kind": kind, "format": file_format, "file_id": file_id},
+                          request.headers.get("Idempotency-Key"))
+            return jsonify(job), 202, {"Location": f"/jobs/{job['_id']}"}
+        report = import_records(kind, io.TextIOWrapper(stream, encoding="utf-8", newline=""), file_format)
+        return jsonify(report), 200
+    except Exception as e:
+        logger.error("Error importing %s", kind, exc_info=True)
+        return jsonify({"error": f"An error occurred while importing {kind}"}), 500
+
+# Job Routes
+@app.route('/jobs', methods=['POST'])
+@require_role("admin")
+def create_job():
+    """API endpoint to queue a background job: {"type": ..., "params": {...}}.
+
+    An `Idempotency-Key` header makes retries of the same request return the job already queued.
+    """
+    data = request.get_json(silent=True) or {}
+    if data.get("type") not in JOB_TYPES or data.get("type") == "import":
+        return jsonify({"error": f"type must be one of: {', '.join(sorted(set(JOB_TYPES) - {'import'}))}"}), 400
+    try:
+        job = enqueue(data["type"], data.get("params"), request.headers.get("Idempotency-Key"))
+        return jsonify(job), 202, {"Location": f"/jobs/{job['_id']}"}
+    except Exception as e:
+        logger.error("Error queueing job", exc_info=True)
+        return jsonify({"error": "An error occurred while queueing the job"}), 500
+
+@app.route('/jobs', methods=['GET'])
+@require_role("admin")
+def get_jobs():
+    limit, after = page_args()
+    return list_response(list_jobs(limit, after), limit), 200
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+@require_role("admin")
+def get_job_status(job_id):
+    """API endpoint returning a job's status, progress and, once finished, its result or error."""
+    job = get_job(ObjectId(job_id))
+    if job:
+        return jsonify(job), 200
+    return jsonify({"message": "Job not found"}), 404
+
+@app.route('/jobs/<job_id>/cancel', methods=['POST'])
+@require_role("admin")
+def cancel_job_route(job_id):
+    """API endpoint cancelling a queued job, or asking a running one to stop at its next progress report."""
+    job = cancel_job(ObjectId(job_id))
+    if job:
+        return jsonify(job), 200
+    return jsonify({"message": "Job not found"}), 404
+
 # Utility Routes
 @app.route('/hostels/<hostel_name>/available_rooms', methods=['GET'])
+@conditional("rooms")
 def available_rooms(hostel_name):
     try:
         rooms = find_available_rooms(hostel_name)
-        return jsonify([room.to_dict() for room in rooms]), 200
+        return jsonify(rooms), 200
     except Exception as e:
-        logger.error(f"Error fetching available rooms for hostel {hostel_name}: {e}")
+        logger.error("Error fetching available rooms for hostel %s: %s", hostel_name, e)
         return jsonify({"error": "Unable to fetch available rooms"}), 500
 
+@app.route('/hostels/<hostel_name>/vacancies', methods=['GET'])
+def hostel_vacancies(hostel_name):
+    """API endpoint returning free beds per room type, or the next free room of `?type=`."""
+    try:
+        room_type = request.args.get("type")
+        if room_type:
+            return jsonify({"hostel_name": hostel_name, "room_type": room_type,
+                            "room_number": find_free_room(hostel_name, room_type)}), 200
+        return jsonify(get_hostel_vacancies(hostel_name)), 200
+    except Exception as e:
+        logger.error("Error fetching vacancies for hostel %s: %s", hostel_name, e)
+        return jsonify({"error": "Unable to fetch vacancies"}), 500
+
+@app.route('/vacancies/reconcile', methods=['POST'])
+@require_role("admin")
+def reconcile_vacancies():
+    """API endpoint recounting occupancy from student records and rebuilding the vacancy index
+    (`?background=1` queues a job)."""
+    try:
+        if background_requested():
+            job = enqueue("reconcile", idempotency_key=request.headers.get("Idempotency-Key"))
+            return jsonify(job), 202, {"Location": f"/jobs/{job['_id']}"}
+        return jsonify(reconcile_occupancy()), 200
+    except Exception as e:
+        logger.error("Error reconciling occupancy", exc_info=True)
+        return jsonify({"error": "An error occurred while reconciling occupancy"}), 500
+
 @app.route('/room-requests/<bits_id>/assign-room', methods=['PUT'])
+@require_role("warden", "admin")
 def assign_room(bits_id):
     try:
         # Retrieve the student_id and room_id from the request body
@@ -283,12 +731,14 @@ def assign_room(bits_id):
 
         if not hostel_name or not room_number:
             return jsonify({"error": "Both hostel_name and room_number are required"}), 400
+        if g.principal.role == "warden" and hostel_name != g.principal.hostel_name:
+            return jsonify({"message": "Not allowed for this hostel"}), 403
 
         # Call the database function to assign the room
         success = assign_room_to_student(bits_id, room_number, hostel_name)
 
         if success:
-            logger.info(f"Room assigned successfully for bits_id {bits_id}.")
+            logger.info("Room assigned successfully for bits_id %s.", bits_id)
             return jsonify({"message": "Room assigned successfully"}), 200
         else:
             return jsonify({"error": "Failed to assign room"}), 500
@@ -297,7 +747,123 @@ def assign_room(bits_id):
         logger.error("Error processing room assignment request", exc_info=True)
         return jsonify({"error": "An error occurred while assigning the room"}), 500
 
+@app.route('/room-requests/<bits_id>/assign-next-room', methods=['POST'])
+@require_role("warden", "admin")
+def assign_next_room(bits_id):
+    """Give a student the next free room of a type in their hostel, or waitlist them for one."""
+    try:
+        data = request.json or {}
+        hostel_name = data.get("hostel_name")
+        room_type = data.get("room_type")
+        if not hostel_name or not room_type:
+            return jsonify({"error": "Both hostel_name and room_type are required"}), 400
+        if g.principal.role == "warden" and hostel_name != g.principal.hostel_name:
+            return jsonify({"message": "Not allowed for this hostel"}), 403
+
+        outcome = assign_room_or_waitlist(bits_id, hostel_name, room_type, data.get("priority", 0))
+        if outcome["status"] == "waitlisted":
+            return jsonify({"message": f"No free {room_type} room; student waitlisted", **outcome}), 202
+        return jsonify({"message": "Room assigned successfully", **outcome}), 200
+    except ReservationError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error("Error assigning the next free room to %s", bits_id, exc_info=True)
+        return jsonify({"error": "An error occurred while assigning the room"}), 500
+
+@app.route('/students/<bits_id>/vacate', methods=['POST'])
+@require_role("warden", "admin")
+def vacate(bits_id):
+    """Move a student out of their hostel; their beds go to the next waitlisted students."""
+    try:
+        # Wardens can only move students out of their own hostel
+        hostel_name = g.principal.hostel_name if g.principal.role == "warden" else None
+        outcome = vacate_student(bits_id, hostel_name)
+        if outcome is None:
+            return jsonify({"error": f"Student {bits_id} does not hold a bed"}), 404
+        return jsonify({"message": "Student moved out", **outcome}), 200
+    except ReservationError as e:
+        return jsonify({"message": str(e)}), 403
+    except Exception as e:
+        logger.error("Error vacating %s", bits_id, exc_info=True)
+        return jsonify({"error": "An error occurred while vacating the student"}), 500
+
+# Placement Routes
+@app.route('/students/<bits_id>/placement', methods=['GET'])
+@require_role("student", "warden", "admin")
+def student_placement(bits_id):
+    """Where a student lives and who shares their room; students see their own, wardens their hostel's."""
+    if g.principal.role == "student" and g.principal.bits_id != bits_id:
+        return jsonify({"message": "Not allowed for this student"}), 403
+    placement = get_placement(bits_id)
+    if placement is None or (g.principal.role == "warden" and placement["hostel_name"] != g.principal.hostel_name):
+        return jsonify({"error": f"Student {bits_id} has no bed"}), 404
+    return jsonify(placement), 200
+
+@app.route('/placements/rebuild', methods=['POST'])
+@require_role("admin")
+def rebuild_placement_model():
+    """Recreate the placement read model from student records (`?background=1` queues a job)."""
+    try:
+        if background_requested():
+            job = enqueue("rebuild_placements", idempotency_key=request.headers.get("Idempotency-Key"))
+            return jsonify(job), 202, {"Location": f"/jobs/{job['_id']}"}
+        return jsonify(rebuild_placements()), 200
+    except Exception as e:
+        logger.error("Error rebuilding placements", exc_info=True)
+        return jsonify({"error": "An error occurred while rebuilding placements"}), 500
+
+@app.route('/placements/check', methods=['GET'])
+@require_role("admin")
+def check_placement_model():
+    """Report where placements disagree with students, applications and room occupancy."""
+    try:
+        return jsonify(check_placements()), 200
+    except Exception as e:
+        logger.error("Error checking placements", exc_info=True)
+        return jsonify({"error": "An error occurred while checking placements"}), 500
+
+# Waitlist Routes
+@app.route('/waitlist/<hostel_name>', methods=['GET'])
+@require_role("warden", "admin")
+def hostel_waitlist(hostel_name):
+    """A hostel's queue (`?room_type=` for a room type's queue) in the order it will be served."""
+    try:
+        limit, _ = page_args()
+        entries = list(get_waitlist(hostel_name, request.args.get("room_type"), limit))
+        for position, entry in enumerate(entries, start=1):
+            entry["position"] = position
+        return jsonify(entries), 200
+    except Exception as e:
+        logger.error("Error fetching the waitlist for %s", hostel_name, exc_info=True)
+        return jsonify({"error": "An error occurred while fetching the waitlist"}), 500
+
+@app.route('/waitlist/<hostel_name>/<bits_id>', methods=['DELETE'])
+@require_role("warden", "admin")
+def remove_from_waitlist(hostel_name, bits_id):
+    if leave_waitlist(bits_id, hostel_name, request.args.get("room_type")):
+        return jsonify({"message": "Removed from the waitlist"}), 200
+    return jsonify({"error": "Student is not on this waitlist"}), 404
+
+@app.route('/waitlist/<hostel_name>/promote', methods=['POST'])
+@require_role("admin")
+def promote_hostel_waitlist(hostel_name):
+    """Fill a hostel's free beds from its queues, e.g. after its capacity was raised."""
+    try:
+        return jsonify({"promoted": promote_waitlist(hostel_name)}), 200
+    except Exception as e:
+        logger.error("Error promoting the waitlist for %s", hostel_name, exc_info=True)
+        return jsonify({"error": "An error occurred while promoting the waitlist"}), 500
+
+@app.route('/waitlist/positions/<bits_id>', methods=['GET'])
+@require_role("student", "warden", "admin")
+def waitlist_positions(bits_id):
+    """The queues a student is in and their place in each; students can only see their own."""
+    if g.principal.role == "student" and g.principal.bits_id != bits_id:
+        return jsonify({"message": "Not allowed for this student"}), 403
+    return jsonify(get_waitlist_positions(bits_id)), 200
+
 @app.route('/hostels/<hostel_name>/assign-warden', methods=['PUT'])
+@require_role("admin")
 def assign_warden(hostel_name):
     """API endpoint to assign a warden to a specific hostel."""
     try:
@@ -306,7 +872,7 @@ def assign_warden(hostel_name):
         warden_email = data.get("warden_email")
 
         # Log the received hostel ID and warden name for debugging
-        logger.debug(f"Received request to assign warden '{warden_email}' to hostel ID: {hostel_name}")
+        logger.debug("Received request to assign warden '%s' to hostel ID: %s", warden_email, hostel_name)
 
         # Validate required field
         if not warden_email:
@@ -318,10 +884,12 @@ def assign_warden(hostel_name):
 
         # Log the result of the assignment operation
         if success:
-            logger.info(f"Warden '{warden_email}' assigned to hostel with name {hostel_name}.")
+            # The warden's existing sessions still carry their previous hostel
+            revoke_user_sessions(warden_email)
+            logger.info("Warden '%s' assigned to hostel with name %s.", warden_email, hostel_name)
             return jsonify({"message": "Warden assigned successfully"}), 200
         else:
-            logger.error(f"Failed to assign warden '{warden_email}' to hostel with name {hostel_name}.")
+            logger.error("Failed to assign warden '%s' to hostel with name %s.", warden_email, hostel_name)
             return jsonify({"error": "Failed to assign warden"}), 500
 
     except Exception as e:
@@ -329,6 +897,7 @@ def assign_warden(hostel_name):
         return jsonify({"error": "An error occurred while assigning warden"}), 500
 
 @app.route('/hostels/<hostel_name>/remove-warden', methods=['PUT'])
+@require_role("admin")
 def remove_warden(hostel_name):
     """API endpoint to remove a warden from a specific hostel."""
     try:
@@ -336,38 +905,54 @@ def remove_warden(hostel_name):
         warden_email = data.get("warden_email")
 
         # Debug log for hostel ID
-        logger.debug(f"Received request to remove warden '{warden_email}' from hostel with ID '{hostel_name}'.")
+        logger.debug("Received request to remove warden '%s' from hostel with ID '%s'.", warden_email, hostel_name)
 
         # Call the database function to remove the warden
         success = remove_warden_from_hostel(hostel_name, warden_email)
 
         # Debug: Log the result of the removal
         if success:
-            logger.info(f"Warden removed from hostel with ID '{hostel_name}'.")
+            if warden_email:
+                revoke_user_sessions(warden_email)
+            logger.info("Warden removed from hostel with ID '%s'.", hostel_name)
             return jsonify({"message": "Warden removed successfully"}), 200
         else:
-            logger.error(f"Failed to remove warden from hostel with ID '{hostel_name}'.")
+            logger.error("Failed to remove warden from hostel with ID '%s'.", hostel_name)
             return jsonify({"error": "Failed to remove warden"}), 500
 
     except Exception as e:
         logger.error("Error removing warden", exc_info=True)
         return jsonify({"error": "An error occurred while removing warden"}), 500
     
+@app.route('/cache/stats', methods=['GET'])
+@require_role("admin")
+def cache_stats():
+    """API endpoint reporting cache hit/miss counters per cached view."""
+    return jsonify(cache.stats()), 200
+
 @app.route('/hostels/<hostel_name>/students', methods=['GET'])
+@require_role("warden", "admin")
 def get_students_in_hostel(hostel_name):
-    """API endpoint to fetch all students in a specific hostel."""
+    """API endpoint to fetch all students in a specific hostel (`?room_number=` for one room)."""
     try:
         # Fetch the students using the database function
-        students = get_students_by_hostel(hostel_name)
+        students = get_students_by_hostel(hostel_name, request.args.get("room_number"))
         # Return student details as JSON
-        return jsonify([student.to_dict() for student in students]), 200
+        return jsonify(students), 200
     except Exception as e:
-        print(f"Error retrieving students for hostel {hostel_name}: {e}")
+        logger.error("Error retrieving students for hostel %s", hostel_name, exc_info=True)
         return jsonify({"error": "Failed to retrieve students"}), 500
 
+@app.route('/hostels/<hostel_name>/students/export', methods=['GET'])
+@require_role("warden", "admin")
+def export_students_in_hostel(hostel_name):
+    """Stream a hostel's roster as CSV or XLSX, optionally filtered by `room_number` and `room_type`."""
+    try:
+        query = {**export_query("students", request.args), "hostel_name": hostel_name}
+        return export_response("students", query, f"{hostel_name} students")
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
 if __name__ == '__main__':
-    inserted_ids = add_hostels()
-    print("Inserted hostel IDs:", inserted_ids)
-    inserted_id = add_rooms()
-    print("Inserted room:", inserted_id)
+    # Development server only; use `python wsgi.py` in production and `python seed.py` to load seed data
     app.run(debug=True)
@@ -0,0 +1,230 @@
+"""Request and MongoDB instrumentation, exposed on /metrics in the Prometheus text format.
+
+`instrument(app)` times every Flask request per route. `command_metrics`, a PyMongo
+CommandListener passed to the MongoClients, counts commands and their time per
+collection and operation, and adds them to the request that issued them, so a slow
+route shows how much of its time went to Mongo and to JSON serialization.
+
+Setting METRICS_SLOW_REQUEST_MS logs every request slower than that with the shapes
+of the queries it issued (values replaced by "?").
+
+Metrics are kept per process: under several gunicorn workers each scrape reports the
+worker that answered it. Mongo calls from the ASGI app's Motor routes are counted but
+not attributed to a request, since Motor runs them on its own threads.
+"""
+from bisect import bisect_left
+from collections import defaultdict
+from contextvars import ContextVar
+from typing import Callable, Optional
+import logging
+import os
+import threading
+import time
+from flask import g, request
+from pymongo.monitoring import CommandListener
+
+logger = logging.getLogger(__name__)
+slow_request_logger = logging.getLogger("slow_requests")
+
+SLOW_REQUEST_MS = float(os.getenv("METRICS_SLOW_REQUEST_MS", "0")) or None
+# Query shapes kept per request for the slow-request log
+MAX_SHAPES = 20
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(names, values) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+class Counter:
+    def __init__(self, name: str, help_text: str, label_names=()):
+        self.name, self.help, self.label_names = name, help_text, tuple(label_names)
+        self._values = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount: float = 1):
+        with self._lock:
+            self._values[label_values] += amount
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            for label_values, value in sorted(self._values.items()):
+                yield f"{self.name}{_labels(self.label_names, label_values)} {value:g}"
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, label_names=(), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.label_names = name, help_text, tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [per-bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[bisect_left(self.buckets, value)] += 1
+            series[-1] += value
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            series_items = sorted((label_values, list(series)) for label_values, series in self._series.items())
+        for label_values, series in series_items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series[:-1]):
+                cumulative += count
+                labels = _labels(self.label_names + ("le",), label_values + (bound,))
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _labels(self.label_names, label_values)
+            yield f"{self.name}_sum{labels} {series[-1]:g}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+class Gauge:
+    """A value read from `callback` when metrics are scraped."""
+
+    def __init__(self, name: str, help_text: str, callback: Callable[[], float]):
+        self.name, self.help, self.callback = name, help_text, callback
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} gauge"
+        yield f"{self.name} {self.callback():g}"
+
+REGISTRY = []
+
+def register(metric):
+    REGISTRY.append(metric)
+    return metric
+
+def gauge(name: str, help_text: str, callback: Callable[[], float]) -> Gauge:
+    return register(Gauge(name, help_text, callback))
+
+def render() -> str:
+    """All registered metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in REGISTRY:
+        try:
+            lines.extend(metric.render())
+        except Exception as e:
+            logger.error("Failed to render metric %s: %s", metric.name, e)
+    return "\n".join(lines) + "\n"
+
+http_requests = register(Histogram(
+    "http_request_duration_seconds", "Time to handle a request, by route.", ("method", "route", "status")))
+http_request_mongo = register(Histogram(
+    "http_request_mongo_seconds", "Time a request spent waiting on MongoDB commands, by route.", ("method", "route")))
+http_request_serialization = register(Histogram(
+    "http_request_serialization_seconds", "Time a request spent encoding JSON, by route.", ("method", "route")))
+mongo_commands = register(Counter(
+    "mongo_commands_total", "MongoDB commands sent, by collection and command.", ("collection", "command")))
+mongo_command_seconds = register(Counter(
+    "mongo_command_seconds_total", "Time spent in MongoDB commands, by collection and command.", ("collection", "command")))
+mongo_command_failures = register(Counter(
+    "mongo_command_failures_total", "MongoDB commands that failed, by collection and command.", ("collection", "command")))
+
+# Request Attribution
+class RequestStats:
+    __slots__ = ("mongo_seconds", "mongo_commands", "serialization_seconds", "shapes")
+
+    def __init__(self):
+        self.mongo_seconds = 0.0
+        self.mongo_commands = 0
+        self.serialization_seconds = 0.0
+        self.shapes = []
+
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+def add_serialization_time(seconds: float):
+    stats = current_request.get()
+    if stats is not None:
+        stats.serialization_seconds += seconds
+
+def query_shape(value):
+    """The structure of a filter or pipeline with every literal replaced by "?"."""
+    if isinstance(value, dict):
+        return {key: query_shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [query_shape(item) for item in value[:3]]
+    return "?"
+
+# Arguments worth showing in the slow-request log, by command
+SHAPE_FIELDS = ("filter", "query", "q", "pipeline", "sort", "projection", "updates", "deletes")
+
+class CommandMetrics(CommandListener):
+    """Count MongoDB commands per collection and attribute their time to the current request."""
+
+    def __init__(self):
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def started(self, event):
+        target = event.command.get(event.command_name)
+        collection = target if isinstance(target, str) else ""
+        shape = None
+        if SLOW_REQUEST_MS is not None and current_request.get() is not None:
+            shape = {field: query_shape(event.command[field]) for field in SHAPE_FIELDS if field in event.command}
+        with self._lock:
+            self._pending[(event.connection_id, event.request_id)] = (collection, shape, current_request.get())
+
+    def _finish(self, event, failed: bool):
+        with self._lock:
+            collection, shape, stats = self._pending.pop((event.connection_id, event.request_id), ("", None, None))
+        seconds = event.duration_micros / 1e6
+        mongo_commands.inc(collection, event.command_name)
+        mongo_command_seconds.inc(collection, event.command_name, amount=seconds)
+        if failed:
+            mongo_command_failures.inc(collection, event.command_name)
+        if stats is not None:
+            stats.mongo_seconds += seconds
+            stats.mongo_commands += 1
+            if shape is not None and len(stats.shapes) < MAX_SHAPES:
+                stats.shapes.append({"collection": collection, "command": event.command_name,
+                                     "ms": round(seconds * 1000, 2), **shape})
+
+    def succeeded(self, event):
+        self._finish(event, failed=False)
+
+    def failed(self, event):
+        self._finish(event, failed=True)
+
+command_metrics = CommandMetrics()
+
+def instrument(app):
+    """Time every request to `app` and attribute its MongoDB and serialization time to its route."""
+
+    @app.before_request
+    def start_request_timer():
+        g.metrics_started = time.perf_counter()
+        g.metrics_token = current_request.set(RequestStats())
+
+    @app.after_request
+    def record_request(response):
+        started = g.pop("metrics_started", None)
+        if started is None:
+            return response
+        elapsed = time.perf_counter() - started
+        stats = current_request.get()
+        current_request.reset(g.pop("metrics_token"))
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        http_requests.observe(elapsed, request.method, route, response.status_code)
+        http_request_mongo.observe(stats.mongo_seconds, request.method, route)
+        http_request_serialization.observe(stats.serialization_seconds, request.method, route)
+
+        if SLOW_REQUEST_MS is not None and elapsed * 1000 >= SLOW_REQUEST_MS:
+            slow_request_logger.warning("Slow request: %s %s took %.1f ms", request.method, request.path, elapsed * 1000, extra={
+                "route": route,
+                "status": response.status_code,
+                "duration_ms": round(elapsed * 1000, 2),
+                "mongo_ms": round(stats.mongo_seconds * 1000, 2),
+                "mongo_commands": stats.mongo_commands,
+                "serialization_ms": round(stats.serialization_seconds * 1000, 2),
+                "queries": stats.shapes,
+            })
+        return response
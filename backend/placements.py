@@ -0,0 +1,28 @@
+"""Maintain the placement read model (see "Placement Read Model" in database.py).
+
+    python placements.py rebuild   # recreate every placement from the users collection
+    python placements.py check     # report inconsistencies; exits 1 if there are any
+"""
+import argparse
+import json
+import sys
+from database import check_placements, rebuild_placements
+from indexes import ensure_indexes
+from log_config import configure_logging
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild or check the placement read model.")
+    parser.add_argument("command", choices=["rebuild", "check"])
+    args = parser.parse_args()
+    configure_logging()
+
+    if args.command == "rebuild":
+        ensure_indexes()
+        print(json.dumps(rebuild_placements(), indent=2))
+        return 0
+    report = check_placements()
+    print(json.dumps(report, indent=2, default=str))
+    return 0 if report["consistent"] else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
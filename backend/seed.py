@@ -0,0 +1,17 @@
+"""Seed the predefined hostels and rooms from collections_format.py and build indexes.
+
+Run once per environment (or after changing the seed data), separately from serving:
+
+    python seed.py
+"""
+from database import add_hostels, add_rooms
+from indexes import ensure_indexes
+from log_config import configure_logging
+
+if __name__ == '__main__':
+    configure_logging()
+    print("Built indexes:", ensure_indexes())
+    inserted_ids = add_hostels()
+    print("Inserted hostel IDs:", inserted_ids)
+    inserted_id = add_rooms()
+    print("Inserted room:", inserted_id)
@@ -0,0 +1,178 @@
+"""Signed session tokens carrying the caller's role, bits_id and hostel.
+
+`/login` issues a token signed with SESSION_SECRET (HMAC-SHA1 via itsdangerous, which
+ships with Flask). Authorizing a request only needs the signature and the claims inside
+the token: decoded principals are kept in a per-worker LRU, and revocations (logouts,
+warden reassignments) are synced from the `revoked_tokens` collection at most every
+SESSION_REVOCATION_SYNC seconds, so role checks never wait on a per-request user lookup.
+"""
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+import logging
+import os
+import secrets
+import threading
+import time
+from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
+from cache import InProcessBackend
+from database import revoked_tokens_collection
+
+logger = logging.getLogger(__name__)
+
+SESSION_TTL = int(os.getenv("SESSION_TTL", str(8 * 3600)))
+SESSION_CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE", "4096"))
+SESSION_REVOCATION_SYNC = float(os.getenv("SESSION_REVOCATION_SYNC", "5"))
+# Re-read revocations this far behind the last one seen, to tolerate clock skew between workers
+REVOCATION_OVERLAP = timedelta(seconds=60)
+
+SESSION_SECRET = os.getenv("SESSION_SECRET")
+if not SESSION_SECRET:
+    SESSION_SECRET = secrets.token_urlsafe(32)
+    logger.warning("SESSION_SECRET is not set; using a random key, so tokens are only valid in this process.")
+
+_serializer = URLSafeTimedSerializer(SESSION_SECRET, salt="hostel-session")
+_principals = InProcessBackend(max_entries=SESSION_CACHE_SIZE)
+
+class AccessDenied(Exception):
+    """Raised when a request has no valid session (401) or its role may not call the route (403)."""
+
+    def __init__(self, message: str, status: int):
+        super().__init__(message)
+        self.status = status
+
+@dataclass(frozen=True)
+class Principal:
+    user_id: str
+    email: str
+    role: str
+    bits_id: Optional[str]
+    hostel_name: Optional[str]
+    jti: str
+    issued_at: float
+    expires_at: float
+
+def issue_token(user: dict) -> str:
+    """Sign a session token for an authenticated user document."""
+    return _serializer.dumps({
+        "uid": str(user["_id"]),
+        "sub": user["email"],
+        "role": user["role"],
+        "bits_id": user.get("bits_id"),
+        "hostel_name": user.get("hostel_name"),
+        "jti": secrets.token_urlsafe(12),
+        "iat": time.time(),
+    })
+
+def _load(token: str) -> Optional[Principal]:
+    try:
+        claims = _serializer.loads(token, max_age=SESSION_TTL)
+    except SignatureExpired:
+        return None
+    except BadSignature:
+        logger.warning("Rejected a session token with a bad signature.")
+        return None
+    return Principal(
+        user_id=claims["uid"],
+        email=claims["sub"],
+        role=claims["role"],
+        bits_id=claims.get("bits_id"),
+        hostel_name=claims.get("hostel_name"),
+        jti=claims["jti"],
+        issued_at=claims["iat"],
+        expires_at=claims["iat"] + SESSION_TTL,
+    )
+
+# Revocation Functions
+_revoked_jtis = {}  # jti -> expires_at
+_revoked_before = {}  # email -> tokens issued at or before this time are revoked
+_revocation_lock = threading.Lock()
+_synced_at = 0.0
+_sync_watermark = datetime.utcfromtimestamp(0)
+
+def _apply_revocation(document: dict):
+    if document.get("jti"):
+        _revoked_jtis[document["jti"]] = document["expires_at"].replace(tzinfo=timezone.utc).timestamp()
+    else:
+        email = document["email"]
+        _revoked_before[email] = max(_revoked_before.get(email, 0.0), document["revoked_before"])
+
+def _sync_revocations(force: bool = False):
+    """Pull revocations recorded by other workers since the last sync, at most once per interval."""
+    global _synced_at, _sync_watermark
+    if not force and time.monotonic() - _synced_at < SESSION_REVOCATION_SYNC:
+        return
+    # One thread syncs while the others keep serving from the current list
+    if not _revocation_lock.acquire(blocking=False):
+        return
+    try:
+        documents = revoked_tokens_collection.find({"revoked_at": {"$gte": _sync_watermark - REVOCATION_OVERLAP}})
+        for document in documents:
+            _apply_revocation(document)
+            _sync_watermark = max(_sync_watermark, document["revoked_at"])
+        now = time.time()
+        for jti in [jti for jti, expires_at in _revoked_jtis.items() if expires_at < now]:
+            del _revoked_jtis[jti]
+    except Exception as e:
+        logger.error("Failed to sync revoked sessions, keeping the current list: %s", e)
+    finally:
+        _synced_at = time.monotonic()
+        _revocation_lock.release()
+
+def _record_revocation(document: dict):
+    document["revoked_at"] = datetime.utcnow()
+    revoked_tokens_collection.insert_one(document)
+    _apply_revocation(document)
+
+def revoke_token(principal: Principal):
+    """Revoke one session (logout)."""
+    _record_revocation({
+        "jti": principal.jti,
+        "email": principal.email,
+        "expires_at": datetime.utcfromtimestamp(principal.expires_at),
+    })
+    logger.info("Revoked session for: %s", principal.email)
+
+def revoke_user_sessions(email: str):
+    """Revoke every session issued to a user so far, e.g. after their role or hostel changes."""
+    now = time.time()
+    _record_revocation({
+        "email": email,
+        "revoked_before": now,
+        "expires_at": datetime.utcfromtimestamp(now + SESSION_TTL),
+    })
+    logger.info("Revoked all sessions for: %s", email)
+
+def _is_revoked(principal: Principal) -> bool:
+    return principal.jti in _revoked_jtis or principal.issued_at <= _revoked_before.get(principal.email, -1.0)
+
+def decode_token(token: str) -> Optional[Principal]:
+    """Return the principal for a valid, unrevoked token, or None."""
+    if not token:
+        return None
+    _sync_revocations()
+    principal = _principals.get(token)
+    if not isinstance(principal, Principal):
+        principal = _load(token)
+        if principal is None:
+            return None
+        _principals.set(token, principal, principal.expires_at - time.time())
+    if _is_revoked(principal):
+        return None
+    return principal
+
+def authorize(authorization: Optional[str], roles, hostel_name: Optional[str] = None) -> Principal:
+    """Check an `Authorization: Bearer <token>` header against the roles allowed on a route.
+
+    Wardens are further limited to their own hostel when the route is scoped to one.
+    Raises AccessDenied when the request may not proceed.
+    """
+    scheme, _, token = (authorization or "").partition(" ")
+    principal = decode_token(token.strip()) if scheme.lower() == "bearer" else None
+    if principal is None:
+        raise AccessDenied("Authentication required", 401)
+    if principal.role not in roles:
+        raise AccessDenied("Not allowed for this role", 403)
+    if principal.role == "warden" and hostel_name is not None and hostel_name != principal.hostel_name:
+        raise AccessDenied("Not allowed for this hostel", 403)
+    return principal
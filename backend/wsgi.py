@@ -0,0 +1,62 @@
+"""Production launcher: serves main.app with gunicorn across several worker processes.
+
+    python wsgi.py [--bind 0.0.0.0:5000] [--workers N] [--threads N]
+
+The Flask app (and with it the MongoClient in database.py) is imported by each worker
+after fork, so every worker owns its connection pool. Pool size, timeouts and read
+preference come from the MONGO_* environment variables read in database.py; keep
+MONGO_MAX_POOL_SIZE at least as large as --threads, and set SESSION_SECRET so every
+worker accepts the session tokens the others issue. Seed data is loaded separately
+with `python seed.py`.
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+from gunicorn.app.base import BaseApplication
+
+logger = logging.getLogger(__name__)
+
+class HostelApplication(BaseApplication):
+    def __init__(self, options: dict):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        # Imported here, in the worker, so no MongoClient is created before fork
+        from main import app
+        return app
+
+def post_fork(server, worker):
+    server.log.info(f"Worker {worker.pid} started; it will open its own MongoDB connection pool.")
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the Hostel Mate API under gunicorn.")
+    parser.add_argument("--bind", default=os.getenv("BIND", "0.0.0.0:5000"))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1)))
+    parser.add_argument("--threads", type=int, default=int(os.getenv("WEB_THREADS", "4")))
+    parser.add_argument("--timeout", type=int, default=int(os.getenv("WEB_TIMEOUT", "30")))
+    parser.add_argument("--max-requests", type=int, default=int(os.getenv("WEB_MAX_REQUESTS", "10000")),
+                        help="recycle a worker after this many requests (0 disables)")
+    args = parser.parse_args()
+
+    HostelApplication({
+        "bind": args.bind,
+        "workers": args.workers,
+        "threads": args.threads,
+        "worker_class": "gthread",
+        "timeout": args.timeout,
+        "graceful_timeout": args.timeout,
+        "keepalive": 5,
+        "max_requests": args.max_requests,
+        "max_requests_jitter": args.max_requests // 10,
+        "preload_app": False,
+        "post_fork": post_fork,
+    }).run()
+
+if __name__ == '__main__':
+    main()
@@ -7,4 +7,25 @@ const api = axios.create({
   },
 });
 
-export default api;
\ No newline at end of file
+// Send the session token issued at login with every request
+api.interceptors.request.use((config) => {
+  const token = localStorage.getItem('token');
+  if (token) {
+    config.headers.Authorization = `Bearer ${token}`;
+  }
+  return config;
+});
+
+// An expired or revoked session sends the user back to the login page
+api.interceptors.response.use(
+  (response) => response,
+  (error) => {
+    if (error.response && error.response.status === 401 && error.config.headers.Authorization) {
+      localStorage.clear();
+      window.location.assign('/login');
+    }
+    return Promise.reject(error);
+  }
+);
+
+export default api;
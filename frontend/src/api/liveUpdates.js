@@ -0,0 +1,26 @@
+import api from './axios';
+
+// Listen for changes to a pending queue over Server-Sent Events.
+// onChange receives { application, pending } for each application entering, changing in
+// or leaving the queue; onResync is called when updates were missed and the list should
+// be fetched again. Returns a function that closes the stream.
+export const subscribeToQueue = (path, { onChange, onResync }) => {
+  const token = localStorage.getItem('token');
+  // EventSource cannot send headers, so the session token goes in the query string
+  const source = new EventSource(`${api.defaults.baseURL}${path}?access_token=${encodeURIComponent(token)}`);
+  source.onmessage = (message) => onChange(JSON.parse(message.data));
+  source.addEventListener('resync', onResync);
+  return () => source.close();
+};
+
+// Apply one change to a list of applications: add, replace or remove it
+export const applyQueueChange = (requests, { application, pending }) => {
+  const others = requests.filter((request) => request._id !== application._id);
+  if (!pending) {
+    return others;
+  }
+  if (others.length === requests.length) {
+    return [...requests, application];
+  }
+  return requests.map((request) => (request._id === application._id ? application : request));
+};
@@ -10,13 +10,19 @@ import {
   IconButton,
 } from '@chakra-ui/react';
 import { FaBars } from 'react-icons/fa';
+import { postData } from '../api/apiFunctions';
 
 const Navbar = ({ setIsLoggedIn, setUserRole }) => {
   const isMobile = useBreakpointValue({ base: true, md: false });
   const navigate = useNavigate();
   const isLoggedIn = !!localStorage.getItem('userLoggedIn'); // Check login status from local storage
 
-  const handleLogout = () => {
+  const handleLogout = async () => {
+    try {
+      await postData('/logout', {}); // Revoke the session token on the server
+    } catch (error) {
+      console.error('Logout request failed:', error);
+    }
     localStorage.clear(); // Clear local storage on logout
     setIsLoggedIn(false); // Update login state
     setUserRole(''); // Reset role state
@@ -36,6 +36,7 @@ const Login = ({ setIsLoggedIn, setUserRole }) => {
         const response = await postData('/login', values);
         if (response && response.user) {
           localStorage.setItem('userLoggedIn', 'true');
+          localStorage.setItem('token', response.token);
           localStorage.setItem('userRole', response.user.role);
           localStorage.setItem('userEmail', response.user.email);
           setIsLoggedIn(true);
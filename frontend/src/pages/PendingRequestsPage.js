@@ -1,6 +1,7 @@
 import React, { useEffect, useState } from 'react';
 import { Box, Heading, Text, Container, Spinner, VStack, Select, Button, useToast } from '@chakra-ui/react';
 import { getData, updateData } from '../api/apiFunctions';
+import { subscribeToQueue, applyQueueChange } from '../api/liveUpdates';
 
 const PendingRequestsPage = () => {
   const [requests, setRequests] = useState([]);
@@ -33,6 +34,14 @@ const PendingRequestsPage = () => {
     fetchData();
   }, [toast]);
 
+  // Keep the list current with live updates instead of re-fetching it
+  useEffect(() => {
+    return subscribeToQueue('/pending-requests-admin/stream', {
+      onChange: (change) => setRequests((prevRequests) => applyQueueChange(prevRequests, change)),
+      onResync: async () => setRequests(await getData('/pending-requests-admin')),
+    });
+  }, []);
+
   const handleHostelSelection = (bitsId, hostelName) => {
     // Update selected hostel for each student's bits_id
     setSelectedHostels((prev) => ({
@@ -58,10 +67,22 @@ const PendingRequestsPage = () => {
 
     try {
       // Update request on the backend using bits_id
-      await updateData(`/assign-hostel/${bitsId}`, {
+      const result = await updateData(`/assign-hostel/${bitsId}`, {
         hostel_name: selectedHostel,
       });
 
+      // A full hostel waitlists the student; the request stays pending until a bed frees up
+      if (result.status === 'waitlisted') {
+        toast({
+          title: 'Student Waitlisted',
+          description: `${selectedHostel} is full. BITS ID ${bitsId} is number ${result.position} on its waitlist.`,
+          status: 'info',
+          duration: 5000,
+          isClosable: true,
+        });
+        return;
+      }
+
       // Update the request list to mark the request as processed
       setRequests((prevRequests) =>
         prevRequests.filter((request) => request.bits_id !== bitsId)
@@ -1,6 +1,7 @@
 import React, { useEffect, useState } from 'react';
 import { Box, Heading, Text, VStack, Container, Spinner, Button, Select, useToast } from '@chakra-ui/react';
 import { getData, updateData } from '../api/apiFunctions';
+import { subscribeToQueue, applyQueueChange } from '../api/liveUpdates';
 
 const PendingRoomRequests = () => {
   const [requests, setRequests] = useState([]);
@@ -63,6 +64,18 @@ const PendingRoomRequests = () => {
     fetchPendingRequestsAndRooms();
   }, [wardenData, toast]); 
 
+  // Keep the list current with live updates for the warden's hostel instead of re-fetching it
+  useEffect(() => {
+    if (!wardenData || !wardenData.hostel_name) {
+      return undefined;
+    }
+    const path = `/pending-requests-warden/${wardenData.hostel_name}`;
+    return subscribeToQueue(`${path}/stream`, {
+      onChange: (change) => setRequests((prev) => applyQueueChange(prev, change)),
+      onResync: async () => setRequests(await getData(path)),
+    });
+  }, [wardenData]);
+
   const handleRoomSelection = (bits_id, room_number) => {
     setSelectedRooms((prev) => ({
       ...prev,
@@ -7,28 +7,26 @@ import {
   FormLabel,
   Input,
   Heading,
-  Select,
   useToast,
   Stack,
   Icon,
   Text,
   useColorModeValue,
 } from '@chakra-ui/react';
-import { FaUser, FaEnvelope, FaLock, FaPhone, FaIdCard, FaUserTag } from 'react-icons/fa';
+import { FaUser, FaEnvelope, FaLock, FaPhone, FaIdCard } from 'react-icons/fa';
 import { postData } from '../api/apiFunctions';
 
 const RegisterPage = () => {
   const [fullName, setFullName] = useState('');
   const [email, setEmail] = useState('');
   const [password, setPassword] = useState('');
-  const [role, setRole] = useState('');
   const [bitsId, setBitsId] = useState('');
   const [contactNumber, setContactNumber] = useState('');
   const toast = useToast();
 
   const handleRegister = async (e) => {
     e.preventDefault();
-    if (!email || !role || !fullName || !password || !bitsId || !contactNumber) {
+    if (!email || !fullName || !password || !bitsId || !contactNumber) {
       toast({
         title: 'Error',
         description: 'All fields are required!',
@@ -43,7 +41,6 @@ const RegisterPage = () => {
       name: fullName,
       email: email,
       password: password,
-      role: role,
       bits_id: bitsId,
       contact_number: contactNumber,
     };
@@ -142,21 +139,6 @@ const RegisterPage = () => {
               />
             </FormControl>
 
-            <FormControl isRequired>
-              <FormLabel>Role</FormLabel>
-              <Select
-                placeholder="Select role"
-                value={role}
-                onChange={(e) => setRole(e.target.value)}
-                size="md"
-                icon={<Icon as={FaUserTag} color="gray.500" />}
-              >
-                <option value="student">Student</option>
-                <option value="warden">Warden</option>
-                <option value="admin">Admin</option>
-              </Select>
-            </FormControl>
-
             <Button
               type="submit"
               colorScheme="teal"